@@ -0,0 +1,67 @@
+"""
+Compares encryption and decryption throughput of the DDH based schemes with charm's integer groups and with the
+native backend of Python/gmpy2 integers.
+
+Usage: python -m src.benchmarks.group_backends [--bits 1024] [--length 10] [--repetitions 20]
+"""
+import argparse
+import time
+from random import SystemRandom
+
+import src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip as ddh_pk_ip
+import src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh as fully_secure_fe_ddh
+from src.helpers.group_backend import CHARM, NATIVE
+from src.helpers.native_group import gmpy2
+
+# bound for vector elements, inner products stay below length * BOUND ** 2
+BOUND = 10
+
+
+def _throughput(operation, repetitions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        operation()
+    return repetitions / (time.perf_counter() - start)
+
+
+def benchmark_ddh_pk_ip(backend: str, bits: int, length: int, repetitions: int) -> (float, float):
+    rng = SystemRandom()
+    x = [rng.randrange(BOUND) for _ in range(length)]
+    y = [rng.randrange(BOUND) for _ in range(length)]
+    limit = length * BOUND ** 2
+    mpk, msk = ddh_pk_ip.set_up(bits, length, backend=backend)
+    ciphertext = ddh_pk_ip.encrypt(mpk, x)
+    key = ddh_pk_ip.get_functional_key(mpk, msk, y)
+    return (_throughput(lambda: ddh_pk_ip.encrypt(mpk, x), repetitions),
+            _throughput(lambda: ddh_pk_ip.decrypt(mpk, ciphertext, key, y, limit), repetitions))
+
+
+def benchmark_fully_secure_fe_ddh(backend: str, bits: int, length: int, repetitions: int) -> (float, float):
+    rng = SystemRandom()
+    x = [rng.randrange(BOUND) for _ in range(length)]
+    y = [rng.randrange(BOUND) for _ in range(length)]
+    limit = length * BOUND ** 2
+    mpk, msk = fully_secure_fe_ddh.set_up(bits, length, backend=backend)
+    ciphertext = fully_secure_fe_ddh.encrypt(mpk, x)
+    key = fully_secure_fe_ddh.get_functional_key(mpk, msk, y)
+    return (_throughput(lambda: fully_secure_fe_ddh.encrypt(mpk, x), repetitions),
+            _throughput(lambda: fully_secure_fe_ddh.decrypt(mpk, key, ciphertext, y, limit), repetitions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bits', type=int, default=1024, help='bit-size of the modulus of the integer groups')
+    parser.add_argument('--length', type=int, default=10, help='length of encrypted vectors')
+    parser.add_argument('--repetitions', type=int, default=20, help='number of timed operations')
+    args = parser.parse_args()
+
+    print(f'modulus: {args.bits} bits, vector length: {args.length}, gmpy2: {"yes" if gmpy2 else "no"}')
+    print(f'{"scheme":<22}{"backend":<10}{"encrypt/s":>12}{"decrypt/s":>12}')
+    for name, benchmark in [('ddh_pk_ip', benchmark_ddh_pk_ip), ('fully_secure_fe_ddh', benchmark_fully_secure_fe_ddh)]:
+        for backend in [CHARM, NATIVE]:
+            encrypt, decrypt = benchmark(backend, args.bits, args.length, args.repetitions)
+            print(f'{name:<22}{backend:<10}{encrypt:>12.1f}{decrypt:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+class WireFormatError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
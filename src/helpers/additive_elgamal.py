@@ -6,7 +6,7 @@ Adapted from Charm pkenc_elgamal85 scheme (https://jhuisi.github.io/charm/charm/
 | Notes: 
 
 * type:          encryption (public key)
-* setting:       DDH-hard prime order group
+* setting:       DDH-hard prime order group (integer group or elliptic curve group)
 * assumption:    DDH
 
 :Authors:        Cecylia Borek
@@ -15,7 +15,8 @@ Adapted from Charm pkenc_elgamal85 scheme (https://jhuisi.github.io/charm/charm/
 
 from charm.toolbox.PKEnc import PKEnc
 
-from src.helpers.helpers import dummy_discrete_log, get_int, get_modulus
+from src.helpers.helpers import group_discrete_log, power, parallel_multi_power, MULTI_POWER_CHUNK
+from src.helpers.serialization import register_type
 
 debug = False
 
@@ -50,7 +51,8 @@ class ElGamalCipher(dict):
 
 class AdditiveElGamal(PKEnc):
     """Additive ElGamal Scheme allowing for shared randomness for encryption.
-    Group generator is an instance variable.
+    Group and group generator are instance variables, the group can be an integer group or an elliptic curve group.
+    Integer group parameters are taken from p and q if provided, otherwise from the group or generated by keygen.
 
     Args:
         PKEnc (_type_): _description_
@@ -58,16 +60,20 @@ class AdditiveElGamal(PKEnc):
 
     def __init__(self, groupObj, p=0, q=0):
         PKEnc.__init__(self)
-        global group
-        group = groupObj
-        group.p, group.q, group.r = p, q, 2
-        self.g = group.randomGen()
+        self.group = groupObj
+        if self.group.groupSetting() == 'integer' and p != 0 and q != 0:
+            self.group.p, self.group.q, self.group.r = p, q, 2
+        self.g = self.group.randomGen() if not self._needs_paramgen() else None
+
+    def _needs_paramgen(self):
+        return self.group.groupSetting() == 'integer' and (self.group.p == 0 or self.group.q == 0)
 
     def keygen(self, secparam=1024):
-        if group.p == 0 or group.q == 0:
-            group.paramgen(secparam)
+        if self._needs_paramgen():
+            self.group.paramgen(secparam)
+            self.g = self.group.randomGen()
         # x is private, g is public param
-        x = group.random()
+        x = self.group.random()
         h = self.g ** x
         if debug:
             print('Public parameters...')
@@ -79,19 +85,50 @@ class AdditiveElGamal(PKEnc):
         sk = {'x': x}
         return pk, sk
 
-    def encrypt(self, pk, x, r):
-        c1 = pk['g'] ** r
-        s = pk['h'] ** r
-        # exponential ElGamal
-        m = pk['g'] ** x
+    def keygen_chunks(self, count, secparam=1024, processes=None, chunk_size=MULTI_POWER_CHUNK):
+        """Generates count key pairs like keygen, yielding lists of (pk, sk) for chunks of chunk_size keys.
+        The exponentiations are spread across a process pool."""
+        if self._needs_paramgen():
+            self.group.paramgen(secparam)
+            self.g = self.group.randomGen()
+        xs = [self.group.random() for _ in range(count)]
+        start = 0
+        for hs in parallel_multi_power([self.g], [[x] for x in xs], processes, chunk_size):
+            yield [({'g': self.g, 'h': h}, {'x': x}) for h, x in zip(hs, xs[start:start + len(hs)])]
+            start += len(hs)
+
+    def randomness(self, pk, r):
+        """Returns the part of an encryption with randomness r that does not depend on the message, it can be passed
+        to exactly one call of encrypt"""
+        return {'c1': pk['g'] ** r, 's': pk['h'] ** r}
+
+    def encrypt(self, pk, x, r=None, randomness=None):
+        if randomness is None:
+            randomness = self.randomness(pk, r)
+        c1 = randomness['c1']
+        s = randomness['s']
+        # exponential ElGamal, with a table lookup if the public key carries an encoding table for small messages
+        m = power(pk['g'], x, pk.get('encoding'))
         c2 = m * s
         return ElGamalCipher({'c1': c1, 'c2': c2})
 
     def decrypt(self, pk, sk, c, limit):
         s = c['c1'] ** sk['x']
-        m = c['c2'] * (s ** -1)
-        M = m % group.p
+        m = c['c2'] / s
         if debug: print('m => %s' % m)
-        if debug: print('dec M => %s' % M)
-        x = dummy_discrete_log(get_int(pk['g']), M, get_modulus(pk['g']), limit)
+        x = group_discrete_log(pk['g'], m, limit)
         return x
+
+
+def _restore_cipher(fields: dict) -> AdditiveElGamal:
+    # the generator is restored, not sampled again
+    cipher = AdditiveElGamal.__new__(AdditiveElGamal)
+    PKEnc.__init__(cipher)
+    cipher.group = fields['group']
+    cipher.g = fields['g']
+    return cipher
+
+
+register_type(ElGamalCipher, 'ElGamalCipher', dict, lambda fields: ElGamalCipher(dict(fields)))
+register_type(AdditiveElGamal, 'AdditiveElGamal', lambda cipher: {'group': cipher.group, 'g': cipher.g},
+              _restore_cipher)
@@ -0,0 +1,99 @@
+"""
+Discrete Gaussian sampling with a cumulative distribution table (CDT).
+
+For standard deviation sigma, the probabilities of integers x with |x| <= GAUSSIAN_TAIL * sigma, proportional to
+exp(-x^2 / (2 sigma^2)), are stored as a cumulative table of 63-bit integers. A sample is the position of a uniform
+63-bit integer in the table, so whole arrays of samples are drawn with one os.urandom call and one binary search.
+
+Samples are drawn in bulk into a buffer of every sampler and handed out in slices, a slice is never handed out twice.
+The buffer is dropped in processes forked after it was filled, so that forked workers do not reuse the same samples.
+"""
+import math
+import os
+import threading
+from typing import Dict
+
+import numpy as np
+
+# probability mass beyond GAUSSIAN_TAIL standard deviations is below 2^-100
+GAUSSIAN_TAIL = 12
+# precision of the cumulative probabilities
+CDT_BITS = 63
+# maximal number of entries of a table, about 16 MB
+MAX_TABLE_SIZE = 1 << 21
+# number of samples drawn at once
+SAMPLE_BUFFER = 1 << 16
+
+_samplers: Dict[float, 'DiscreteGaussianSampler'] = {}
+_samplers_lock = threading.Lock()
+
+
+def _cumulative_table(standard_dev: float) -> (np.ndarray, int):
+    """Returns cumulative probabilities of -bound, ..., bound scaled to 2^CDT_BITS and bound"""
+    bound = math.ceil(GAUSSIAN_TAIL * standard_dev)
+    if 2 * bound + 1 > MAX_TABLE_SIZE:
+        raise ValueError(f'Standard deviation {standard_dev} is too large for a table of {MAX_TABLE_SIZE} entries')
+    if bound == 0:
+        return np.array([1 << CDT_BITS], dtype=np.uint64), 0
+    densities = [math.exp(-x * x / (2 * standard_dev ** 2)) for x in range(-bound, bound + 1)]
+    total = math.fsum(densities)
+    weights = [round(density / total * (1 << CDT_BITS)) for density in densities]
+    # the rounding errors are moved to the most likely value, so the probabilities sum to exactly 1
+    weights[bound] += (1 << CDT_BITS) - sum(weights)
+    return np.cumsum(np.array(weights, dtype=np.uint64)), bound
+
+
+class DiscreteGaussianSampler:
+    """Sampler of the discrete Gaussian distribution centered at 0 with the given standard deviation"""
+
+    def __init__(self, standard_dev: float, buffer_size: int = SAMPLE_BUFFER):
+        if standard_dev < 0:
+            raise ValueError(f'Standard deviation has to be non-negative, {standard_dev} was provided')
+        self.standard_dev = standard_dev
+        self.buffer_size = buffer_size
+        self._table, self._bound = _cumulative_table(standard_dev)
+        self._buffer = np.empty(0, dtype=np.int64)
+        self._position = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _draw(self, count: int) -> np.ndarray:
+        uniform = np.frombuffer(os.urandom(8 * count), dtype=np.uint64) >> np.uint64(64 - CDT_BITS)
+        return np.searchsorted(self._table, uniform, side='right').astype(np.int64) - self._bound
+
+    def sample(self, size: tuple) -> np.ndarray:
+        """Returns int64 array of the given shape of independent samples
+
+        Args:
+            size (tuple): shape of the array
+
+        Returns:
+            np.ndarray: the samples
+        """
+        count = int(np.prod(size))
+        with self._lock:
+            if self._pid != os.getpid():
+                self._buffer, self._position, self._pid = np.empty(0, dtype=np.int64), 0, os.getpid()
+            if len(self._buffer) - self._position < count:
+                fresh = self._draw(max(self.buffer_size, count))
+                self._buffer = np.concatenate((self._buffer[self._position:], fresh))
+                self._position = 0
+            samples = self._buffer[self._position:self._position + count].reshape(size)
+            self._position += count
+        return samples
+
+
+def gaussian_sampler(standard_dev: float) -> DiscreteGaussianSampler:
+    """Returns the shared sampler of the given standard deviation, it is created with its table on the first request
+
+    Args:
+        standard_dev (float): standard deviation of the distribution
+
+    Returns:
+        DiscreteGaussianSampler: the sampler
+    """
+    standard_dev = float(standard_dev)
+    with _samplers_lock:
+        if standard_dev not in _samplers:
+            _samplers[standard_dev] = DiscreteGaussianSampler(standard_dev)
+        return _samplers[standard_dev]
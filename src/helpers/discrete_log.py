@@ -0,0 +1,250 @@
+"""
+Baby-step giant-step discrete logarithm solver used for recovering inner products in decryption of the DDH based
+schemes.
+
+Baby-step tables depend only on the base of the logarithm and the modulus, so they are cached per (base, modulus)
+and reused by subsequent calls. Only the first decryption for a given generator pays for building the table, the
+following ones only perform O(limit / table size) giant steps.
+
+Limits too big for a baby-step table are handed over to Pollard's kangaroo method.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.helpers.discrete_log_table import FingerprintTable
+from src.helpers.number_theory import ceil_sqrt, mod_inverse
+from src.helpers.pollard_kangaroo import pollard_kangaroo, pollard_kangaroo_many
+
+# upper bound for the number of entries of a cached baby-step table, bigger limits are handled with more giant steps
+MAX_BABY_STEPS = 1 << 22
+# number of giant steps looked up in the baby-step table at once
+GIANT_STEPS_CHUNK = 256
+# limit of discrete logarithm above which baby-step tables get too big and Pollard's kangaroo method is used instead
+KANGAROO_THRESHOLD = 1 << 40
+
+
+class BabyStepTable:
+    """Table mapping a^j mod p to j for all j < size. The table can be extended in place."""
+
+    def __init__(self, base: int, mod: int):
+        self.base = base % mod
+        self.mod = mod
+        self.size = 0
+        self.steps = {}
+        self.giant_step = 1
+        self._next = 1
+        self._lock = threading.Lock()
+
+    def extend(self, size: int):
+        """Extends the table so that it contains baby steps for all exponents smaller than size
+
+        Args:
+            size (int): requested number of baby steps
+        """
+        with self._lock:
+            if size <= self.size:
+                return
+            value = self._next
+            for j in range(self.size, size):
+                self.steps.setdefault(value, j)
+                value = value * self.base % self.mod
+            self._next = value
+            self.giant_step = mod_inverse(value, self.mod)
+            self.size = size
+
+    def snapshot(self) -> Tuple[int, int]:
+        """Returns (size, giant_step) read together, so that a concurrent extend cannot pair the size with the giant
+        step of another size"""
+        with self._lock:
+            return self.size, self.giant_step
+
+    def lookup(self, value: int) -> Optional[int]:
+        return self.steps.get(value)
+
+    def lookup_many(self, values: List[int]) -> List[Optional[int]]:
+        return [self.steps.get(value) for value in values]
+
+
+_baby_step_tables: Dict[Tuple[int, int], BabyStepTable] = {}
+_fingerprint_tables: Dict[Tuple[int, int], FingerprintTable] = {}
+_baby_step_tables_lock = threading.Lock()
+
+
+def get_baby_step_table(base: int, mod: int, size: int):
+    """Returns cached baby-step table for base and mod containing at least size entries (up to MAX_BABY_STEPS).
+    Tables registered with register_baby_step_table are returned as they are.
+
+    Args:
+        base (int): base of logarithm
+        mod (int): modulus of logarithm
+        size (int): requested number of baby steps
+
+    Returns:
+        the cached table
+    """
+    key = (base % mod, mod)
+    with _baby_step_tables_lock:
+        table = _baby_step_tables.get(key)
+        if table is None:
+            table = BabyStepTable(base, mod)
+            _baby_step_tables[key] = table
+    if isinstance(table, BabyStepTable):
+        table.extend(min(size, MAX_BABY_STEPS))
+    return table
+
+
+def get_batch_table(base: int, mod: int, size: int):
+    """Returns the table used for batched discrete logarithms in base and mod. That is the registered table if there
+    is one, otherwise a cached FingerprintTable with at least size entries (up to MAX_BABY_STEPS)
+
+    Args:
+        base (int): base of logarithm
+        mod (int): modulus of logarithm
+        size (int): requested number of baby steps
+
+    Returns:
+        the table
+    """
+    key = (base % mod, mod)
+    size = min(size, MAX_BABY_STEPS)
+    with _baby_step_tables_lock:
+        registered = _baby_step_tables.get(key)
+        if registered is not None and not isinstance(registered, BabyStepTable):
+            return registered
+        table = _fingerprint_tables.get(key)
+    if table is None or table.size < size:
+        table = FingerprintTable.build(base, mod, size)
+        with _baby_step_tables_lock:
+            _fingerprint_tables[key] = table
+    return table
+
+
+def register_baby_step_table(table):
+    """Makes the provided table, e.g. a memory-mapped FingerprintTable, the cached table for its base and modulus,
+    so that all following discrete logarithm calculations in that base use it
+
+    Args:
+        table: baby-step table with base, mod, size, giant_step attributes and snapshot and lookup_many methods
+    """
+    with _baby_step_tables_lock:
+        _baby_step_tables[(table.base, table.mod)] = table
+
+
+def clear_baby_step_tables():
+    """Removes all cached baby-step tables"""
+    with _baby_step_tables_lock:
+        _baby_step_tables.clear()
+        _fingerprint_tables.clear()
+
+
+def baby_step_giant_step(a: int, b: int, mod: int, limit: int, table=None) -> Optional[int]:
+    """Calculates the smallest x < limit such that a^x = b mod mod using baby-step giant-step algorithm.
+    Unless a table is provided, the cached baby-step table for a and mod is used.
+
+    Args:
+        a (int): base of logarithm
+        b (int): number from which the logarithm is calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the result should lie
+        table: baby-step table for a and mod (BabyStepTable or FingerprintTable) to use instead of the cached one
+
+    Returns:
+        int: result of logarithm or None if the result was not found within the limit
+    """
+    if limit <= 0:
+        return None
+    if table is None:
+        table = get_baby_step_table(a, mod, ceil_sqrt(limit))
+    m, giant_step = table.snapshot()
+    steps = (limit + m - 1) // m
+    gamma = b % mod
+    i = 0
+    while i < steps:
+        chunk = [0] * min(GIANT_STEPS_CHUNK, steps - i)
+        for k in range(len(chunk)):
+            chunk[k] = gamma
+            gamma = gamma * giant_step % mod
+        for k, j in enumerate(table.lookup_many(chunk)):
+            if j is not None:
+                x = (i + k) * m + j
+                return x if x < limit else None
+        i += len(chunk)
+    return None
+
+
+def baby_step_giant_step_batch(a: int, targets: List[int], mod: int, limit: int, table=None) -> List[Optional[int]]:
+    """Calculates discrete logarithms of all targets in the base of a modulo mod with baby-step giant-step algorithm.
+    The baby-step table is sized for the whole batch, sqrt(len(targets) * limit) entries, and every giant step looks up
+    all unresolved targets in a single vectorized lookup.
+
+    Args:
+        a (int): base of logarithm
+        targets (List[int]): numbers from which the logarithms are calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the results should lie
+        table: baby-step table for a and mod to use instead of the cached one
+
+    Returns:
+        List[Optional[int]]: for every target the smallest x < limit such that a^x = target mod mod or None if the
+        result was not found within the limit
+    """
+    results = [None] * len(targets)
+    if limit <= 0 or len(targets) == 0:
+        return results
+    if table is None:
+        table = get_batch_table(a, mod, ceil_sqrt(len(targets) * limit))
+    m, giant_step = table.snapshot()
+    gammas = [target % mod for target in targets]
+    pending = list(range(len(targets)))
+    for i in range((limit + m - 1) // m):
+        if not pending:
+            break
+        unresolved = []
+        for k, j in zip(pending, table.lookup_many([gammas[k] for k in pending])):
+            if j is not None:
+                x = i * m + j
+                results[k] = x if x < limit else None
+            else:
+                gammas[k] = gammas[k] * giant_step % mod
+                unresolved.append(k)
+        pending = unresolved
+    return results
+
+
+def discrete_log(a: int, b: int, mod: int, limit: int, table=None) -> Optional[int]:
+    """Calculates discrete logarithm of b in the base of a modulo mod with baby-step giant-step algorithm, or with
+    parallel Pollard's kangaroo method if no table is provided and the limit exceeds KANGAROO_THRESHOLD
+
+    Args:
+        a (int): base of logarithm
+        b (int): number from which the logarithm is calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the result should lie
+        table: baby-step table for a and mod to use instead of the cached one
+
+    Returns:
+        int: result of logarithm or None if the result was not found within the limit
+    """
+    if table is None and limit > KANGAROO_THRESHOLD:
+        return pollard_kangaroo(a, b, mod, limit)
+    return baby_step_giant_step(a, b, mod, limit, table)
+
+
+def discrete_log_many(a: int, targets: List[int], mod: int, limit: int, table=None) -> List[Optional[int]]:
+    """Calculates discrete logarithms of all targets in the base of a modulo mod at once with batched baby-step
+    giant-step algorithm, or one by one with Pollard's kangaroo method in a shared process pool if no table is provided
+    and the limit exceeds KANGAROO_THRESHOLD
+
+    Args:
+        a (int): base of logarithm
+        targets (List[int]): numbers from which the logarithms are calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the results should lie
+        table: baby-step table for a and mod to use instead of the cached one
+
+    Returns:
+        List[Optional[int]]: results of logarithms, None for the ones not found within the limit
+    """
+    if table is None and limit > KANGAROO_THRESHOLD:
+        return pollard_kangaroo_many(a, targets, mod, limit)
+    return baby_step_giant_step_batch(a, targets, mod, limit, table)
@@ -0,0 +1,135 @@
+"""
+Compact baby-step tables for the baby-step giant-step discrete logarithm solver.
+
+Instead of a dictionary of full group elements, the table stores 64-bit fingerprints (the lowest 64 bits) of a^j mod p
+in a sorted NumPy array together with the corresponding exponents j. Lookups are vectorized with `np.searchsorted`
+and every match is verified against the full value, so fingerprint collisions cannot produce wrong results.
+
+Tables are built once, saved to disk keyed by the base and the modulus and loaded by every worker process as
+read-only memory maps, so the operating system shares a single copy of the table between all of them.
+"""
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.helpers.number_theory import mod_inverse
+
+FINGERPRINT_MASK = (1 << 64) - 1
+
+
+def fingerprint(value: int) -> int:
+    return value & FINGERPRINT_MASK
+
+
+def table_key(base: int, mod: int) -> str:
+    """Returns the name under which the table for base and mod is stored on disk"""
+    return hashlib.sha256(f'{base % mod}:{mod}'.encode()).hexdigest()[:32]
+
+
+class FingerprintTable:
+    """Sorted fingerprints of a^j mod p for all j < size with the corresponding exponents"""
+
+    def __init__(self, base: int, mod: int, fingerprints: np.ndarray, exponents: np.ndarray):
+        if len(fingerprints) != len(exponents):
+            raise ValueError('Fingerprints and exponents of the table have different lengths')
+        self.base = base % mod
+        self.mod = mod
+        self.fingerprints = fingerprints
+        self.exponents = exponents
+        self.size = len(fingerprints)
+        self.giant_step = mod_inverse(pow(self.base, self.size, mod), mod)
+
+    def snapshot(self) -> Tuple[int, int]:
+        """Returns (size, giant_step), the table does not change"""
+        return self.size, self.giant_step
+
+    @classmethod
+    def build(cls, base: int, mod: int, size: int):
+        """Computes the table of baby steps a^j mod p for all j < size
+
+        Args:
+            base (int): base of logarithm
+            mod (int): modulus of logarithm
+            size (int): number of baby steps
+
+        Returns:
+            FingerprintTable: the table
+        """
+        base = base % mod
+        steps = [0] * size
+        value = 1
+        for j in range(size):
+            steps[j] = value & FINGERPRINT_MASK
+            value = value * base % mod
+        fingerprints = np.array(steps, dtype=np.uint64)
+        # stable sort keeps the smallest exponent first among equal fingerprints
+        order = np.argsort(fingerprints, kind='stable')
+        exponents_type = np.uint32 if size <= np.iinfo(np.uint32).max else np.uint64
+        return cls(base, mod, fingerprints[order], order.astype(exponents_type))
+
+    @classmethod
+    def load(cls, directory: str, base: int, mod: int, mmap_mode: Optional[str] = 'r'):
+        """Loads the table for base and mod saved in directory. By default the arrays are memory mapped read-only,
+        so processes loading the same table share its pages.
+
+        Args:
+            directory (str): directory in which the table was saved
+            base (int): base of logarithm
+            mod (int): modulus of logarithm
+            mmap_mode (str): memory map mode passed to np.load, None loads the table into memory
+
+        Raises:
+            ValueError: if the stored table doesn't correspond to base and mod
+
+        Returns:
+            FingerprintTable: the table
+        """
+        fingerprints_path, exponents_path = cls._paths(directory, base, mod)
+        fingerprints = np.load(fingerprints_path, mmap_mode=mmap_mode)
+        exponents = np.load(exponents_path, mmap_mode=mmap_mode)
+        table = cls(base, mod, fingerprints, exponents)
+        if table.size > 0 and int(fingerprints[0]) != fingerprint(pow(table.base, int(exponents[0]), mod)):
+            raise ValueError(f'Table stored in {directory} does not correspond to base {base} and modulus {mod}')
+        return table
+
+    def save(self, directory: str):
+        """Saves the table in directory under the name derived from its base and modulus"""
+        os.makedirs(directory, exist_ok=True)
+        fingerprints_path, exponents_path = self._paths(directory, self.base, self.mod)
+        np.save(fingerprints_path, np.asarray(self.fingerprints))
+        np.save(exponents_path, np.asarray(self.exponents))
+
+    @staticmethod
+    def _paths(directory: str, base: int, mod: int):
+        key = table_key(base, mod)
+        return os.path.join(directory, f'{key}.fingerprints.npy'), os.path.join(directory, f'{key}.exponents.npy')
+
+    def lookup_many(self, values: List[int]) -> List[Optional[int]]:
+        """Finds the exponents of values in the table
+
+        Args:
+            values (List[int]): numbers modulo mod to look up
+
+        Returns:
+            List[Optional[int]]: for every value the smallest j < size with a^j = value mod mod or None
+        """
+        queries = np.array([value & FINGERPRINT_MASK for value in values], dtype=np.uint64)
+        positions = np.searchsorted(self.fingerprints, queries)
+        in_range = positions < self.size
+        hits = np.zeros(len(values), dtype=bool)
+        hits[in_range] = self.fingerprints[positions[in_range]] == queries[in_range]
+        found = [None] * len(values)
+        for k in np.flatnonzero(hits):
+            position = int(positions[k])
+            while position < self.size and self.fingerprints[position] == queries[k]:
+                j = int(self.exponents[position])
+                if pow(self.base, j, self.mod) == values[k]:
+                    found[k] = j
+                    break
+                position += 1
+        return found
+
+    def lookup(self, value: int) -> Optional[int]:
+        return self.lookup_many([value])[0]
@@ -0,0 +1,331 @@
+"""
+Prime order elliptic curve groups for the DDH based schemes.
+
+Points are written multiplicatively, like elements of charm's integer groups: `P * Q` is the group operation (point
+addition), `P ** k` is scalar multiplication and `P / Q` is P * Q^-1, so the schemes can use them in place of integer
+group elements. ECGroup mirrors the parts of charm's IntegerGroup API used by the schemes (random, randomGen).
+
+Scalar multiplications are done in Jacobian coordinates with a fixed window, points are kept in affine coordinates.
+A compressed point takes 33 bytes, compared to 128 bytes of an element of a 1024-bit integer group.
+"""
+import threading
+from random import SystemRandom
+from typing import Dict, List, Optional, Tuple
+
+from src.helpers.number_theory import ceil_sqrt, mod_inverse
+
+WINDOW = 4
+# upper bound for the number of entries of a cached baby-step table
+MAX_BABY_STEPS = 1 << 20
+
+
+class EllipticCurve:
+    """Short Weierstrass curve y^2 = x^3 + ax + b over F_p with a generator of prime order n and cofactor 1"""
+
+    def __init__(self, name: str, p: int, a: int, b: int, n: int, gx: int, gy: int):
+        self.name = name
+        self.p = p
+        self.a = a % p
+        self.b = b % p
+        self.n = n
+        self.gx = gx
+        self.gy = gy
+
+    @property
+    def generator(self):
+        return ECPoint(self, self.gx, self.gy)
+
+    @property
+    def identity(self):
+        return ECPoint(self, None, None)
+
+    def contains(self, x: int, y: int) -> bool:
+        return (y * y - x * x * x - self.a * x - self.b) % self.p == 0
+
+    def __eq__(self, other):
+        return isinstance(other, EllipticCurve) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return self.name
+
+
+P256 = EllipticCurve(
+    'P-256',
+    p=0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+    a=-3,
+    b=0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+    n=0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+    gx=0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+    gy=0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5
+)
+
+SECP256K1 = EllipticCurve(
+    'secp256k1',
+    p=2 ** 256 - 2 ** 32 - 977,
+    a=0,
+    b=7,
+    n=0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141,
+    gx=0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798,
+    gy=0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8
+)
+
+# supported curves by name
+CURVES = {curve.name: curve for curve in (P256, SECP256K1)}
+
+# point in Jacobian coordinates (X, Y, Z) representing (X / Z^2, Y / Z^3), Z = 0 for the point at infinity
+JacobianPoint = Tuple[int, int, int]
+
+
+def _double(curve: EllipticCurve, point: JacobianPoint) -> JacobianPoint:
+    x, y, z = point
+    if z == 0 or y == 0:
+        return 1, 1, 0
+    p = curve.p
+    yy = y * y % p
+    s = 4 * x * yy % p
+    zz = z * z % p
+    m = (3 * x * x + curve.a * zz * zz) % p
+    x3 = (m * m - 2 * s) % p
+    y3 = (m * (s - x3) - 8 * yy * yy) % p
+    z3 = 2 * y * z % p
+    return x3, y3, z3
+
+
+def _add(curve: EllipticCurve, first: JacobianPoint, second: JacobianPoint) -> JacobianPoint:
+    x1, y1, z1 = first
+    x2, y2, z2 = second
+    if z1 == 0:
+        return second
+    if z2 == 0:
+        return first
+    p = curve.p
+    z1z1 = z1 * z1 % p
+    z2z2 = z2 * z2 % p
+    u1 = x1 * z2z2 % p
+    u2 = x2 * z1z1 % p
+    s1 = y1 * z2 * z2z2 % p
+    s2 = y2 * z1 * z1z1 % p
+    if u1 == u2:
+        if s1 != s2:
+            return 1, 1, 0
+        return _double(curve, first)
+    h = (u2 - u1) % p
+    r = (s2 - s1) % p
+    hh = h * h % p
+    hhh = h * hh % p
+    v = u1 * hh % p
+    x3 = (r * r - hhh - 2 * v) % p
+    y3 = (r * (v - x3) - s1 * hhh) % p
+    z3 = z1 * z2 * h % p
+    return x3, y3, z3
+
+
+def _multi_mul(curve: EllipticCurve, points: List[JacobianPoint], scalars: List[int]) -> JacobianPoint:
+    """Calculates sum scalars[i] * points[i] with Straus' method sharing the doublings, scalars have to be
+    non-negative"""
+    powers = []
+    for point in points:
+        row = [(1, 1, 0), point]
+        for _ in range(2, 1 << WINDOW):
+            row.append(_add(curve, row[-1], point))
+        powers.append(row)
+    bits = max([scalar.bit_length() for scalar in scalars] + [1])
+    mask = (1 << WINDOW) - 1
+    result = (1, 1, 0)
+    for i in reversed(range((bits + WINDOW - 1) // WINDOW)):
+        for _ in range(WINDOW):
+            result = _double(curve, result)
+        for k, scalar in enumerate(scalars):
+            digit = (scalar >> (WINDOW * i)) & mask
+            if digit:
+                result = _add(curve, result, powers[k][digit])
+    return result
+
+
+class ECPoint:
+    """Point of a prime order elliptic curve in affine coordinates, x and y are None for the point at infinity"""
+
+    def __init__(self, curve: EllipticCurve, x: Optional[int], y: Optional[int]):
+        if x is not None and not curve.contains(x, y):
+            raise ValueError(f'Point ({x}, {y}) does not lie on curve {curve}')
+        self.curve = curve
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def _from_jacobian(cls, curve: EllipticCurve, point: JacobianPoint):
+        x, y, z = point
+        if z == 0:
+            return curve.identity
+        p = curve.p
+        z_inv = mod_inverse(z, p)
+        z_inv2 = z_inv * z_inv % p
+        point = cls.__new__(cls)
+        point.curve = curve
+        point.x = x * z_inv2 % p
+        point.y = y * z_inv2 * z_inv % p
+        return point
+
+    def _to_jacobian(self) -> JacobianPoint:
+        if self.x is None:
+            return 1, 1, 0
+        return self.x, self.y, 1
+
+    def is_identity(self) -> bool:
+        return self.x is None
+
+    def inverse(self):
+        if self.x is None:
+            return self
+        return ECPoint._from_jacobian(self.curve, (self.x, -self.y % self.curve.p, 1))
+
+    def __mul__(self, other):
+        if not isinstance(other, ECPoint) or other.curve != self.curve:
+            return NotImplemented
+        return ECPoint._from_jacobian(self.curve, _add(self.curve, self._to_jacobian(), other._to_jacobian()))
+
+    def __truediv__(self, other):
+        if not isinstance(other, ECPoint) or other.curve != self.curve:
+            return NotImplemented
+        return self * other.inverse()
+
+    def __pow__(self, scalar):
+        scalar = int(scalar) % self.curve.n
+        return ECPoint._from_jacobian(self.curve, _multi_mul(self.curve, [self._to_jacobian()], [scalar]))
+
+    def __eq__(self, other):
+        return isinstance(other, ECPoint) and self.curve == other.curve and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.curve.name, self.x, self.y))
+
+    def __repr__(self):
+        if self.x is None:
+            return f'{self.curve}(infinity)'
+        return f'{self.curve}({self.x}, {self.y})'
+
+    def to_bytes(self) -> bytes:
+        """Returns SEC 1 compressed encoding of the point, a single zero byte for the point at infinity"""
+        if self.x is None:
+            return b'\x00'
+        length = (self.curve.p.bit_length() + 7) // 8
+        return bytes([2 + (self.y & 1)]) + self.x.to_bytes(length, byteorder='big')
+
+    @classmethod
+    def from_bytes(cls, curve: EllipticCurve, data: bytes):
+        """Decodes a point from its SEC 1 compressed encoding, works for curves with p = 3 mod 4"""
+        if data == b'\x00':
+            return curve.identity
+        if data[0] not in (2, 3):
+            raise ValueError('Only compressed point encodings are supported')
+        p = curve.p
+        x = int.from_bytes(data[1:], byteorder='big')
+        y = pow((x * x * x + curve.a * x + curve.b) % p, (p + 1) // 4, p)
+        if y & 1 != data[0] - 2:
+            y = p - y
+        return cls(curve, x, y)
+
+
+def multi_mul(points: List[ECPoint], scalars: List[int]) -> ECPoint:
+    """Calculates prod points[i] ** scalars[i] sharing the doublings between all the points
+
+    Args:
+        points (List[ECPoint]): points of the same curve
+        scalars (List[int]): integer scalars
+
+    Returns:
+        ECPoint: the product of powers
+    """
+    if len(points) != len(scalars):
+        raise ValueError(f'Different numbers of points and scalars: {len(points)} != {len(scalars)}')
+    curve = points[0].curve
+    scalars = [int(scalar) % curve.n for scalar in scalars]
+    return ECPoint._from_jacobian(curve, _multi_mul(curve, [point._to_jacobian() for point in points], scalars))
+
+
+class ECGroup:
+    """Prime order group of points of an elliptic curve"""
+
+    def __init__(self, curve: EllipticCurve = P256):
+        self.curve = curve
+        self.q = curve.n
+        self._random = SystemRandom()
+
+    def groupSetting(self) -> str:
+        return 'elliptic_curve'
+
+    def random(self, max: int = 0) -> int:
+        """Returns a random scalar from Z_n, or from Z_max if max is provided"""
+        return self._random.randrange(max if max else self.q)
+
+    def randomGen(self) -> ECPoint:
+        """Returns a random generator of the group, every point but the identity generates a prime order group"""
+        return self.curve.generator ** self._random.randrange(1, self.q)
+
+
+class ECBabyStepTable:
+    """Table mapping affine coordinates of j * G to j for all j < size"""
+
+    def __init__(self, generator: ECPoint):
+        self.generator = generator
+        self.size = 0
+        self.steps: Dict[Tuple[Optional[int], Optional[int]], int] = {}
+        self.giant_step = generator.curve.identity
+        self._next = generator.curve.identity
+        self._lock = threading.Lock()
+
+    def extend(self, size: int):
+        with self._lock:
+            if size <= self.size:
+                return
+            point = self._next
+            for j in range(self.size, size):
+                self.steps.setdefault((point.x, point.y), j)
+                point = point * self.generator
+            self._next = point
+            self.giant_step = point.inverse()
+            self.size = size
+
+    def snapshot(self) -> Tuple[int, ECPoint]:
+        """Returns (size, giant_step) read together, so that a concurrent extend cannot pair the size with the giant
+        step of another size"""
+        with self._lock:
+            return self.size, self.giant_step
+
+
+_baby_step_tables: Dict[ECPoint, ECBabyStepTable] = {}
+_baby_step_tables_lock = threading.Lock()
+
+
+def discrete_log(generator: ECPoint, point: ECPoint, limit: int) -> Optional[int]:
+    """Calculates the smallest x < limit such that generator ** x = point with baby-step giant-step algorithm.
+    Baby-step tables are cached per generator.
+
+    Args:
+        generator (ECPoint): base of logarithm
+        point (ECPoint): point from which the logarithm is calculated
+        limit (int): limit within which the result should lie
+
+    Returns:
+        int: result of logarithm or None if the result was not found within the limit
+    """
+    if limit <= 0:
+        return None
+    with _baby_step_tables_lock:
+        table = _baby_step_tables.get(generator)
+        if table is None:
+            table = ECBabyStepTable(generator)
+            _baby_step_tables[generator] = table
+    table.extend(min(ceil_sqrt(limit), MAX_BABY_STEPS))
+    m, giant_step = table.snapshot()
+    gamma = point
+    for i in range((limit + m - 1) // m):
+        j = table.steps.get((gamma.x, gamma.y))
+        if j is not None:
+            x = i * m + j
+            return x if x < limit else None
+        gamma = gamma * giant_step
+    return None
@@ -0,0 +1,149 @@
+"""
+Fixed-base exponentiation with precomputed window tables.
+
+For a base b that is used for many exponentiations, e.g. a generator or an element of master public key, the table
+stores b^(d * 2^(w * i)) mod p for every window i of the exponent and every digit 1 <= d < 2^w. An exponentiation with
+an exponent of at most exponent_bits bits then takes ceil(exponent_bits / w) multiplications and no squarings.
+
+Small exponents, e.g. messages encoded in the exponent of a generator, can be encoded with a plain lookup table of
+b^k mod p for all k below a declared bound.
+"""
+import sys
+from typing import List
+
+# the biggest supported window, tables bigger than that are not worth their memory
+MAX_WINDOW = 16
+
+
+def table_memory(exponent_bits: int, mod: int, window: int) -> int:
+    """Estimates the memory in bytes occupied by a table for a single base
+
+    Args:
+        exponent_bits (int): maximal bit-size of exponents
+        mod (int): modulus
+        window (int): window size in bits
+
+    Returns:
+        int: estimated size of the table in bytes
+    """
+    windows = (exponent_bits + window - 1) // window
+    return windows * ((1 << window) - 1) * sys.getsizeof(mod)
+
+
+def choose_window(exponent_bits: int, mod: int, bases: int, memory_budget: int) -> int:
+    """Chooses the biggest window for which tables for all bases fit into the memory budget
+
+    Args:
+        exponent_bits (int): maximal bit-size of exponents
+        mod (int): modulus
+        bases (int): number of bases for which the tables are built
+        memory_budget (int): memory available for all the tables in bytes
+
+    Returns:
+        int: window size in bits or 0 if even the smallest tables don't fit into the budget
+    """
+    window = 0
+    while window < MAX_WINDOW and bases * table_memory(exponent_bits, mod, window + 1) <= memory_budget:
+        window += 1
+    return window
+
+
+class FixedBaseTable:
+    """Precomputed powers of a fixed base modulo mod for exponents of at most exponent_bits bits"""
+
+    def __init__(self, base: int, mod: int, exponent_bits: int, window: int):
+        if window < 1:
+            raise ValueError(f'Window size has to be positive, {window} was provided')
+        self.base = base % mod
+        self.mod = mod
+        self.exponent_bits = exponent_bits
+        self.window = window
+        self.digit_mask = (1 << window) - 1
+        self.table = []
+        window_base = self.base
+        for _ in range((exponent_bits + window - 1) // window):
+            row = [0] * (1 << window)
+            row[0] = 1
+            for d in range(1, 1 << window):
+                row[d] = row[d - 1] * window_base % mod
+            self.table.append(row)
+            window_base = row[-1] * window_base % mod
+
+    def pow(self, exponent: int) -> int:
+        """Calculates base^exponent mod mod, falls back to built-in pow for exponents not covered by the table
+
+        Args:
+            exponent (int): the exponent
+
+        Returns:
+            int: base^exponent mod mod
+        """
+        if exponent < 0 or exponent.bit_length() > self.exponent_bits:
+            return pow(self.base, exponent, self.mod)
+        result = 1
+        mod = self.mod
+        i = 0
+        while exponent:
+            digit = exponent & self.digit_mask
+            if digit:
+                result = result * self.table[i][digit] % mod
+            exponent >>= self.window
+            i += 1
+        return result
+
+
+class EncodingTable:
+    """Powers base^k mod mod for all 0 <= k < bound, exponents outside the bound are passed to the fallback table or
+    to built-in pow"""
+
+    def __init__(self, base: int, mod: int, bound: int, fallback: FixedBaseTable = None):
+        self.base = base % mod
+        self.mod = mod
+        self.bound = bound
+        self.fallback = fallback
+        self.powers = [1] * bound
+        for k in range(1, bound):
+            self.powers[k] = self.powers[k - 1] * self.base % mod
+
+    def pow(self, exponent: int) -> int:
+        """Calculates base^exponent mod mod, with a table lookup if 0 <= exponent < bound
+
+        Args:
+            exponent (int): the exponent
+
+        Returns:
+            int: base^exponent mod mod
+        """
+        if 0 <= exponent < self.bound:
+            return self.powers[exponent]
+        if self.fallback is not None:
+            return self.fallback.pow(exponent)
+        return pow(self.base, exponent, self.mod)
+
+    @staticmethod
+    def memory(mod: int, bound: int) -> int:
+        """Estimates the memory in bytes occupied by a table for the given bound"""
+        return bound * sys.getsizeof(mod)
+
+
+def build_fixed_base_tables(bases: List[int], mod: int, exponent_bits: int, memory_budget: int) -> \
+        List[FixedBaseTable]:
+    """Builds tables for all bases with the biggest window fitting into the memory budget
+
+    Args:
+        bases (List[int]): bases to build tables for
+        mod (int): modulus
+        exponent_bits (int): maximal bit-size of exponents
+        memory_budget (int): memory available for all the tables in bytes
+
+    Raises:
+        ValueError: if the tables don't fit into the memory budget
+
+    Returns:
+        List[FixedBaseTable]: tables for the bases in the same order
+    """
+    window = choose_window(exponent_bits, mod, len(bases), memory_budget)
+    if window == 0:
+        raise ValueError(f'Memory budget of {memory_budget} bytes too small for fixed-base tables of '
+                         f'{len(bases)} bases')
+    return [FixedBaseTable(base, mod, exponent_bits, window) for base in bases]
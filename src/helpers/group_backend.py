@@ -0,0 +1,187 @@
+"""
+Arithmetic backends of the groups in which the DDH based schemes work.
+
+The schemes use group elements only through their operators (`*`, `/`, `**`), everything else, i.e. conversion to
+integers, multi-exponentiation, precomputed tables and discrete logarithms, goes through the GroupBackend of the
+elements, found by their type with get_backend. Three backends are available:
+
+* CharmBackend for charm's integer group elements,
+* NativeBackend for NativeElement, integers modulo p represented by Python or gmpy2 integers,
+* ECBackend for points of prime order elliptic curves.
+"""
+import abc
+from typing import List, Optional
+
+from charm.core.math.integer import getMod, toInt, integer
+
+from src.helpers.discrete_log import discrete_log, discrete_log_many
+from src.helpers.elliptic_curve import ECPoint, multi_mul, discrete_log as ec_discrete_log
+from src.helpers.multi_exponentiation import multi_exp, MultiExpPlan
+from src.helpers.native_group import NativeElement
+
+# names of the integer group backends which can be chosen in set_up of the schemes
+CHARM = 'charm'
+NATIVE = 'native'
+
+
+class GroupBackend(abc.ABC):
+    """Operations on elements of one type of group that are not covered by the operators of the elements"""
+
+    element_type = object
+    # whether fixed-base and encoding tables of integers can be used for exponentiation
+    supports_tables = False
+
+    @abc.abstractmethod
+    def to_int(self, element) -> int:
+        """Returns the integer representation a of element a mod N"""
+
+    @abc.abstractmethod
+    def modulus(self, element) -> int:
+        """Returns the modulus N of element a mod N"""
+
+    @abc.abstractmethod
+    def exponent_modulus(self, element) -> int:
+        """Returns the modulus by which vectors are reduced before being used as exponents of element"""
+
+    @abc.abstractmethod
+    def from_int(self, value: int, like):
+        """Returns an element with integer representation value from the same group as element like"""
+
+    @abc.abstractmethod
+    def multi_power(self, bases: list, exponents: list):
+        """Returns prod bases[i] ** exponents[i]"""
+
+    def multi_power_many(self, rows: List[list], exponents: list) -> list:
+        """Returns prod row[i] ** exponents[i] for every row of bases, sharing the work that depends only on the
+        exponents"""
+        return [self.multi_power(row, exponents) for row in rows]
+
+    def portable(self, element):
+        """Returns an equivalent element which can be pickled and sent to another process"""
+        return element
+
+    def from_portable(self, element, like):
+        """Converts a portable element back to an element from the same group as element like"""
+        return element
+
+    @abc.abstractmethod
+    def discrete_log(self, base, element, limit: int) -> Optional[int]:
+        """Returns x < limit such that base ** x = element or None if there is no such x"""
+
+    def discrete_log_many(self, base, elements: list, limit: int) -> List[Optional[int]]:
+        """Returns discrete_log(base, element, limit) for all the elements"""
+        return [self.discrete_log(base, element, limit) for element in elements]
+
+
+class IntegerBackend(GroupBackend):
+    """Common operations of integer groups modulo N, performed on Python integers"""
+
+    supports_tables = True
+
+    def exponent_modulus(self, element) -> int:
+        return self.modulus(element)
+
+    def multi_power(self, bases: list, exponents: list):
+        if len(bases) == 1:
+            return bases[0] ** exponents[0]
+        mod = self.modulus(bases[0])
+        product = multi_exp([self.to_int(base) for base in bases], [int(exponent) for exponent in exponents], mod)
+        return self.from_int(product, bases[0])
+
+    def multi_power_many(self, rows: List[list], exponents: list) -> list:
+        if not rows:
+            return []
+        plan = MultiExpPlan([int(exponent) for exponent in exponents])
+        mod = self.modulus(rows[0][0])
+        return [self.from_int(plan.evaluate([self.to_int(base) for base in row], mod), row[0]) for row in rows]
+
+    def discrete_log(self, base, element, limit: int) -> Optional[int]:
+        return discrete_log(self.to_int(base), self.to_int(element), self.modulus(base), limit)
+
+    def discrete_log_many(self, base, elements: list, limit: int) -> List[Optional[int]]:
+        targets = [self.to_int(element) for element in elements]
+        return discrete_log_many(self.to_int(base), targets, self.modulus(base), limit)
+
+
+class CharmBackend(IntegerBackend):
+    element_type = integer
+
+    def to_int(self, element) -> int:
+        return int(toInt(element))
+
+    def modulus(self, element) -> int:
+        return int(getMod(element))
+
+    def from_int(self, value: int, like):
+        return integer(value, self.modulus(like))
+
+    def portable(self, element):
+        return NativeElement(self.to_int(element), self.modulus(element))
+
+    def from_portable(self, element, like):
+        return self.from_int(int(element), like)
+
+
+class NativeBackend(IntegerBackend):
+    element_type = NativeElement
+
+    def to_int(self, element) -> int:
+        return int(element.value)
+
+    def modulus(self, element) -> int:
+        return int(element.mod)
+
+    def from_int(self, value: int, like):
+        return NativeElement(value, like.mod)
+
+
+class ECBackend(GroupBackend):
+    element_type = ECPoint
+
+    def to_int(self, element) -> int:
+        raise TypeError('Points of elliptic curves have no integer representation')
+
+    def modulus(self, element) -> int:
+        return element.curve.p
+
+    def exponent_modulus(self, element) -> int:
+        return element.curve.n
+
+    def from_int(self, value: int, like):
+        raise TypeError('Points of elliptic curves have no integer representation')
+
+    def multi_power(self, bases: list, exponents: list):
+        return multi_mul(bases, exponents)
+
+    def discrete_log(self, base, element, limit: int) -> Optional[int]:
+        return ec_discrete_log(base, element, limit)
+
+
+_backends: List[GroupBackend] = [NativeBackend(), ECBackend(), CharmBackend()]
+
+
+def register_backend(backend: GroupBackend):
+    """Registers a backend for elements of backend.element_type, it takes precedence over the already registered ones
+
+    Args:
+        backend (GroupBackend): the backend
+    """
+    _backends.insert(0, backend)
+
+
+def get_backend(element) -> GroupBackend:
+    """Returns the backend handling the element
+
+    Args:
+        element: group element
+
+    Raises:
+        TypeError: if no backend handles elements of this type
+
+    Returns:
+        GroupBackend: backend of the element
+    """
+    for backend in _backends:
+        if isinstance(element, backend.element_type):
+            return backend
+    raise TypeError(f'No group backend for elements of type {type(element).__name__}')
@@ -0,0 +1,184 @@
+"""
+Registry of precomputed integer groups, so set up of the schemes does not have to search for a fresh safe prime.
+
+Standard groups are the MODP groups of RFC 2409 (768 and 1024 bits) and RFC 3526 (1536 to 8192 bits). Their moduli
+are safe primes p = 2^n - 2^(n - 64) - 1 + 2^64 * (floor(2^(n - 130) * pi) + offset), they are computed from the
+binary expansion of pi and validated with a primality test the first time they are used.
+
+Parameters of other sizes are generated once and stored in a cache directory, from which they are loaded by later
+calls.
+
+| RFC 2409: Harkins, D. and D. Carrel, "The Internet Key Exchange (IKE)", November 1998.
+| RFC 3526: Kivinen, T. and M. Kojo, "More Modular Exponential (MODP) Diffie-Hellman groups for Internet Key
+            Exchange (IKE)", May 2003.
+"""
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from charm.toolbox.integergroup import IntegerGroup
+
+from src.helpers.group_backend import CHARM, NATIVE
+from src.helpers.native_group import NativeIntegerGroup
+from src.helpers.number_theory import is_probable_prime
+
+# bit-size of the modulus -> offset of the MODP group
+STANDARD_GROUPS = {
+    768: 149686,
+    1024: 129093,
+    1536: 741804,
+    2048: 124476,
+    3072: 1690314,
+    4096: 240904,
+    6144: 929484,
+    8192: 4743158,
+}
+
+_standard_primes: Dict[int, int] = {}
+_standard_primes_lock = threading.Lock()
+
+
+def _arctan_inverse(x: int, one: int) -> int:
+    """Returns arctan(1 / x) * one with the Taylor series"""
+    power = one // x
+    total = power
+    x_squared = x * x
+    k = 1
+    while power:
+        power //= x_squared
+        term = power // (2 * k + 1)
+        total += -term if k % 2 else term
+        k += 1
+    return total
+
+
+def pi_bits(bits: int) -> int:
+    """Returns floor(2^bits * pi) calculated with Machin's formula pi = 16 arctan(1/5) - 4 arctan(1/239)
+
+    Args:
+        bits (int): number of bits of the fractional part
+
+    Returns:
+        int: floor(2^bits * pi)
+    """
+    guard = 64
+    one = 1 << (bits + guard)
+    return (16 * _arctan_inverse(5, one) - 4 * _arctan_inverse(239, one)) >> guard
+
+
+def standard_prime(bits: int) -> int:
+    """Returns the safe prime modulus of the MODP group of the given bit-size
+
+    Args:
+        bits (int): bit-size of the modulus, one of STANDARD_GROUPS
+
+    Raises:
+        ValueError: if there is no standard group of that size or its modulus fails validation
+
+    Returns:
+        int: the safe prime p
+    """
+    if bits not in STANDARD_GROUPS:
+        raise ValueError(f'There is no standard group of {bits} bits, available sizes: {sorted(STANDARD_GROUPS)}')
+    with _standard_primes_lock:
+        if bits not in _standard_primes:
+            p = (1 << bits) - (1 << (bits - 64)) - 1 + (1 << 64) * (pi_bits(bits - 130) + STANDARD_GROUPS[bits])
+            if p.bit_length() != bits or not is_probable_prime(p) or not is_probable_prime((p - 1) // 2):
+                raise ValueError(f'Modulus of the standard group of {bits} bits failed validation')
+            _standard_primes[bits] = p
+        return _standard_primes[bits]
+
+
+def create_group(backend: str = CHARM):
+    """Returns an integer group of the backend without parameters, they have to be set with paramgen or setparam
+
+    Args:
+        backend (str): CHARM or NATIVE
+
+    Raises:
+        ValueError: if the backend is unknown
+
+    Returns:
+        IntegerGroup or NativeIntegerGroup
+    """
+    if backend == CHARM:
+        return IntegerGroup()
+    if backend == NATIVE:
+        return NativeIntegerGroup()
+    raise ValueError(f'Unknown group backend {backend}')
+
+
+def _new_group(p: int, backend: str):
+    group = create_group(backend)
+    group.setparam(p, (p - 1) // 2)
+    # charm's setparam does not set r, which randomGen needs, only paramgen does
+    group.r = 2
+    return group
+
+
+def _cache_path(directory: str, bits: int) -> str:
+    return os.path.join(directory, f'safe_prime_{bits}.json')
+
+
+def load_cached_prime(directory: str, bits: int) -> Optional[int]:
+    """Loads a safe prime of the given bit-size from the cache directory
+
+    Args:
+        directory (str): cache directory
+        bits (int): bit-size of the prime
+
+    Returns:
+        int: the safe prime or None if it is not in the cache or the cached value is not valid
+    """
+    try:
+        with open(_cache_path(directory, bits)) as file:
+            p = int(json.load(file)['p'], 16)
+    except (OSError, ValueError, KeyError):
+        return None
+    if p.bit_length() != bits or not is_probable_prime(p) or not is_probable_prime((p - 1) // 2):
+        return None
+    return p
+
+
+def save_cached_prime(directory: str, p: int):
+    """Stores a safe prime in the cache directory
+
+    Args:
+        directory (str): cache directory, created if it does not exist
+        p (int): the safe prime
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = _cache_path(directory, p.bit_length())
+    # written to a temporary file first, so concurrent readers never see a partially written file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump({'p': format(p, 'x')}, file)
+    os.replace(temporary, path)
+
+
+def get_group(bits: int, backend: str = CHARM, cache_dir: str = None, standard: bool = True):
+    """Returns an integer group modulo a safe prime of the given bit-size without searching for a new prime if possible:
+    the standard group of that size if there is one, otherwise a group from the cache directory. If neither is
+    available, a new safe prime is generated and stored in the cache directory.
+
+    Args:
+        bits (int): bit-size of the modulus
+        backend (str): CHARM or NATIVE
+        cache_dir (str): directory with cached parameters, nothing is cached if not provided
+        standard (bool): whether standard groups can be used
+
+    Returns:
+        IntegerGroup or NativeIntegerGroup with the parameters set
+    """
+    if standard and bits in STANDARD_GROUPS:
+        return _new_group(standard_prime(bits), backend)
+    p = load_cached_prime(cache_dir, bits) if cache_dir is not None else None
+    if p is not None:
+        return _new_group(p, backend)
+    group = create_group(backend)
+    group.paramgen(bits)
+    if cache_dir is not None:
+        save_cached_prime(cache_dir, int(group.p))
+    return group
+
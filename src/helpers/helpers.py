@@ -1,16 +1,32 @@
 from charm.toolbox.integergroup import IntegerGroup
 import charm
-from typing import List
-from charm.core.math.integer import getMod, toInt
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List
 from random import SystemRandom
 import numpy as np
 
 from src.errors.vector_size_mismatch_error import VectorSizeMismatchError
+from src.helpers.discrete_gaussian import gaussian_sampler
+from src.helpers.discrete_log import discrete_log, discrete_log_many, KANGAROO_THRESHOLD
+from src.helpers.fixed_base import FixedBaseTable, EncodingTable, build_fixed_base_tables
+from src.helpers.group_backend import get_backend, CHARM
+from src.helpers.group_registry import create_group
 from src.helpers.matrix import Matrix
 
 IntegerGroupElement = charm.core.math.integer.integer
 IntegerMatrix = List[List[int]]
 
+# number of rows of exponents handled by a single task of parallel_multi_power, e.g. coordinates of generated keys
+MULTI_POWER_CHUNK = 1024
+# memory budget of fixed-base tables built for every chunk of parallel_multi_power
+CHUNK_TABLES_BUDGET = 16 * 1024 * 1024
+
+
+_cryptogen = SystemRandom()
+
 
 def get_random_from_Zl(l: int) -> int:
     """
@@ -21,20 +37,87 @@ def get_random_from_Zl(l: int) -> int:
     Returns: random number from Zl
 
     """
-    cryptogen = SystemRandom()
-    return cryptogen.randrange(l)
+    return _cryptogen.randrange(l)
+
+
+def _sample_uniform_words(count: int, mod: int) -> np.ndarray:
+    mask = np.uint64((1 << (mod - 1).bit_length()) - 1)
+    values = np.empty(0, dtype=np.int64)
+    while len(values) < count:
+        # every value is accepted with probability above 1/2, so twice the missing values usually suffice
+        words = np.frombuffer(os.urandom(8 * (2 * (count - len(values)) + 16)), dtype=np.uint64) & mask
+        values = np.concatenate((values, words[words < mod].astype(np.int64)))
+    return values[:count]
+
+
+def _sample_uniform_integers(count: int, mod: int) -> List[int]:
+    size = ((mod - 1).bit_length() + 7) // 8
+    mask = (1 << (mod - 1).bit_length()) - 1
+    values = []
+    while len(values) < count:
+        data = os.urandom(size * (2 * (count - len(values)) + 16))
+        values += [value for value in (int.from_bytes(data[i:i + size], byteorder='little') & mask
+                                       for i in range(0, len(data), size)) if value < mod]
+    return values[:count]
+
+
+def sample_uniform_array(size: tuple, mod: int) -> np.ndarray:
+    """Samples an array of uniformly random integers 0 <= x < mod from the cryptographic generator of the operating
+    system. The random bytes are drawn in bulk and masked to the bit-size of mod - 1, values not below mod are
+    rejected all at once.
+
+    Args:
+        size (tuple): shape of the array
+        mod (int): modulus
+
+    Returns:
+        np.ndarray: int64 array for mod <= 2^63, array of Python integers otherwise
+    """
+    mod = int(mod)
+    if mod < 1:
+        raise ValueError(f'Modulus has to be positive, {mod} was provided')
+    count = int(np.prod(size))
+    if mod <= 1 << 63:
+        return _sample_uniform_words(count, mod).reshape(size)
+    return np.array(_sample_uniform_integers(count, mod), dtype=object).reshape(size)
 
 
 def sample_random_matrix_mod_np(size: tuple, mod: int) -> np.ndarray:
-    return np.random.randint(mod, size=size, dtype=np.longlong)
+    return sample_uniform_array(size, mod)
 
 
 def sample_random_matrix_mod(size: tuple, mod: int) -> Matrix:
-    matrix = Matrix(dims=size)
-    for i in range(size[0]):
-        for j in range(size[1]):
-            matrix[i, j] = get_random_from_Zl(mod)
-    return matrix
+    return Matrix.from_array(sample_uniform_array(size, mod))
+
+
+def _expand_row(seed: bytes, row: int, cols: int, mod: int) -> List[int]:
+    size = (mod.bit_length() + 7) // 8
+    mask = (1 << mod.bit_length()) - 1
+    # every value is accepted with probability above 1/2, so twice the needed output of the XOF usually suffices
+    length = 2 * cols * size
+    while True:
+        data = hashlib.shake_128(seed + row.to_bytes(8, byteorder='little')).digest(length)
+        values = [int.from_bytes(data[i:i + size], byteorder='little') & mask for i in range(0, length, size)]
+        values = [value for value in values if value < mod]
+        if len(values) >= cols:
+            return values[:cols]
+        length *= 2
+
+
+def expand_matrix_mod(seed: bytes, rows: range, cols: int, mod: int) -> Matrix:
+    """Deterministically derives rows of a uniformly random matrix mod mod from a seed with the SHAKE-128 extendable
+    output function. Every row is derived independently of the others, so any block of rows can be regenerated alone.
+
+    Args:
+        seed (bytes): public seed of the matrix
+        rows (range): indices of the rows to derive
+        cols (int): number of columns
+        mod (int): modulus
+
+    Returns:
+        Matrix: the rows of the matrix
+    """
+    return Matrix.from_list([_expand_row(seed, row, cols, mod) for row in rows])
 
 
 def multiply_matrices_mod_np(A: np.ndarray, B: np.ndarray, mod: int) -> np.ndarray:
@@ -50,6 +133,12 @@ def sample_random_matrix_from_normal_dist(size: tuple, standard_dev):
     return np.round(rng.normal(loc=0, scale=standard_dev, size=size))
 
 
+def sample_gaussian_matrix(size: tuple, standard_dev) -> Matrix:
+    """Returns a Matrix of integers sampled from the discrete Gaussian distribution centered at 0, the samples are
+    taken from the buffer of the shared sampler of the standard deviation"""
+    return Matrix.from_array(gaussian_sampler(standard_dev).sample(size))
+
+
 def add_vectors_mod(a: List[int], b: List[int], mod: int) -> List[int]:
     if len(a) != len(b):
         raise VectorSizeMismatchError
@@ -74,17 +163,18 @@ def add_vectors_mod(a: List[int], b: List[int], mod: int) -> List[int]:
 #     return (group, g)
 
 
-def generate_group(sec_param):
+def generate_group(sec_param, backend: str = CHARM):
     """Generates a Schnorr mod p where p is a prime of
     bit-size equal to sec_param
 
     Args:
         sec_param (int): security parameter, bit-size of p
+        backend (str): CHARM for charm's IntegerGroup or NATIVE for NativeIntegerGroup of Python/gmpy2 integers
 
     Returns:
         Tuple(): _description_
     """
-    group = IntegerGroup()
+    group = create_group(backend)
     group.paramgen(sec_param)
     return group
 
@@ -112,6 +202,25 @@ def inner_product_group_vector(a: List[IntegerGroupElement], b: List[int]) -> in
     return inner
 
 
+def inner_products_group_vector(a: List[IntegerGroupElement], rows: List[List[int]]) -> List[int]:
+    """
+    Calculates inner products of group element vector with every row of an integer matrix as a single
+    matrix-vector product of big integers, the group elements are converted to integers only once
+    Args:
+        a: group elements vector
+        rows: integer vectors of the same length as a
+
+    Returns: inner products of a and the rows
+
+    """
+    if any(len(row) != len(a) for row in rows):
+        raise VectorSizeMismatchError
+    if not rows:
+        return []
+    vector = np.array([get_int(element) for element in a], dtype=object)
+    return [int(value) for value in np.array(rows, dtype=object).reshape(len(rows), len(a)).dot(vector)]
+
+
 def inner_product_modulo(a: List[int], b: List[int], mod: int) -> int:
     if len(a) != len(b):
         raise VectorSizeMismatchError
@@ -181,7 +290,7 @@ def get_modulus(element: IntegerGroupElement) -> int:
     Returns:
         int: Modulus of modular expression, a mod N -> N
     """
-    mod = int(getMod(element))
+    mod = get_backend(element).modulus(element)
     return mod
 
 
@@ -194,7 +303,153 @@ def get_int(element: IntegerGroupElement) -> int:
     Returns:
         int: Integer part of modular expression, a mod N -> a
     """
-    return int(toInt(element))
+    if isinstance(element, int):
+        return element
+    return get_backend(element).to_int(element)
+
+
+def get_group_modulus(element) -> int:
+    """Returns the modulus by which vectors are reduced before being used as exponents of element: N for integer group
+    elements a mod N and the order of the group for points of elliptic curves
+
+    Args:
+        element: integer group element or point of elliptic curve
+
+    Returns:
+        int: the modulus
+    """
+    return get_backend(element).exponent_modulus(element)
+
+
+def power(base: IntegerGroupElement, exponent, table=None) -> IntegerGroupElement:
+    """Calculates base ** exponent, using the precomputed table of base if provided
+
+    Args:
+        base (IntegerGroupElement): group element
+        exponent: integer exponent
+        table: precomputed FixedBaseTable or EncodingTable for base
+
+    Returns:
+        IntegerGroupElement: base ** exponent
+    """
+    if table is None:
+        return base ** exponent
+    return get_backend(base).from_int(table.pow(int(exponent)), base)
+
+
+def precompute_fixed_base_tables(bases: List[IntegerGroupElement], exponent_bits: int, memory_budget: int) -> \
+        List[FixedBaseTable]:
+    """Builds fixed-base exponentiation tables for group elements with the same modulus
+
+    Args:
+        bases (List[IntegerGroupElement]): group elements used as bases of many exponentiations
+        exponent_bits (int): maximal bit-size of exponents
+        memory_budget (int): memory available for all the tables in bytes
+
+    Returns:
+        List[FixedBaseTable]: tables for the bases in the same order
+    """
+    if not get_backend(bases[0]).supports_tables:
+        raise ValueError('Fixed-base tables are supported only for integer groups')
+    return build_fixed_base_tables([get_int(base) for base in bases], get_modulus(bases[0]), exponent_bits,
+                                   memory_budget)
+
+
+def multi_power(bases: List[IntegerGroupElement], exponents: list) -> IntegerGroupElement:
+    """Calculates prod bases[i] ** exponents[i] with multi-exponentiation sharing the squarings between the bases
+
+    Args:
+        bases (List[IntegerGroupElement]): group elements with the same modulus or points of the same elliptic curve
+        exponents (list): integer exponents
+
+    Returns:
+        IntegerGroupElement: the product of powers
+    """
+    return get_backend(bases[0]).multi_power(bases, exponents)
+
+
+def multi_power_many(rows: List[List[IntegerGroupElement]], exponents: list) -> List[IntegerGroupElement]:
+    """Calculates prod row[i] ** exponents[i] for every row of bases with the same exponents, e.g. the same vector y
+    for many ciphertexts. The recoding of the exponents is done only once for all the rows.
+
+    Args:
+        rows (List[List[IntegerGroupElement]]): vectors of bases from the same group
+        exponents (list): integer exponents
+
+    Returns:
+        List[IntegerGroupElement]: product of powers for every row
+    """
+    if not rows:
+        return []
+    return get_backend(rows[0][0]).multi_power_many(rows, exponents)
+
+
+def _multi_power_chunk(bases: list, rows: List[List[int]]) -> list:
+    backend = get_backend(bases[0])
+    tables = None
+    # tables of all bases are paid off after a few rows, with them no row needs any squarings
+    if backend.supports_tables and len(rows) > 1 and all(exponent >= 0 for row in rows for exponent in row):
+        exponent_bits = max(exponent.bit_length() for row in rows for exponent in row)
+        try:
+            tables = precompute_fixed_base_tables(bases, max(exponent_bits, 1), CHUNK_TABLES_BUDGET)
+        except ValueError:
+            pass
+    if tables is None:
+        return [multi_power(bases, row) for row in rows]
+    mod = get_modulus(bases[0])
+    powers = []
+    for row in rows:
+        product = 1
+        for table, exponent in zip(tables, row):
+            product = product * table.pow(exponent) % mod
+        powers.append(backend.from_int(product, bases[0]))
+    return powers
+
+
+def parallel_multi_power(bases: list, rows: List[list], processes: int = None, chunk_size: int = MULTI_POWER_CHUNK) \
+        -> Iterator[list]:
+    """Calculates prod bases[j] ** rows[i][j] for every row of exponents, spreading chunks of rows across a process
+    pool. The results are yielded chunk by chunk in the order of rows, as soon as they are available.
+    A single chunk is calculated in the calling process.
+
+    Args:
+        bases (list): group elements with the same modulus or points of the same elliptic curve
+        rows (List[list]): rows of integer exponents, one exponent for every base
+        processes (int): number of worker processes, os.cpu_count() if not provided, 1 calculates all chunks in the
+            calling process
+        chunk_size (int): number of rows handled by a single task
+
+    Returns:
+        Iterator[list]: lists of products of powers for consecutive chunks of rows, at least one (possibly empty)
+    """
+    backend = get_backend(bases[0])
+    rows = [[int(exponent) for exponent in row] for row in rows]
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)] or [[]]
+    if processes == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            yield _multi_power_chunk(bases, chunk)
+        return
+    portable = [backend.portable(base) for base in bases]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for powers in executor.map(_multi_power_chunk, repeat(portable), chunks):
+            yield [backend.from_portable(power, bases[0]) for power in powers]
+
+
+def precompute_encoding_table(base: IntegerGroupElement, message_bound: int,
+                              fallback: FixedBaseTable = None) -> EncodingTable:
+    """Builds a lookup table of base ** k for all 0 <= k < message_bound
+
+    Args:
+        base (IntegerGroupElement): group element in the exponent of which messages are encoded
+        message_bound (int): upper bound for messages encoded with a lookup
+        fallback (FixedBaseTable): table used for messages outside the bound
+
+    Returns:
+        EncodingTable: the table
+    """
+    if not get_backend(base).supports_tables:
+        raise ValueError('Encoding tables are supported only for integer groups')
+    return EncodingTable(get_int(base), get_modulus(base), message_bound, fallback)
 
 
 def product(vector: List[int]) -> int:
@@ -204,23 +459,73 @@ def product(vector: List[int]) -> int:
     return prod
 
 
-def dummy_discrete_log(a: int, b: int, mod: int, limit: int) -> int:
+def dummy_discrete_log(a: int, b: int, mod: int, limit: int, table=None) -> int:
     """Calculates discrete log of b in the base of a modulo mod, provided the
-    result is smaller than limit. Otherwise, returns None
+    result is smaller than limit. Otherwise, returns None.
+    Uses baby-step giant-step algorithm with baby-step table cached per (a, mod), or parallel Pollard's kangaroo
+    method if no table is provided and the limit exceeds KANGAROO_THRESHOLD
 
     Args:
         a (int): base of logarithm
         b (int): number from which the logarithm is calculated
         mod (int): modulus of logarithm 
         limit (int): limit within which the result should lie
+        table: baby-step table for a and mod, e.g. memory-mapped FingerprintTable, used instead of the cached one
 
     Returns:
         int: result of logarithm or None if the result was not found withn the limit
     """
-    for i in range(limit):
-        if pow(a, i, mod) == b:
-            return i
-    return None
+    return discrete_log(a, b, mod, limit, table)
+
+
+def group_discrete_log(base, element, limit: int) -> int:
+    """Calculates discrete log of group element in the base of group element base, provided the result is smaller
+    than limit. Otherwise, returns None
+
+    Args:
+        base: integer group element or point of elliptic curve, base of logarithm
+        element: element of the same group from which the logarithm is calculated
+        limit (int): limit within which the result should lie
+
+    Returns:
+        int: result of logarithm or None if the result was not found within the limit
+    """
+    return get_backend(base).discrete_log(base, element, limit)
+
+
+def group_discrete_log_many(base, elements: list, limit: int) -> List[int]:
+    """Calculates discrete logs of all the group elements in the base of group element base at once, provided the
+    results are smaller than limit. Results which were not found within the limit are None.
+
+    Args:
+        base: integer group element or point of elliptic curve, base of logarithm
+        elements (list): elements of the same group from which the logarithms are calculated
+        limit (int): limit within which the results should lie
+
+    Returns:
+        List[int]: results of logarithms, None for the ones not found within the limit
+    """
+    return get_backend(base).discrete_log_many(base, elements, limit)
+
+
+def discrete_log_batch(a: int, targets: List[int], mod: int, limit: int, table=None) -> List[int]:
+    """Calculates discrete logs of all targets in the base of a modulo mod, provided the results are smaller than
+    limit. Results which were not found within the limit are None.
+    Resolves all targets at once with baby-step giant-step algorithm using a table sized for the whole batch, or
+    solves them one by one with Pollard's kangaroo method if no table is provided and the limit exceeds
+    KANGAROO_THRESHOLD
+
+    Args:
+        a (int): base of logarithm
+        targets (List[int]): numbers from which the logarithms are calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the results should lie
+        table: baby-step table for a and mod, e.g. memory-mapped FingerprintTable, used instead of the cached one
+
+    Returns:
+        List[int]: results of logarithms, None for the ones not found within the limit
+    """
+    return discrete_log_many(a, targets, mod, limit, table)
 
 
 def reduce_vector_mod(vector: List[int], mod: int) -> List[int]:
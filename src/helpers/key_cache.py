@@ -0,0 +1,68 @@
+"""
+Bounded least recently used cache of functional keys.
+
+A cache belongs to a single master secret key, it maps vectors y to the functional keys derived for them, so that
+repeated requests for the same vector do not recompute the key.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+# default maximal number of cached functional keys
+KEY_CACHE_SIZE = 4096
+
+
+class FunctionalKeyCache:
+    """LRU cache of functional keys of one master secret key, keyed by the vector y"""
+
+    def __init__(self, maxsize: int = KEY_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError(f'Cache size has to be positive, {maxsize} was provided')
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, y) -> bool:
+        return tuple(y) in self._keys
+
+    def get(self, y: List[int]):
+        """Returns the cached key for vector y and marks it as recently used, None if there is no such key"""
+        y = tuple(y)
+        with self._lock:
+            if y not in self._keys:
+                return None
+            self._keys.move_to_end(y)
+            return self._keys[y]
+
+    def put(self, y: List[int], key):
+        """Stores the key for vector y, evicting the least recently used key if the cache is full"""
+        y = tuple(y)
+        with self._lock:
+            self._keys[y] = key
+            self._keys.move_to_end(y)
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+    def get_many(self, ys: List[List[int]], compute: Callable[[List[List[int]]], list]) -> list:
+        """Returns keys for all the vectors, the ones missing in the cache are calculated together with a single call
+        of compute and stored
+
+        Args:
+            ys (List[List[int]]): vectors y
+            compute (Callable[[List[List[int]]], list]): function returning keys of a list of vectors
+
+        Returns:
+            list: keys of the vectors
+        """
+        keys = [self.get(y) for y in ys]
+        # vectors requested more than once are computed only once
+        missing: List[Tuple[int, ...]] = list(dict.fromkeys(tuple(y) for y, key in zip(ys, keys) if key is None))
+        if missing:
+            computed = dict(zip(missing, compute([list(y) for y in missing])))
+            for y, key in computed.items():
+                self.put(y, key)
+            keys = [computed[tuple(y)] if key is None else key for y, key in zip(ys, keys)]
+        return keys
@@ -1,12 +1,92 @@
+"""
+Integer matrices backed by NumPy arrays.
+
+Values are stored in an int64 array as long as all of them fit in a machine word and in an array of Python integers
+(object dtype) otherwise. Every operation checks the bit-size of its result in advance and switches to Python integers
+instead of overflowing, results reduced modulo a word-sized modulus are switched back to int64.
+
+multiply_modulo reduces the sum of the products modulo mod, not every product. For moduli below 2^26 the product is
+calculated with float64 BLAS, cache-blocked and on all cores, in blocks of the inner dimension short enough for exact
+sums, with the reduction fused in after every block. Bigger moduli go through a residue number system, see
+src.helpers.rns.
+"""
+import numpy as np
+
 from src.helpers.incompatible_matrix_dimensions_exception import IncompatibleMatrixDimensionsException
 
+# magnitudes of int64 values are below 2^63
+_WORD_BITS = 63
+# integers below 2^53 are represented exactly by float64
+_EXACT_BITS = 53
+
+
+def _bits(values) -> int:
+    """Returns the bit-size of the largest magnitude of a scalar or of the values of an array"""
+    if isinstance(values, np.ndarray):
+        if values.size == 0:
+            return 0
+        return max(abs(int(values.max())), abs(int(values.min()))).bit_length()
+    return abs(int(values)).bit_length()
+
+
+def _as_array(values) -> np.ndarray:
+    """Returns values as int64 array if all of them fit in a machine word, as array of Python integers otherwise"""
+    array = np.asarray(values)
+    if array.size == 0:
+        return array.astype(np.int64)
+    if array.dtype.kind in 'biu' and array.dtype != np.int64:
+        return array.astype(np.int64 if _bits(array) < _WORD_BITS else object)
+    if array.dtype == object and _bits(array) < _WORD_BITS:
+        try:
+            return array.astype(np.int64)
+        except (TypeError, ValueError):
+            return array
+    return array
+
+
+def _objects(values):
+    """Converts int64 arrays to arrays of Python integers, leaves other arrays and scalars as they are"""
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values.astype(object)
+    return values
+
+
+def _matmul(a: np.ndarray, b: np.ndarray, bits: int) -> np.ndarray:
+    """Returns the exact product of arrays a and b with results of at most bits bits"""
+    if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+        return a @ b
+    if bits <= _EXACT_BITS:
+        return (a.astype(np.float64) @ b.astype(np.float64)).astype(np.int64)
+    if bits < _WORD_BITS:
+        return a @ b
+    return np.dot(_objects(a), _objects(b))
+
+
+def _multiply_blocks(a: np.ndarray, b: np.ndarray, mod: int) -> np.ndarray:
+    """Returns a @ b mod mod for int64 arrays with values 0 <= x < mod, where (mod - 1)^2 < 2^53"""
+    # block products are below 2^53, so the sums of float64 BLAS are exact
+    block = max(((1 << _EXACT_BITS) - 1) // max((mod - 1) ** 2, 1), 1)
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    product = np.zeros((a.shape[0], b.shape[1]), dtype=np.int64)
+    for start in range(0, a.shape[1], block):
+        product += (a[:, start:start + block] @ b[start:start + block]).astype(np.int64)
+        product %= mod
+    return product
+
 
 class Matrix:
+    # NumPy scalars on the left of an operator defer to Matrix
+    __array_ufunc__ = None
 
     def __init__(self, dims: tuple, fill=0):
-        self.rows = dims[0]
-        self.cols = dims[1]
-        self.values = [[fill] * self.cols for _ in range(self.rows)]
+        self.values = _as_array(np.full(tuple(dims), fill))
+
+    @classmethod
+    def _wrap(cls, array: np.ndarray):
+        matrix = cls.__new__(cls)
+        matrix.values = _as_array(array)
+        return matrix
 
     @classmethod
     def from_list(cls, m_list):
@@ -16,165 +96,165 @@ class Matrix:
         if n == 0:
             return cls((0, 0))
         if all(isinstance(elem, int) for elem in m_list):
-            matrix = cls((1, n))
-            for i in range(n):
-                matrix.values[0][i] = m_list[i]
-            return matrix
+            return cls._wrap(np.array([m_list]))
         if all(isinstance(elem, list) for elem in m_list):
             m = len(m_list[0])
             if all(len(elem) == m for elem in m_list):
-                matrix = cls((n, m))
-                for i in range(n):
-                    for j in range(m):
-                        matrix.values[i][j] = m_list[i][j]
-                return matrix
+                return cls._wrap(np.array(m_list).reshape(n, m))
             raise ValueError(f"Different lengths of rows for provided list {m_list}")
         raise ValueError(f"{cls.__qualname__} takes list of lists or ints as argument but "
                          f"{[type(elem) for elem in m_list]} was provided")
 
-    def __add__(self, other):
-        result = Matrix(dims=(self.rows, self.cols), fill=0)
+    @classmethod
+    def from_array(cls, array: np.ndarray):
+        """Creates a matrix from a copy of a 2-dimensional array of integers"""
+        array = np.array(array)
+        if array.ndim != 2:
+            raise ValueError(f"{cls.__qualname__} takes 2-dimensional array but {array.ndim} dimensions were provided")
+        return cls._wrap(array)
+
+    @property
+    def rows(self):
+        return self.values.shape[0]
+
+    @property
+    def cols(self):
+        return self.values.shape[1]
+
+    def _operand(self, other):
+        """Returns the array or the scalar combined element-wise with this matrix, None for unsupported types"""
         if isinstance(other, Matrix):
-            if other.rows != self.rows or other.cols != self.cols:
+            if other.size() != self.size():
                 raise IncompatibleMatrixDimensionsException
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] + other.values[i][j]
-        elif isinstance(other, int):
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] + other
+            return other.values
+        if isinstance(other, (int, np.integer)):
+            return int(other)
+        if isinstance(other, (float, np.floating)):
+            return float(other)
+        return None
+
+    def _apply(self, other, operation, result_bits, in_place: bool = False):
+        """Applies element-wise operation with other, in Python integers if the result may not fit in int64. An
+        in-place operation writes to the array of this matrix whenever the result has the same dtype."""
+        operand = self._operand(other)
+        if operand is None:
+            return NotImplemented
+        values = self.values
+        if values.dtype == np.int64 and result_bits(_bits(values), _bits(operand)) >= _WORD_BITS:
+            values, operand = values.astype(object), _objects(operand)
+        if not in_place:
+            return Matrix._wrap(operation(values, operand))
+        if values is self.values and np.result_type(values, operand) == values.dtype:
+            operation(values, operand, out=values)
+        else:
+            self.values = operation(values, operand)
+        return self
 
+    def _reduce(self, other, in_place: bool = False):
+        result = self._apply(other, np.remainder, lambda _, mod_bits: mod_bits, in_place)
+        # values reduced modulo a word-sized modulus fit in int64
+        if result is not NotImplemented and result.values.dtype == object:
+            result.values = _as_array(result.values)
         return result
 
+    def __add__(self, other):
+        return self._apply(other, np.add, lambda a, b: max(a, b) + 1)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __iadd__(self, other):
+        return self._apply(other, np.add, lambda a, b: max(a, b) + 1, in_place=True)
+
     def __mul__(self, other):
-        result = Matrix((self.rows, self.cols))
-        if isinstance(other, Matrix):
-            if self.rows != other.rows or self.cols != other.cols:
-                raise IncompatibleMatrixDimensionsException
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] * other.values[i][j]
-        elif isinstance(other, (int, float)):
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] * other
-        return result
+        return self._apply(other, np.multiply, lambda a, b: a + b)
 
     def __rmul__(self, other):
         return self.__mul__(other)
 
+    def __imul__(self, other):
+        return self._apply(other, np.multiply, lambda a, b: a + b, in_place=True)
+
+    def __floordiv__(self, other):
+        return self._apply(other, np.floor_divide, lambda a, _: a + 1)
+
     def __matmul__(self, other):
-        result = None
-        if isinstance(other, Matrix):
-            if other.rows != self.cols:
-                raise IncompatibleMatrixDimensionsException(f"The number of rows in the other matrix different than "
-                                                            f"the number of columns in this matrix: {other.rows} != "
-                                                            f"{self.cols}")
-            result = Matrix((self.rows, other.cols), fill=0)
-            for i in range(self.rows):
-                for j in range(other.cols):
-                    acc = 0
-                    for k in range(self.cols):
-                        acc += self.values[i][k] * other.values[k][j]
-                    result.values[i][j] = acc
-        return result
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        if other.rows != self.cols:
+            raise IncompatibleMatrixDimensionsException(f"The number of rows in the other matrix different than "
+                                                        f"the number of columns in this matrix: {other.rows} != "
+                                                        f"{self.cols}")
+        bits = _bits(self.values) + _bits(other.values) + max(self.cols, 1).bit_length()
+        return Matrix._wrap(_matmul(self.values, other.values, bits))
 
     def __rmatmul__(self, other):
-        return self.__matmul__(other)
+        return NotImplemented
 
     def __str__(self):
-        matrix_str = '['
-        first_row = True
-        for i in range(self.rows):
-            first_col = True
-            if first_row:
-                matrix_str += '['
-                first_row = False
-            else:
-                matrix_str += '\n ['
-            for j in range(self.cols):
-                if first_col:
-                    matrix_str += str(self.values[i][j])
-                    first_col = False
-                else:
-                    matrix_str += ' ' + str(self.values[i][j])
-            matrix_str += ']'
-        matrix_str += ']'
-        return matrix_str
+        return '[' + '\n '.join('[' + ' '.join(str(value) for value in row) + ']' for row in self.to_list()) + ']'
 
     def __repr__(self):
         return self.__str__()
 
     def __mod__(self, other):
-        result = Matrix(dims=(self.rows, self.cols))
-        if isinstance(other, Matrix):
-            if self.rows != other.rows or self.cols != other.cols:
-                raise IncompatibleMatrixDimensionsException
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] % other.values[i][j]
-        elif isinstance(other, (int, float)):
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    result.values[i][j] = self.values[i][j] % other
-        return result
+        return self._reduce(other)
+
+    def __imod__(self, other):
+        return self._reduce(other, in_place=True)
 
     def __setitem__(self, key, value):
         if isinstance(key, tuple):
-            i = key[0]
-            j = key[1]
-            self.values[i][j] = value
+            if isinstance(value, Matrix):
+                value = value.values
+            if self.values.dtype == np.int64 and _bits(value) >= _WORD_BITS:
+                self.values = self.values.astype(object)
+            self.values[key] = value
 
     def __getitem__(self, key):
+        """Returns the value at (i, j) or, if any of the indices is a slice, a copy of the submatrix"""
         if isinstance(key, tuple):
-            i = key[0]
-            j = key[1]
-            return self.values[i][j]
+            if any(isinstance(index, slice) for index in key):
+                # a single row or column keeps its dimension
+                key = tuple(index if isinstance(index, slice) else [index] for index in key)
+                return Matrix._wrap(self.values[key].copy())
+            value = self.values[key]
+            return value.item() if isinstance(value, np.generic) else value
 
     def __eq__(self, other):
         if not isinstance(other, Matrix):
             return False
-        if self.rows == other.rows and self.cols == other.cols:
-            for i in range(self.rows):
-                for j in range(self.cols):
-                    if self.values[i][j] != other.values[i][j]:
-                        return False
-            return True
-        return False
+        return self.size() == other.size() and bool(np.all(self.values == other.values))
 
     def size(self):
         return self.rows, self.cols
 
-    def multiply_modulo(self, other, mod):
-        result = None
-        if isinstance(other, Matrix):
-            if self.cols != other.rows:
-                raise IncompatibleMatrixDimensionsException(f"The number of rows in the other matrix different than "
-                                                            f"the number of columns in this matrix: {other.rows} != "
-                                                            f"{self.cols}")
-            result = Matrix((self.rows, other.cols), fill=0)
-            for i in range(self.rows):
-                for j in range(other.cols):
-                    acc = 0
-                    for k in range(self.cols):
-                        acc += (self.values[i][k] * other.values[k][j]) % mod
-                    result.values[i][j] = acc
-        return result
+    def multiply_modulo(self, other, mod: int):
+        """Calculates self @ other mod mod, the sums of products are reduced, not every product
+
+        Args:
+            other (Matrix): right matrix
+            mod (int): positive modulus
+
+        Returns:
+            Matrix: the product with values 0 <= x < mod
+        """
+        if not isinstance(other, Matrix):
+            raise TypeError(f"{type(self).__qualname__} can be multiplied only by a matrix but {type(other)} was "
+                            f"provided")
+        if self.cols != other.rows:
+            raise IncompatibleMatrixDimensionsException(f"The number of rows in the other matrix different than "
+                                                        f"the number of columns in this matrix: {other.rows} != "
+                                                        f"{self.cols}")
+        a, b = self % mod, other % mod
+        if 2 * (mod - 1).bit_length() < _EXACT_BITS:
+            return Matrix._wrap(_multiply_blocks(a.values, b.values, mod))
+        # rns builds on Matrix
+        from src.helpers.rns import multiply_modulo
+        return multiply_modulo(a, b, mod)
 
     def transpose(self):
-        transposed = Matrix((self.cols, self.rows))
-        for i in range(self.rows):
-            for j in range(self.cols):
-                transposed.values[j][i] = self.values[i][j]
-        return transposed
+        return Matrix._wrap(np.ascontiguousarray(self.values.T))
 
     def to_list(self) -> list:
-        matrix_as_list = []
-        for i in range(self.rows):
-            row = []
-            for j in range(self.cols):
-                row.append(self.values[i][j])
-            matrix_as_list.append(row)
-        return matrix_as_list
-
+        return self.values.tolist()
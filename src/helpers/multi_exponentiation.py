@@ -0,0 +1,130 @@
+"""
+Multi-exponentiation, calculation of prod b_i^(e_i) mod p sharing the squarings between all the bases.
+
+Two methods are implemented and the cheaper one is chosen based on the number of bases and the size of exponents:
+
+* Straus' interleaving method, which precomputes b_i^d for all window digits d of every base and multiplies them into
+  a single accumulator that is squared once per exponent bit. Suitable for a few bases.
+* Pippenger's bucket method, which for every window puts the bases into buckets by their digit and combines the
+  buckets with a running product. Suitable for long vectors of bases.
+"""
+from typing import List
+
+from src.helpers.number_theory import mod_inverse
+
+MAX_WINDOW = 16
+
+
+def _straus_cost(n: int, bits: int, window: int) -> int:
+    return bits + n * ((1 << window) - 2) + n * ((bits + window - 1) // window)
+
+
+def _pippenger_cost(n: int, bits: int, window: int) -> int:
+    return bits + ((bits + window - 1) // window) * (n + (1 << (window + 1)))
+
+
+def _digits(exponent: int, window: int, windows: int) -> List[int]:
+    mask = (1 << window) - 1
+    return [(exponent >> (window * i)) & mask for i in range(windows)]
+
+
+def _straus(bases: List[int], digits: List[List[int]], window: int, windows: int, mod: int) -> int:
+    powers = []
+    for base in bases:
+        row = [1] * (1 << window)
+        for d in range(1, 1 << window):
+            row[d] = row[d - 1] * base % mod
+        powers.append(row)
+    result = 1
+    for i in reversed(range(windows)):
+        for _ in range(window):
+            result = result * result % mod
+        for k in range(len(bases)):
+            d = digits[k][i]
+            if d:
+                result = result * powers[k][d] % mod
+    return result
+
+
+def _pippenger(bases: List[int], digits: List[List[int]], window: int, windows: int, mod: int) -> int:
+    result = 1
+    for i in reversed(range(windows)):
+        for _ in range(window):
+            result = result * result % mod
+        buckets = [1] * (1 << window)
+        for k in range(len(bases)):
+            d = digits[k][i]
+            if d:
+                buckets[d] = buckets[d] * bases[k] % mod
+        # prod_d buckets[d]^d computed as a product of running products of buckets from the highest digit
+        running = 1
+        window_product = 1
+        for d in range((1 << window) - 1, 0, -1):
+            running = running * buckets[d] % mod
+            window_product = window_product * running % mod
+        result = result * window_product % mod
+    return result
+
+
+def straus(bases: List[int], exponents: List[int], mod: int, window: int) -> int:
+    """Calculates prod bases[i]^exponents[i] mod mod with Straus' method, exponents have to be non-negative"""
+    bits = max(exponent.bit_length() for exponent in exponents)
+    windows = (bits + window - 1) // window
+    return _straus(bases, [_digits(exponent, window, windows) for exponent in exponents], window, windows, mod)
+
+
+def pippenger(bases: List[int], exponents: List[int], mod: int, window: int) -> int:
+    """Calculates prod bases[i]^exponents[i] mod mod with Pippenger's bucket method, exponents have to be
+    non-negative"""
+    bits = max(exponent.bit_length() for exponent in exponents)
+    windows = (bits + window - 1) // window
+    return _pippenger(bases, [_digits(exponent, window, windows) for exponent in exponents], window, windows, mod)
+
+
+class MultiExpPlan:
+    """Recoding of fixed exponents for calculating prod bases[i]^exponents[i] mod mod for many vectors of bases.
+    The method, window and digits of the exponents are chosen once, evaluation only multiplies the bases."""
+
+    def __init__(self, exponents: List[int]):
+        self.length = len(exponents)
+        # bases with zero exponents are skipped, the ones with negative exponents are inverted
+        self.indices = [i for i, exponent in enumerate(exponents) if exponent != 0]
+        self.inverted = [exponents[i] < 0 for i in self.indices]
+        magnitudes = [abs(exponents[i]) for i in self.indices]
+        n = len(magnitudes)
+        bits = max([exponent.bit_length() for exponent in magnitudes] + [1])
+        straus_window = min(range(1, MAX_WINDOW + 1), key=lambda w: _straus_cost(n, bits, w))
+        pippenger_window = min(range(1, MAX_WINDOW + 1), key=lambda w: _pippenger_cost(n, bits, w))
+        if _straus_cost(n, bits, straus_window) <= _pippenger_cost(n, bits, pippenger_window):
+            self.method, self.window = _straus, straus_window
+        else:
+            self.method, self.window = _pippenger, pippenger_window
+        self.windows = (bits + self.window - 1) // self.window
+        self.digits = [_digits(exponent, self.window, self.windows) for exponent in magnitudes]
+
+    def evaluate(self, bases: List[int], mod: int) -> int:
+        """Returns prod bases[i]^exponents[i] mod mod for the exponents of the plan"""
+        if len(bases) != self.length:
+            raise ValueError(f'Different numbers of bases and exponents: {len(bases)} != {self.length}')
+        if not self.indices:
+            return 1 % mod
+        bases = [mod_inverse(bases[i], mod) if inverted else bases[i] % mod
+                 for i, inverted in zip(self.indices, self.inverted)]
+        return self.method(bases, self.digits, self.window, self.windows, mod)
+
+
+def multi_exp(bases: List[int], exponents: List[int], mod: int) -> int:
+    """Calculates prod bases[i]^exponents[i] mod mod using Straus' or Pippenger's method, whichever needs fewer
+    multiplications. Bases with negative exponents are inverted.
+
+    Args:
+        bases (List[int]): bases invertible modulo mod
+        exponents (List[int]): integer exponents
+        mod (int): modulus
+
+    Returns:
+        int: the product of powers modulo mod
+    """
+    if len(bases) != len(exponents):
+        raise ValueError(f'Different numbers of bases and exponents: {len(bases)} != {len(exponents)}')
+    return MultiExpPlan(exponents).evaluate(bases, mod)
@@ -0,0 +1,126 @@
+"""
+Integer groups modulo a safe prime p = 2q + 1 with elements represented by plain Python integers, or by gmpy2 integers
+if gmpy2 is installed.
+
+NativeElement supports the same operators as charm's integer (`*`, `/`, `**`, comparison with integers), so the
+schemes can use it in place of charm group elements. Unlike charm integers the elements are ordinary Python objects,
+they can be pickled, sent to other processes and stored in bulk. NativeIntegerGroup mirrors the parts of charm's
+IntegerGroup API used by the schemes (paramgen, random, randomGen).
+"""
+from random import SystemRandom
+
+from src.helpers.number_theory import mod_inverse, random_safe_prime
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+if gmpy2 is not None:
+    _number = gmpy2.mpz
+    _invert = gmpy2.invert
+else:
+    _number = int
+    _invert = mod_inverse
+
+
+class NativeElement:
+    """Element a mod p of the multiplicative group of integers modulo p"""
+
+    __slots__ = ('value', 'mod')
+
+    def __init__(self, value: int, mod: int):
+        self.mod = _number(mod)
+        self.value = _number(value) % self.mod
+
+    @classmethod
+    def _reduced(cls, value, mod):
+        element = cls.__new__(cls)
+        element.value = value
+        element.mod = mod
+        return element
+
+    def inverse(self):
+        return NativeElement._reduced(_number(_invert(self.value, self.mod)), self.mod)
+
+    def __mul__(self, other):
+        if isinstance(other, NativeElement):
+            if other.mod != self.mod:
+                raise ValueError(f'Elements modulo {self.mod} and {other.mod} cannot be multiplied')
+            return NativeElement._reduced(self.value * other.value % self.mod, self.mod)
+        if isinstance(other, int):
+            return NativeElement._reduced(self.value * other % self.mod, self.mod)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, int):
+            other = NativeElement(other, self.mod)
+        if not isinstance(other, NativeElement):
+            return NotImplemented
+        return self * other.inverse()
+
+    def __pow__(self, exponent):
+        exponent = int(exponent)
+        if exponent < 0:
+            return self.inverse() ** -exponent
+        return NativeElement._reduced(pow(self.value, exponent, self.mod), self.mod)
+
+    def __eq__(self, other):
+        if isinstance(other, NativeElement):
+            return self.value == other.value and self.mod == other.mod
+        if isinstance(other, int):
+            return self.value == other % self.mod
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((int(self.value), int(self.mod)))
+
+    def __int__(self):
+        return int(self.value)
+
+    def __reduce__(self):
+        # pickled as plain integers, so the pickles do not depend on gmpy2 being installed
+        return NativeElement, (int(self.value), int(self.mod))
+
+    def __repr__(self):
+        return f'{self.value} mod {self.mod}'
+
+
+class NativeIntegerGroup:
+    """Subgroup of quadratic residues of order q of the integers modulo a safe prime p = 2q + 1"""
+
+    def __init__(self, p: int = 0, q: int = 0):
+        self.p = p
+        self.q = q
+        self.r = 2
+        self._random = SystemRandom()
+
+    def paramgen(self, bits: int, r: int = 2):
+        """Samples a random safe prime p of the given bit-size"""
+        self.p = random_safe_prime(bits)
+        self.q = (self.p - 1) // 2
+        self.r = r
+
+    def setparam(self, p: int, q: int):
+        self.p = int(p)
+        self.q = int(q)
+
+    def groupSetting(self) -> str:
+        return 'integer'
+
+    def random(self, max: int = 0) -> int:
+        """Returns a random exponent from Z_q, or from Z_max if max is provided"""
+        return self._random.randrange(int(max) if max else int(self.q))
+
+    def randomGen(self) -> NativeElement:
+        """Returns a random generator of the subgroup of order q"""
+        p = int(self.p)
+        while True:
+            g = NativeElement(self._random.randrange(2, p - 1), p) ** self.r
+            if g != 1:
+                return g
+
+    def element(self, value: int) -> NativeElement:
+        return NativeElement(value, self.p)
@@ -0,0 +1,143 @@
+from math import gcd
+from random import SystemRandom
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+def mod_inverse(a: int, mod: int) -> int:
+    """Calculates the multiplicative inverse of a modulo mod with the extended Euclidean algorithm
+
+    Args:
+        a (int): number to invert
+        mod (int): modulus
+
+    Raises:
+        ValueError: if a is not invertible modulo mod
+
+    Returns:
+        int: b such that a * b = 1 mod mod
+    """
+    old_r, r = a % mod, mod
+    old_s, s = 1, 0
+    while r != 0:
+        quotient = old_r // r
+        old_r, r = r, old_r - quotient * r
+        old_s, s = s, old_s - quotient * s
+    if old_r != 1:
+        raise ValueError(f'{a} is not invertible modulo {mod}')
+    return old_s % mod
+
+
+def ceil_sqrt(n: int) -> int:
+    """Returns the smallest integer m such that m * m >= n
+
+    Args:
+        n (int): non-negative integer
+
+    Returns:
+        int: ceiling of the square root of n
+    """
+    if n <= 0:
+        return 0
+    m = int(n ** 0.5) if n < 1 << 1000 else 1 << ((n.bit_length() + 1) // 2)
+    # correct the floating point estimate with Newton iterations
+    while m * m > n:
+        m = (m + n // m) // 2
+    while m * m < n:
+        m += 1
+    return m
+
+
+def _primes_below(n: int) -> list:
+    sieve = [True] * n
+    sieve[0:2] = [False, False]
+    for i in range(2, ceil_sqrt(n) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = [False] * len(range(i * i, n, i))
+    return [i for i in range(n) if sieve[i]]
+
+
+SMALL_PRIMES = _primes_below(2000)
+# product of all small primes, a single gcd with it replaces trial division by each of them
+SMALL_PRIMES_PRODUCT = 1
+for _prime in SMALL_PRIMES:
+    SMALL_PRIMES_PRODUCT *= _prime
+
+
+def is_probable_prime(n: int, rounds: int = 40) -> bool:
+    """Miller-Rabin primality test with random bases, delegated to gmpy2 if it is installed
+
+    Args:
+        n (int): number to test
+        rounds (int): number of random bases, the probability of a composite passing is at most 4^-rounds
+
+    Returns:
+        bool: False if n is composite, True if n is prime with overwhelming probability
+    """
+    if n < 2:
+        return False
+    if gmpy2 is not None:
+        return bool(gmpy2.is_prime(n, rounds))
+    if n <= SMALL_PRIMES[-1]:
+        return n in SMALL_PRIMES
+    if gcd(n, SMALL_PRIMES_PRODUCT) != 1:
+        return False
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    rng = SystemRandom()
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def random_safe_prime(bits: int) -> int:
+    """Samples a random safe prime p = 2q + 1 of the given bit-size, where q is a prime as well
+
+    Args:
+        bits (int): bit-size of p, at least 3
+
+    Returns:
+        int: the safe prime p
+    """
+    if bits < 3:
+        raise ValueError(f'There are no safe primes of {bits} bits')
+    rng = SystemRandom()
+    while True:
+        # q = 2^(bits - 2) + ... with the lowest bit set, so p = 2q + 1 has exactly bits bits
+        q = rng.getrandbits(bits - 1) | (1 << (bits - 2)) | 1
+        p = 2 * q + 1
+        # cheap trial division of both candidates before the expensive tests
+        if p > SMALL_PRIMES[-1] and gcd(q * p, SMALL_PRIMES_PRODUCT) != 1:
+            continue
+        if is_probable_prime(q, rounds=1) and is_probable_prime(p) and is_probable_prime(q):
+            return p
+
+
+def next_prime(n: int) -> int:
+    """Returns the smallest prime p >= n
+
+    Args:
+        n (int): lower bound
+
+    Returns:
+        int: the prime p
+    """
+    if n <= 2:
+        return 2
+    p = n | 1
+    while not is_probable_prime(p):
+        p += 2
+    return p
@@ -0,0 +1,163 @@
+"""
+Parallel Pollard's lambda (kangaroo) method for discrete logarithms lying in a known interval, following van Oorschot
+and Wiener "Parallel Collision Search with Cryptanalytic Applications".
+
+| From:         van Oorschot, Paul C., and Michael J. Wiener. “Parallel Collision Search with Cryptanalytic
+                Applications.”
+| Published in: Journal of Cryptology 12.1 (1999): 1–28.
+| DOI:          10.1007/PL00003816
+
+Tame kangaroos start in the middle of the interval [0, limit) with known exponents, wild kangaroos start at the target
+with unknown exponent offset. All of them jump by a^s for s from a fixed set of powers of two, the jump being chosen
+by the current element. Only distinguished points (elements with the lowest dp_bits bits equal to zero) are reported
+to the coordinating process, so the memory needed is tiny. A tame and a wild kangaroo reaching the same distinguished
+point reveal the logarithm. The expected running time is O(sqrt(limit) / number of processes) group operations.
+
+The method is probabilistic, if no collision is found after MAX_STEPS_FACTOR times the expected number of steps the
+logarithm is considered to lie outside the interval.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from random import SystemRandom
+from typing import List, Optional, Tuple
+
+from src.helpers.number_theory import ceil_sqrt
+
+MAX_STEPS_FACTOR = 32
+
+# state of a kangaroo: current element, travelled distance, whether the kangaroo is tame
+Kangaroo = Tuple[int, int, bool]
+
+
+def _walk(herd: List[Kangaroo], jumps: List[Tuple[int, int]], mod: int, dp_mask: int, steps: int) -> \
+        (List[Kangaroo], List[Tuple[int, int, bool, int]]):
+    """Moves every kangaroo of the herd by the given number of jumps
+
+    Args:
+        herd: kangaroos to move
+        jumps: list of pairs (jump distance s, a^s mod mod)
+        mod: modulus of logarithm
+        dp_mask: mask selecting the bits which have to be zero in distinguished points
+        steps: number of jumps made by each kangaroo
+
+    Returns:
+        new states of the kangaroos and list of distinguished points (element, distance, tame, kangaroo index) reached
+    """
+    k = len(jumps)
+    moved = []
+    points = []
+    for index, (y, distance, tame) in enumerate(herd):
+        for _ in range(steps):
+            s, a_s = jumps[y % k]
+            y = y * a_s % mod
+            distance += s
+            if y & dp_mask == 0:
+                points.append((y, distance, tame, index))
+        moved.append((y, distance, tame))
+    return moved, points
+
+
+def pollard_kangaroo(a: int, b: int, mod: int, limit: int, processes: int = None,
+                     executor: ProcessPoolExecutor = None) -> Optional[int]:
+    """Calculates x < limit such that a^x = b mod mod using parallel Pollard's kangaroo method
+
+    Args:
+        a (int): base of logarithm
+        b (int): number from which the logarithm is calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the result should lie
+        processes (int): number of worker processes, defaults to the number of CPUs, 1 runs in the calling process
+        executor (ProcessPoolExecutor): pool of the worker processes, a pool is created for the call if not provided
+
+    Returns:
+        int: result of logarithm or None if the result was not found within the limit
+    """
+    if limit <= 0:
+        return None
+    a, b = a % mod, b % mod
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if executor is None and processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            return pollard_kangaroo(a, b, mod, limit, processes, pool)
+    random = SystemRandom()
+    kangaroos = 2 * processes
+    sqrt_limit = ceil_sqrt(limit)
+
+    # jumps 2^0, ..., 2^(k-1) with mean close to kangaroos * sqrt(limit) / 4
+    mean_jump = max(1, kangaroos * sqrt_limit // 4)
+    k = 1
+    while ((1 << k) - 1) // k < mean_jump:
+        k += 1
+    jumps = [(1 << i, pow(a, 1 << i, mod)) for i in range(k)]
+
+    # on average one point in 2^dp_bits is distinguished, a small fraction of the walk of a single kangaroo
+    dp_bits = max(0, (sqrt_limit // (kangaroos * 32)).bit_length() - 1)
+    dp_mask = (1 << dp_bits) - 1
+    expected_steps = 2 * sqrt_limit // kangaroos + (1 << dp_bits)
+    round_steps = max(1 << dp_bits, min(1 << 16, expected_steps // 4 + 1))
+    max_rounds = MAX_STEPS_FACTOR * expected_steps // round_steps + 1
+
+    def tame_kangaroo() -> Kangaroo:
+        start = limit // 2 + random.randrange(mean_jump)
+        return pow(a, start, mod), start, True
+
+    def wild_kangaroo() -> Kangaroo:
+        start = random.randrange(mean_jump)
+        return b * pow(a, start, mod) % mod, start, False
+
+    herds = [[tame_kangaroo(), wild_kangaroo()] for _ in range(processes)]
+    points = {}
+
+    def solve(tame_distance: int, wild_distance: int) -> (bool, Optional[int]):
+        x = tame_distance - wild_distance
+        if x >= 0 and pow(a, x, mod) == b:
+            return True, x if x < limit else None
+        if x < 0 and b * pow(a, -x, mod) % mod == 1:
+            return True, None
+        return False, None
+
+    for _ in range(max_rounds):
+        if executor is None:
+            results = [_walk(herd, jumps, mod, dp_mask, round_steps) for herd in herds]
+        else:
+            futures = [executor.submit(_walk, herd, jumps, mod, dp_mask, round_steps) for herd in herds]
+            results = [future.result() for future in futures]
+        for h, (herd, reached) in enumerate(results):
+            herds[h] = herd
+            for y, distance, tame, index in reached:
+                other = points.get(y)
+                if other is None:
+                    points[y] = (distance, tame)
+                elif other[1] != tame:
+                    tame_distance, wild_distance = (distance, other[0]) if tame else (other[0], distance)
+                    solved, x = solve(tame_distance, wild_distance)
+                    if solved:
+                        return x
+                else:
+                    # kangaroos of the same kind follow the same path from now on, restart one of them
+                    herd[index] = tame_kangaroo() if tame else wild_kangaroo()
+    return None
+
+
+def pollard_kangaroo_many(a: int, targets: List[int], mod: int, limit: int, processes: int = None) -> \
+        List[Optional[int]]:
+    """Calculates x < limit such that a^x = b mod mod for all targets b with pollard_kangaroo, the targets share a
+    single pool of worker processes
+
+    Args:
+        a (int): base of logarithm
+        targets (List[int]): numbers from which the logarithms are calculated
+        mod (int): modulus of logarithm
+        limit (int): limit within which the results should lie
+        processes (int): number of worker processes, defaults to the number of CPUs, 1 runs in the calling process
+
+    Returns:
+        List[Optional[int]]: results of logarithms, None for the ones not found within the limit
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or limit <= 0 or not targets:
+        return [pollard_kangaroo(a, b, mod, limit, 1) for b in targets]
+    with ProcessPoolExecutor(processes) as executor:
+        return [pollard_kangaroo(a, b, mod, limit, processes, executor) for b in targets]
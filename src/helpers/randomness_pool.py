@@ -0,0 +1,77 @@
+"""
+Offline/online encryption support.
+
+The expensive part of encryption in the implemented schemes, e.g. g ** r and h[i] ** r in the DDH based schemes, does
+not depend on the encrypted vector. RandomnessPool precomputes such randomness bundles in a background thread and keeps
+up to size of them ready, so the online encryption only combines a bundle with the message.
+
+Every bundle is handed out exactly once and then dropped by the pool. Reusing a bundle for two encryptions would
+reveal the difference of the encrypted vectors.
+"""
+import queue
+import threading
+from typing import Callable
+
+# default number of bundles kept ready by a pool
+POOL_SIZE = 64
+
+
+class RandomnessPool:
+    """Bounded pool of randomness bundles produced by factory in a background thread"""
+
+    def __init__(self, factory: Callable[[], object], size: int = POOL_SIZE, start: bool = True):
+        if size < 1:
+            raise ValueError(f'Pool size has to be positive, {size} was provided')
+        self._factory = factory
+        self._bundles = queue.Queue(maxsize=size)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._fill, name='randomness-pool', daemon=True)
+        if start:
+            self.start()
+
+    def start(self):
+        """Starts the background thread filling the pool"""
+        self._thread.start()
+
+    def _fill(self):
+        while not self._stopped.is_set():
+            bundle = self._factory()
+            while not self._stopped.is_set():
+                try:
+                    self._bundles.put(bundle, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def take(self):
+        """Removes a bundle from the pool and returns it, if the pool is empty the bundle is computed in the calling
+        thread instead of waiting for the background one
+
+        Returns:
+            a fresh randomness bundle, never returned again
+        """
+        try:
+            return self._bundles.get_nowait()
+        except queue.Empty:
+            return self._factory()
+
+    def available(self) -> int:
+        """Returns the number of precomputed bundles ready to be taken"""
+        return self._bundles.qsize()
+
+    def close(self):
+        """Stops the background thread and drops all precomputed bundles"""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        while True:
+            try:
+                self._bundles.get_nowait()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,176 @@
+"""
+Residue number system (RNS) arithmetic for matrices of big integers.
+
+An integer 0 <= x < M is represented by its residues x mod p_i modulo word-sized primes p_1, ..., p_k with product M.
+Matrix products are calculated independently for every prime on int64 NumPy arrays, with float64 BLAS products of
+blocks small enough to be exact, and the full values are recovered with the Chinese remainder theorem only at the end.
+The basis has to be chosen so that M is more than twice as large as any exact result, e.g. RNSBasis.for_bound(
+n * (q - 1) ** 2) for products of matrices with n columns and values modulo q.
+
+Conversions in both directions go through little-endian limbs of LIMB_BITS bits, so they are vectorized as well and
+only a single int.to_bytes or int.from_bytes call is needed per value.
+"""
+import threading
+from typing import List, Sequence
+
+import numpy as np
+
+from src.helpers.matrix import Matrix
+from src.helpers.number_theory import is_probable_prime
+
+# bit-size of the primes of a basis, products of two residues are exact in float64
+RNS_PRIME_BITS = 20
+LIMB_BITS = 16
+# integers below 2^53 are represented exactly by float64
+_EXACT_BITS = 53
+# number of products of residues that can be summed exactly in float64
+BLOCK = 1 << (_EXACT_BITS - 2 * RNS_PRIME_BITS)
+
+_primes: List[int] = []
+_primes_lock = threading.Lock()
+
+
+def word_primes(count: int) -> List[int]:
+    """Returns the count largest primes below 2^RNS_PRIME_BITS in descending order"""
+    with _primes_lock:
+        candidate = _primes[-1] - 2 if _primes else (1 << RNS_PRIME_BITS) - 1
+        while len(_primes) < count:
+            if candidate < 3:
+                raise ValueError(f'There are fewer than {count} primes below 2^{RNS_PRIME_BITS}')
+            if is_probable_prime(candidate):
+                _primes.append(candidate)
+            candidate -= 2
+        return _primes[:count]
+
+
+def _limbs(values: Sequence[int], count: int) -> np.ndarray:
+    """Returns len(values) x count array of little-endian LIMB_BITS-bit limbs of non-negative values"""
+    length = count * LIMB_BITS // 8
+    data = b''.join(value.to_bytes(length, byteorder='little') for value in values)
+    return np.frombuffer(data, dtype=f'<u{LIMB_BITS // 8}').reshape(len(values), count)
+
+
+class RNSBasis:
+    """Word-sized pairwise coprime moduli together with the constants of the CRT reconstruction"""
+
+    def __init__(self, moduli: List[int]):
+        self.moduli = list(moduli)
+        self.modulus = 1
+        for p in self.moduli:
+            self.modulus *= p
+        self.primes = np.array(self.moduli, dtype=np.int64)
+        cofactors = [self.modulus // p for p in self.moduli]
+        self._inverses = np.array([pow(cofactor % p, p - 2, p) for cofactor, p in zip(cofactors, self.moduli)],
+                                  dtype=np.int64)
+        self._limb_count = (self.modulus.bit_length() + LIMB_BITS - 1) // LIMB_BITS + 1
+        self._cofactor_limbs = _limbs(cofactors, self._limb_count).astype(np.float64)
+        self._modulus_limbs = _limbs([self.modulus], self._limb_count)[0].astype(np.int64)
+
+    @classmethod
+    def for_bound(cls, bound: int):
+        """Returns the smallest basis of word primes representing all integers 0 <= x <= bound
+
+        Args:
+            bound (int): upper bound of the represented values
+
+        Returns:
+            RNSBasis: the basis
+        """
+        count = 0
+        product = 1
+        while product <= 2 * bound:
+            count += 1
+            product *= word_primes(count)[-1]
+        return cls(word_primes(count))
+
+    def __len__(self):
+        return len(self.moduli)
+
+    def to_residues(self, values: Sequence[int]) -> np.ndarray:
+        """Returns k x len(values) int64 array of residues of non-negative integers values"""
+        count = (max([value.bit_length() for value in values] + [1]) + LIMB_BITS - 1) // LIMB_BITS
+        weights = np.array([[pow(2, LIMB_BITS * j, p) for p in self.moduli] for j in range(count)], dtype=np.float64)
+        # sums of count products of limbs and weights below 2^(LIMB_BITS + RNS_PRIME_BITS) are exact in float64
+        residues = (_limbs(values, count).astype(np.float64) @ weights).astype(np.int64) % self.primes
+        return np.ascontiguousarray(residues.T)
+
+    def from_residues(self, residues: np.ndarray) -> List[int]:
+        """Reconstructs integers 0 <= x < M / 2 from k x N array of their residues
+
+        Args:
+            residues (np.ndarray): residues of the integers, one row per modulus
+
+        Returns:
+            List[int]: the integers
+        """
+        # x = sum t_i * M / p_i - v * M with t_i = x_i * (M / p_i)^-1 mod p_i and v = floor(sum t_i / p_i),
+        # the fractional part of sum t_i / p_i is x / M < 1 / 2, so the rounding errors of float64 do not change v
+        t = (residues.T * self._inverses) % self.primes
+        v = np.floor((t / self.primes).sum(axis=1) + 0.25).astype(np.int64)
+        limbs = (t.astype(np.float64) @ self._cofactor_limbs).astype(np.int64) - np.outer(v, self._modulus_limbs)
+        limbs = np.ascontiguousarray(limbs.T)
+        for j in range(self._limb_count - 1):
+            carry = limbs[j] >> LIMB_BITS
+            limbs[j] -= carry << LIMB_BITS
+            limbs[j + 1] += carry
+        data = np.ascontiguousarray(limbs.T).astype(f'<u{LIMB_BITS // 8}').tobytes()
+        length = self._limb_count * LIMB_BITS // 8
+        return [int.from_bytes(data[i:i + length], byteorder='little') for i in range(0, len(data), length)]
+
+
+class RNSMatrix:
+    """Matrix of non-negative integers stored as residues modulo the primes of an RNS basis"""
+
+    def __init__(self, residues: np.ndarray, basis: RNSBasis):
+        self.residues = residues
+        self.basis = basis
+
+    @classmethod
+    def from_matrix(cls, matrix: Matrix, basis: RNSBasis):
+        """Converts a Matrix of non-negative integers to the basis"""
+        rows, cols = matrix.size()
+        if matrix.values.dtype == np.int64:
+            return cls(matrix.values[None, :, :] % basis.primes[:, None, None], basis)
+        values = [int(value) for value in matrix.values.ravel()]
+        return cls(basis.to_residues(values).reshape(len(basis), rows, cols), basis)
+
+    def size(self):
+        return self.residues.shape[1], self.residues.shape[2]
+
+    def __matmul__(self, other):
+        if not isinstance(other, RNSMatrix):
+            return NotImplemented
+        if other.basis is not self.basis:
+            raise ValueError('Matrices represented in different RNS bases cannot be multiplied')
+        if self.residues.shape[2] != other.residues.shape[1]:
+            raise ValueError(f'Incompatible dimensions {self.size()} and {other.size()}')
+        primes = self.basis.primes[:, None, None]
+        product = np.zeros((len(self.basis), self.residues.shape[1], other.residues.shape[2]), dtype=np.int64)
+        for start in range(0, self.residues.shape[2], BLOCK):
+            block = np.matmul(self.residues[:, :, start:start + BLOCK].astype(np.float64),
+                              other.residues[:, start:start + BLOCK, :].astype(np.float64))
+            product = (product + block.astype(np.int64)) % primes
+        return RNSMatrix(product, self.basis)
+
+    def to_matrix(self, mod: int = None) -> Matrix:
+        """Reconstructs the values with CRT, reduced modulo mod if provided"""
+        rows, cols = self.size()
+        values = self.basis.from_residues(self.residues.reshape(len(self.basis), rows * cols))
+        if mod is not None:
+            values = [value % mod for value in values]
+        return Matrix.from_array(np.array(values, dtype=object).reshape(rows, cols))
+
+
+def multiply_modulo(a: Matrix, b: Matrix, mod: int) -> Matrix:
+    """Calculates a @ b mod mod for matrices with values in Z_mod in an RNS basis large enough for the exact product
+
+    Args:
+        a (Matrix): left matrix with values 0 <= x < mod
+        b (Matrix): right matrix with values 0 <= x < mod
+        mod (int): modulus
+
+    Returns:
+        Matrix: the product with reduced values
+    """
+    basis = RNSBasis.for_bound(max(a.size()[1], 1) * (mod - 1) ** 2)
+    return (RNSMatrix.from_matrix(a, basis) @ RNSMatrix.from_matrix(b, basis)).to_matrix(mod)
@@ -0,0 +1,622 @@
+"""
+Versioned binary wire format of keys, functional keys and ciphertexts.
+
+An object (a dict, a list, a Matrix, a group, a group element, an integer, ... or any nesting of them) is flattened
+into fields, one for every node of the nesting. A message consists of a header, a directory describing the fields and
+a data section with the values of the fields:
+
+    header      magic b'FEIP' | version u8 | reserved u8 | number of fields u32 | size of the directory u32
+    directory   for every field: path | kind | type | flags | parameter | dimensions | width | offset | size
+    data        values of the fields
+
+All integers are big-endian. The parameter of a field holds its group metadata, i.e. the modulus of integer group
+elements or the name of the curve of points, or the name of the type of an object node. Every value of a field takes
+exactly width bytes, so a field of a vector or a matrix of elements is a single contiguous block and element i lies
+at offset + i * width:
+
+* None is written as a zero byte, booleans as a byte 0 or 1 and floats as IEEE 754 doubles,
+* integers are written in two's complement, elements of integer groups as their representatives 0 <= a < N,
+* points of elliptic curves as 0x00 followed by zeros for the point at infinity and as 0x04 | x | y otherwise.
+
+dumps(..., compact=True) writes smaller messages for storage and transfer: points are written in their SEC 1 compressed
+form 0x02 | x or 0x03 | x, half the size, and arrays of non-negative integers, e.g. the matrices of (compressed) LWE
+ciphertexts, are packed to the bit-size of their largest value instead of whole bytes (FLAG_PACKED, the width of such
+a field is in bits). Elements of integer groups already take the size of their modulus. loads reads both forms.
+
+A list of objects of the same type, e.g. the ElGamal ciphertexts of all the coordinates, is stored by columns, so
+its vectors of elements are contiguous as well, and values shared by all the objects (the same Python object) are
+stored only once. Precomputed tables stored in keys under PRECOMPUTED_KEYS are not serialized, they can be
+recomputed with precompute of the scheme.
+
+WireMessage parses only the header and the directory of a buffer, e.g. a memoryview of an mmap, and slices the data
+section without copying it, so that a message can be inspected and forwarded without decoding its elements. The
+directory is validated while it is parsed: the width of every field has to match its type and its size has to match
+its width and dimensions, otherwise WireFormatError is raised.
+"""
+import functools
+import numbers
+import operator
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from charm.core.math.integer import integer
+from charm.toolbox.integergroup import IntegerGroup, IntegerGroupQ
+
+from src.errors.wire_format_error import WireFormatError
+from src.helpers.elliptic_curve import ECGroup, ECPoint, CURVES
+from src.helpers.group_backend import get_backend, CharmBackend, NativeBackend, ECBackend
+from src.helpers.matrix import Matrix
+from src.helpers.native_group import NativeElement, NativeIntegerGroup
+
+MAGIC = b'FEIP'
+WIRE_FORMAT_VERSION = 1
+# keys of precomputed tables, which are left out of serialized keys
+PRECOMPUTED_KEYS = ('tables', 'rns', 'encoding')
+
+_HEADER = struct.Struct('>4sBBII')
+_ENTRY = struct.Struct('>BBBIB')
+_LOCATION = struct.Struct('>IQQ')
+
+# kinds of fields
+KIND_LEAF = 0  # scalar, list or rectangular list of lists of values of the same type
+KIND_ARRAY = 1  # NumPy array of integers
+KIND_OBJECT = 2  # dict or registered type, its fields are the children
+KIND_LIST = 3  # list of arbitrary values, its items are the children
+KIND_RECORDS = 4  # list of objects of the same type stored by columns
+
+# types of values
+TYPE_NONE = 0
+TYPE_BOOL = 1
+TYPE_INT = 2
+TYPE_FLOAT = 3
+TYPE_BYTES = 4
+TYPE_STR = 5
+TYPE_CHARM = 6
+TYPE_NATIVE = 7
+TYPE_EC = 8
+
+# the child of a records field holds a single value shared by all the records
+FLAG_SHARED = 1
+# array of non-negative integers packed to width bits per value
+FLAG_PACKED = 2
+
+# number of values packed at once, a multiple of 8
+_PACK_CHUNK = 1 << 16
+
+_FIXED_WIDTH_TYPES = (TYPE_NONE, TYPE_BOOL, TYPE_INT, TYPE_FLOAT, TYPE_CHARM, TYPE_NATIVE, TYPE_EC)
+
+
+class _Type:
+    def __init__(self, name: str, cls: type, to_fields: Callable[[object], dict],
+                 from_fields: Callable[[dict], object]):
+        self.name = name
+        self.cls = cls
+        self.to_fields = to_fields
+        self.from_fields = from_fields
+
+
+_types_by_class: Dict[type, _Type] = {}
+_types_by_name: Dict[str, _Type] = {}
+
+
+def register_type(cls: type, name: str, to_fields: Callable[[object], dict], from_fields: Callable[[dict], object]):
+    """Registers a type of objects serialized as their fields, e.g. keys of a scheme kept in a class
+
+    Args:
+        cls (type): the type, its subclasses have to be registered on their own
+        name (str): name of the type written to messages
+        to_fields (Callable[[object], dict]): returns dict of serializable fields of an object
+        from_fields (Callable[[dict], object]): creates an object from its decoded fields
+    """
+    registered = _Type(name, cls, to_fields, from_fields)
+    _types_by_class[cls] = registered
+    _types_by_name[name] = registered
+
+
+def _charm_group_fields(group) -> dict:
+    return {'p': int(group.p), 'q': int(group.q), 'r': int(group.r)}
+
+
+def _charm_group_restorer(cls):
+    def restore(fields: dict):
+        group = cls()
+        group.p, group.q, group.r = integer(fields['p']), integer(fields['q']), fields['r']
+        return group
+    return restore
+
+
+register_type(dict, 'dict', lambda value: {key: item for key, item in value.items() if key not in PRECOMPUTED_KEYS},
+              dict)
+register_type(Matrix, 'Matrix', lambda matrix: {'values': matrix.values}, lambda fields: Matrix.from_array(
+    fields['values']))
+register_type(IntegerGroup, 'IntegerGroup', _charm_group_fields, _charm_group_restorer(IntegerGroup))
+register_type(IntegerGroupQ, 'IntegerGroupQ', _charm_group_fields, _charm_group_restorer(IntegerGroupQ))
+register_type(NativeIntegerGroup, 'NativeIntegerGroup', lambda group: {'p': int(group.p), 'q': int(group.q)},
+              lambda fields: NativeIntegerGroup(fields['p'], fields['q']))
+register_type(ECGroup, 'ECGroup', lambda group: {'curve': group.curve.name},
+              lambda fields: ECGroup(CURVES[fields['curve']]))
+
+
+def _value_type(value) -> Optional[Tuple[int, bytes]]:
+    """Returns (type, parameter) of a scalar value, None if the value is not a scalar"""
+    if value is None:
+        return TYPE_NONE, b''
+    if isinstance(value, (bool, np.bool_)):
+        return TYPE_BOOL, b''
+    if isinstance(value, numbers.Integral):
+        return TYPE_INT, b''
+    if isinstance(value, (float, np.floating)):
+        return TYPE_FLOAT, b''
+    if isinstance(value, bytes):
+        return TYPE_BYTES, b''
+    if isinstance(value, str):
+        return TYPE_STR, b''
+    try:
+        backend = get_backend(value)
+    except TypeError:
+        return None
+    if isinstance(backend, ECBackend):
+        return TYPE_EC, value.curve.name.encode()
+    modulus = backend.modulus(value)
+    modulus_bytes = modulus.to_bytes((modulus.bit_length() + 7) // 8, byteorder='big')
+    if isinstance(backend, CharmBackend):
+        return TYPE_CHARM, modulus_bytes
+    if isinstance(backend, NativeBackend):
+        return TYPE_NATIVE, modulus_bytes
+    return None
+
+
+def _signed_width(values) -> int:
+    return max([(int(value).bit_length() + 8) // 8 for value in values] + [1])
+
+
+def _width(value_type: int, parameter: bytes, values: list, compact: bool = False) -> int:
+    """Returns the number of bytes taken by every value of a field, points take less if compact"""
+    if value_type in (TYPE_NONE, TYPE_BOOL):
+        return 1
+    if value_type == TYPE_FLOAT:
+        return 8
+    if value_type in (TYPE_BYTES, TYPE_STR):
+        return len(values[0]) if value_type == TYPE_BYTES else len(values[0].encode())
+    if value_type == TYPE_EC:
+        size = (CURVES[parameter.decode()].p.bit_length() + 7) // 8
+        return 1 + size if compact else 1 + 2 * size
+    if value_type in (TYPE_CHARM, TYPE_NATIVE) and parameter:
+        return len(parameter)
+    # integers, or charm integers without modulus
+    if value_type == TYPE_CHARM:
+        return _signed_width([get_backend(value).to_int(value) for value in values])
+    return _signed_width(values)
+
+
+def _encode_values(value_type: int, parameter: bytes, width: int, values: list) -> bytes:
+    if value_type == TYPE_NONE:
+        return bytes(len(values))
+    if value_type == TYPE_BOOL:
+        return bytes(bool(value) for value in values)
+    if value_type == TYPE_FLOAT:
+        return struct.pack(f'>{len(values)}d', *values)
+    if value_type == TYPE_BYTES:
+        return values[0]
+    if value_type == TYPE_STR:
+        return values[0].encode()
+    if value_type == TYPE_INT:
+        return b''.join(int(value).to_bytes(width, byteorder='big', signed=True) for value in values)
+    if value_type == TYPE_EC:
+        size = (CURVES[parameter.decode()].p.bit_length() + 7) // 8
+        if width == 1 + size:
+            # compressed points, the single zero byte of the point at infinity is padded to the width
+            return b''.join(value.to_bytes().ljust(width, b'\x00') for value in values)
+        return b''.join(bytes(width) if value.x is None else
+                        b'\x04' + value.x.to_bytes(size, byteorder='big') + value.y.to_bytes(size, byteorder='big')
+                        for value in values)
+    backend = get_backend(values[0])
+    return b''.join(backend.to_int(value).to_bytes(width, byteorder='big', signed=not parameter) for value in values)
+
+
+def _encode_array(array: np.ndarray) -> (int, bytes):
+    """Returns the width and the big-endian two's complement values of an array of integers"""
+    if array.dtype.kind not in 'iuO' or \
+            array.dtype == object and not all(isinstance(value, numbers.Integral) for value in array.ravel()):
+        raise TypeError(f'Only arrays of integers can be serialized, the array has values of type {array.dtype}')
+    if array.dtype != np.int64:
+        values = [int(value) for value in array.ravel()]
+        width = _signed_width(values)
+        return width, _encode_values(TYPE_INT, b'', width, values)
+    width = _signed_width([array.max(), array.min()]) if array.size else 1
+    # the lowest width bytes of the big-endian 8-byte values
+    data = np.ascontiguousarray(array, dtype='>i8').view(np.uint8).reshape(-1, 8)[:, 8 - width:]
+    return width, data.tobytes()
+
+
+def _pack_array(array: np.ndarray) -> (int, bytes):
+    """Returns the bit-size of the largest value and the values of an int64 array of non-negative integers packed to
+    that many bits each"""
+    bits = max(int(array.max()).bit_length(), 1)
+    words = np.ascontiguousarray(array, dtype='>i8').view(np.uint8).reshape(-1, 8)
+    # chunks of a multiple of 8 values end on whole bytes
+    return bits, b''.join(np.packbits(np.unpackbits(words[start:start + _PACK_CHUNK], axis=1)[:, 64 - bits:]).tobytes()
+                          for start in range(0, len(words), _PACK_CHUNK))
+
+
+def _unpack_array(data: memoryview, bits: int, count: int) -> np.ndarray:
+    """Returns int64 array of count values packed by _pack_array to bits bits each"""
+    values = np.empty(count, dtype=np.int64)
+    chunk_bytes = _PACK_CHUNK * bits // 8
+    for start in range(0, count, _PACK_CHUNK):
+        size = min(_PACK_CHUNK, count - start)
+        chunk = np.frombuffer(data, dtype=np.uint8, count=(size * bits + 7) // 8,
+                              offset=start // _PACK_CHUNK * chunk_bytes)
+        words = np.zeros((size, 64), dtype=np.uint8)
+        words[:, 64 - bits:] = np.unpackbits(chunk)[:size * bits].reshape(size, bits)
+        values[start:start + size] = np.packbits(words, axis=1).view('>i8').ravel()
+    return values
+
+
+class _Field:
+    def __init__(self, path: str, kind: int, value_type: int = TYPE_NONE, flags: int = 0, parameter: bytes = b'',
+                 shape: tuple = (), width: int = 0, data: bytes = b''):
+        self.path = path
+        self.kind = kind
+        self.value_type = value_type
+        self.flags = flags
+        self.parameter = parameter
+        self.shape = shape
+        self.width = width
+        self.data = data
+
+
+def _leaf(path: str, value, flags: int = 0, compact: bool = False) -> Optional[_Field]:
+    """Returns the leaf field of a scalar, a list or a rectangular list of lists of values of the same fixed-width type,
+    None if value is none of them"""
+    if isinstance(value, list):
+        if value and all(isinstance(row, list) for row in value):
+            if any(len(row) != len(value[0]) for row in value):
+                return None
+            shape = (len(value), len(value[0]))
+            values = [item for row in value for item in row]
+        else:
+            shape = (len(value),)
+            values = value
+        types = {_value_type(item) for item in values} or {(TYPE_INT, b'')}
+        if len(types) != 1 or None in types or next(iter(types))[0] not in _FIXED_WIDTH_TYPES:
+            return None
+    else:
+        value_type = _value_type(value)
+        if value_type is None:
+            return None
+        types, shape, values = {value_type}, (), [value]
+    value_type, parameter = types.pop()
+    width = _width(value_type, parameter, values, compact)
+    return _Field(path, KIND_LEAF, value_type, flags, parameter, shape, width,
+                  _encode_values(value_type, parameter, width, values))
+
+
+def _records(path: str, value: list, flags: int, compact: bool) -> Optional[List[_Field]]:
+    """Returns the fields of a list of objects of the same type stored by columns, None if it cannot be stored so"""
+    registered = _types_by_class.get(type(value[0]))
+    if registered is None or any(type(item) is not registered.cls for item in value):
+        return None
+    rows = [registered.to_fields(item) for item in value]
+    keys = list(rows[0])
+    if any(list(row) != keys for row in rows):
+        return None
+    fields = [_Field(path, KIND_RECORDS, flags=flags, parameter=registered.name.encode(), shape=(len(value),))]
+    # the number of records is bounded by the size of a column that is not shared
+    bounded = False
+    for key in keys:
+        column = [row[key] for row in rows]
+        if all(item is column[0] for item in column):
+            fields += _flatten(f'{path}/{key}', column[0], FLAG_SHARED, compact)
+            continue
+        if any(isinstance(item, list) for item in column):
+            return None
+        leaf = _leaf(f'{path}/{key}', column, compact=compact)
+        if leaf is None:
+            return None
+        fields.append(leaf)
+        bounded = True
+    return fields if bounded else None
+
+
+def _flatten(path: str, value, flags: int = 0, compact: bool = False) -> List[_Field]:
+    leaf = _leaf(path, value, flags, compact)
+    if leaf is not None:
+        return [leaf]
+    if isinstance(value, np.ndarray):
+        if compact and value.dtype == np.int64 and value.size and value.min() >= 0:
+            bits, data = _pack_array(value)
+            return [_Field(path, KIND_ARRAY, TYPE_INT, flags | FLAG_PACKED, b'', value.shape, bits, data)]
+        width, data = _encode_array(value)
+        return [_Field(path, KIND_ARRAY, TYPE_INT, flags, b'', value.shape, width, data)]
+    if isinstance(value, list):
+        records = _records(path, value, flags, compact) if value else None
+        if records is not None:
+            return records
+        fields = [_Field(path, KIND_LIST, flags=flags, shape=(len(value),))]
+        for index, item in enumerate(value):
+            fields += _flatten(f'{path}/{index}', item, compact=compact)
+        return fields
+    registered = _types_by_class.get(type(value))
+    if registered is None:
+        raise TypeError(f'Values of type {type(value).__name__} cannot be serialized')
+    fields = [_Field(path, KIND_OBJECT, flags=flags, parameter=registered.name.encode())]
+    for key, item in registered.to_fields(value).items():
+        if not isinstance(key, str) or '/' in key:
+            raise ValueError(f'Serialized objects need string keys without "/", {key!r} was provided')
+        fields += _flatten(f'{path}/{key}', item, compact=compact)
+    return fields
+
+
+def dumps(value, compact: bool = False) -> bytes:
+    """Serializes keys, functional keys, ciphertexts or any nesting of dicts, lists, matrices, groups, group elements
+    and numbers
+
+    Args:
+        value: the object to serialize
+        compact: whether points should be compressed and arrays of non-negative integers packed to bits
+
+    Returns:
+        bytes: the message
+    """
+    fields = _flatten('', value, compact=compact)
+    directory = []
+    offset = 0
+    for field in fields:
+        path = field.path.encode()
+        directory.append(struct.pack('>H', len(path)) + path)
+        directory.append(_ENTRY.pack(field.kind, field.value_type, field.flags, len(field.parameter), len(field.shape)))
+        directory.append(field.parameter + struct.pack(f'>{len(field.shape)}Q', *field.shape))
+        directory.append(_LOCATION.pack(field.width, offset, len(field.data)))
+        offset += len(field.data)
+    directory = b''.join(directory)
+    header = _HEADER.pack(MAGIC, WIRE_FORMAT_VERSION, 0, len(fields), len(directory))
+    return b''.join([header, directory] + [field.data for field in fields])
+
+
+def _count(shape: tuple) -> int:
+    """Returns the number of values of a field of the given dimensions, 1 for a scalar"""
+    return functools.reduce(operator.mul, shape, 1)
+
+
+class WireField:
+    """Field of a message, its data is a slice of the buffer of the message"""
+
+    def __init__(self, path: str, kind: int, value_type: int, flags: int, parameter: bytes, shape: tuple, width: int,
+                 data: memoryview):
+        self.path = path
+        self.kind = kind
+        self.value_type = value_type
+        self.flags = flags
+        self.parameter = parameter
+        self.shape = shape
+        self.width = width
+        self.data = data
+
+    def __len__(self):
+        return _count(self.shape)
+
+    def array(self) -> np.ndarray:
+        """Returns the integers of a field of integers or integer group elements as an array of the shape of the field.
+        For widths of 1, 2, 4 or 8 bytes the array is a read-only view of the buffer, packed arrays are unpacked."""
+        if self.value_type not in (TYPE_INT, TYPE_CHARM, TYPE_NATIVE):
+            raise WireFormatError(f'Field {self.path!r} does not hold integers')
+        if self.flags & FLAG_PACKED:
+            return _unpack_array(self.data, self.width, len(self)).reshape(self.shape)
+        signed = self.value_type == TYPE_INT or not self.parameter
+        if self.width in (1, 2, 4, 8):
+            return np.frombuffer(self.data, dtype=f'>{"i" if signed else "u"}{self.width}').reshape(self.shape)
+        if self.width < 8:
+            data = np.frombuffer(self.data, dtype=np.uint8).reshape(-1, self.width)
+            words = np.zeros((len(data), 8), dtype=np.uint8)
+            if signed:
+                # sign extension
+                words[data[:, 0] >= 0x80] = 0xff
+            words[:, 8 - self.width:] = data
+            return words.view('>i8').astype(np.int64).reshape(self.shape)
+        values = [int.from_bytes(self.data[i:i + self.width], byteorder='big', signed=signed)
+                  for i in range(0, len(self.data), self.width)]
+        return np.array(values, dtype=object).reshape(self.shape)
+
+    def values(self) -> list:
+        """Returns the flat list of the decoded values of a leaf field"""
+        width, data, parameter = self.width, self.data, self.parameter
+        if self.value_type == TYPE_NONE:
+            return [None] * len(data)
+        if self.value_type == TYPE_BOOL:
+            return [bool(value) for value in bytes(data)]
+        if self.value_type == TYPE_FLOAT:
+            return list(struct.unpack(f'>{len(self)}d', data))
+        if self.value_type == TYPE_BYTES:
+            return [bytes(data)]
+        if self.value_type == TYPE_STR:
+            return [bytes(data).decode()]
+        offsets = range(0, len(data), width) if width else [0] * len(self)
+        if self.value_type == TYPE_EC:
+            curve = CURVES[parameter.decode()]
+            size = (width - 1) // 2
+            # the prefix tells compressed points from uncompressed ones
+            return [curve.identity if data[i] == 0 else
+                    ECPoint(curve, int.from_bytes(data[i + 1:i + 1 + size], byteorder='big'),
+                            int.from_bytes(data[i + 1 + size:i + width], byteorder='big')) if data[i] == 4 else
+                    ECPoint.from_bytes(curve, bytes(data[i:i + width])) for i in offsets]
+        integers = [int.from_bytes(data[i:i + width], byteorder='big', signed=not parameter) for i in offsets]
+        if self.value_type == TYPE_INT:
+            return integers
+        modulus = int.from_bytes(parameter, byteorder='big')
+        if self.value_type == TYPE_NATIVE:
+            return [NativeElement(value, modulus) for value in integers]
+        if self.value_type == TYPE_CHARM:
+            return [integer(value, modulus) if modulus else integer(value) for value in integers]
+        raise WireFormatError(f'Unknown type {self.value_type} of field {self.path!r}')
+
+    def value(self):
+        """Returns the decoded value of a leaf field, a scalar, a list or a list of lists"""
+        if self.kind == KIND_ARRAY:
+            return self.array().copy()
+        values = self.values()
+        if not self.shape:
+            return values[0]
+        if len(self.shape) == 1:
+            return values
+        cols = self.shape[1]
+        return [values[i * cols:(i + 1) * cols] for i in range(self.shape[0])]
+
+
+def _allowed_widths(value_type: int, parameter: bytes) -> Optional[Tuple[int, ...]]:
+    """Returns the widths allowed for values of a fixed-width type, None for integers of any positive width"""
+    if value_type in (TYPE_NONE, TYPE_BOOL):
+        return 1,
+    if value_type == TYPE_FLOAT:
+        return 8,
+    if value_type == TYPE_EC:
+        curve = CURVES.get(parameter.decode())
+        if curve is None:
+            raise WireFormatError(f'Unknown curve {parameter!r}')
+        size = (curve.p.bit_length() + 7) // 8
+        # compressed or uncompressed points
+        return 1 + size, 1 + 2 * size
+    if value_type in (TYPE_CHARM, TYPE_NATIVE) and parameter:
+        return len(parameter),
+    if value_type in (TYPE_INT, TYPE_CHARM):
+        return None
+    raise WireFormatError(f'Unknown type {value_type}')
+
+
+def _validate(field: WireField):
+    """Checks that the kind, type, flags, width, dimensions and size of a field are consistent
+
+    Raises:
+        WireFormatError: if they are not
+    """
+    path, count, width, size = field.path, _count(field.shape), field.width, len(field.data)
+    if field.flags & ~(FLAG_SHARED | FLAG_PACKED):
+        raise WireFormatError(f'Field {path!r} has unknown flags {field.flags}')
+    if field.kind in (KIND_OBJECT, KIND_LIST, KIND_RECORDS):
+        # objects have no dimensions, lists and records the number of their items
+        rank = 0 if field.kind == KIND_OBJECT else 1
+        if field.flags & FLAG_PACKED or width or size or len(field.shape) != rank:
+            raise WireFormatError(f'Node {path!r} has data or invalid dimensions')
+        # names of types are text
+        field.parameter.decode()
+        return
+    if field.kind not in (KIND_LEAF, KIND_ARRAY):
+        raise WireFormatError(f'Unknown kind {field.kind} of field {path!r}')
+    if field.kind == KIND_ARRAY and field.value_type != TYPE_INT:
+        raise WireFormatError(f'Array {path!r} does not hold integers')
+    if field.flags & FLAG_PACKED:
+        if field.kind != KIND_ARRAY or not 0 < width < 64 or size != (count * width + 7) // 8:
+            raise WireFormatError(f'Packed field {path!r} has invalid width {width} or size {size}')
+        return
+    if field.kind == KIND_LEAF and len(field.shape) > 2:
+        raise WireFormatError(f'Field {path!r} has {len(field.shape)} dimensions, at most 2 are supported')
+    if field.value_type in (TYPE_BYTES, TYPE_STR):
+        if field.shape or width != size:
+            raise WireFormatError(f'Field {path!r} of bytes or text has invalid dimensions or size')
+        return
+    widths = _allowed_widths(field.value_type, field.parameter)
+    if width <= 0 or widths is not None and width not in widths:
+        raise WireFormatError(f'Field {path!r} of type {field.value_type} has invalid width {width}')
+    if size != count * width:
+        raise WireFormatError(f'Field {path!r} of {count} values of {width} bytes has size {size}')
+
+
+class WireMessage:
+    """Parsed header and directory of a message in a buffer, e.g. bytes, a memoryview or an mmap. The fields refer to
+    slices of the buffer, which is not copied."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer).cast('B')
+        if len(view) < _HEADER.size:
+            raise WireFormatError('Message is shorter than its header')
+        magic, version, _, count, directory_size = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise WireFormatError('Buffer does not hold a message of the wire format')
+        if version != WIRE_FORMAT_VERSION:
+            raise WireFormatError(f'Unsupported version {version} of the wire format, {WIRE_FORMAT_VERSION} expected')
+        self.version = version
+        data_start = _HEADER.size + directory_size
+        if data_start > len(view):
+            raise WireFormatError('Directory lies beyond the end of the message')
+        self.fields: Dict[str, WireField] = {}
+        position = _HEADER.size
+        try:
+            for _ in range(count):
+                path_size, = struct.unpack_from('>H', view, position)
+                position += 2
+                path = bytes(view[position:position + path_size]).decode()
+                position += path_size
+                kind, value_type, flags, parameter_size, rank = _ENTRY.unpack_from(view, position)
+                position += _ENTRY.size
+                parameter = bytes(view[position:position + parameter_size])
+                position += parameter_size
+                shape = struct.unpack_from(f'>{rank}Q', view, position)
+                position += 8 * rank
+                width, offset, size = _LOCATION.unpack_from(view, position)
+                position += _LOCATION.size
+                if position > data_start:
+                    raise WireFormatError(f'Entry of field {path!r} lies beyond the end of the directory')
+                if data_start + offset + size > len(view):
+                    raise WireFormatError(f'Data of field {path!r} lies beyond the end of the message')
+                data = view[data_start + offset:data_start + offset + size]
+                field = WireField(path, kind, value_type, flags, parameter, shape, width, data)
+                _validate(field)
+                self.fields[path] = field
+        except struct.error as error:
+            raise WireFormatError(f'Truncated directory: {error}')
+        except UnicodeDecodeError as error:
+            raise WireFormatError(f'Invalid path or parameter: {error}')
+        self._children: Dict[str, List[WireField]] = {}
+        for path, field in self.fields.items():
+            if path:
+                self._children.setdefault(path.rsplit('/', 1)[0], []).append(field)
+
+    def children(self, path: str) -> List[WireField]:
+        """Returns the fields of the children of the field at path in the order of serialization"""
+        return self._children.get(path, [])
+
+    def decode(self, path: str = ''):
+        """Decodes the value of the field at path, the whole serialized object by default"""
+        if path not in self.fields:
+            raise WireFormatError(f'Message has no field {path!r}')
+        field = self.fields[path]
+        if field.kind in (KIND_LEAF, KIND_ARRAY):
+            return field.value()
+        if field.kind == KIND_LIST:
+            if len(self.children(path)) != field.shape[0]:
+                raise WireFormatError(f'List {path!r} of {field.shape[0]} items has {len(self.children(path))}')
+            return [self.decode(child.path) for child in self.children(path)]
+        registered = _types_by_name.get(field.parameter.decode())
+        if registered is None:
+            raise WireFormatError(f'Unknown type {field.parameter.decode()!r} of field {path!r}')
+        if field.kind == KIND_OBJECT:
+            return registered.from_fields({child.path.rsplit('/', 1)[1]: self.decode(child.path)
+                                           for child in self.children(path)})
+        if field.kind == KIND_RECORDS:
+            columns = {}
+            if all(child.flags & FLAG_SHARED for child in self.children(path)):
+                raise WireFormatError(f'Records {path!r} have no column that is not shared')
+            for child in self.children(path):
+                if not child.flags & FLAG_SHARED and child.shape[:1] != field.shape:
+                    raise WireFormatError(f'Column {child.path!r} does not have {field.shape[0]} values')
+                value = self.decode(child.path)
+                columns[child.path.rsplit('/', 1)[1]] = [value] * field.shape[0] if child.flags & FLAG_SHARED else value
+            return [registered.from_fields({key: column[i] for key, column in columns.items()})
+                    for i in range(field.shape[0])]
+        raise WireFormatError(f'Unknown kind {field.kind} of field {path!r}')
+
+
+def loads(buffer):
+    """Deserializes an object from a message in bytes, a memoryview or an mmap
+
+    Args:
+        buffer: the message
+
+    Raises:
+        WireFormatError: if the buffer does not hold a valid message of the supported version
+
+    Returns:
+        the deserialized object
+    """
+    return WireMessage(buffer).decode()
@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from src.helpers.discrete_gaussian import DiscreteGaussianSampler, gaussian_sampler, GAUSSIAN_TAIL
+
+
+class TestDiscreteGaussian(unittest.TestCase):
+
+    def test_moments(self):
+        sampler = DiscreteGaussianSampler(3.2)
+        samples = sampler.sample((200, 1000))
+        self.assertEqual(samples.shape, (200, 1000))
+        self.assertEqual(samples.dtype, np.int64)
+        self.assertLess(abs(samples.mean()), 0.05)
+        self.assertLess(abs(samples.std() - 3.2), 0.05)
+        self.assertLessEqual(np.abs(samples).max(), np.ceil(GAUSSIAN_TAIL * 3.2))
+
+    def test_slices_are_not_reused(self):
+        sampler = DiscreteGaussianSampler(1000.0, buffer_size=100)
+        first = sampler.sample((1, 60))
+        second = sampler.sample((1, 60))
+        self.assertFalse(np.array_equal(first, second))
+        self.assertEqual(sampler.sample((3, 500)).shape, (3, 500))
+
+    def test_zero_width(self):
+        self.assertFalse(DiscreteGaussianSampler(0).sample((4, 4)).any())
+
+    def test_shared_sampler(self):
+        self.assertIs(gaussian_sampler(2), gaussian_sampler(2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from src.helpers.discrete_log import baby_step_giant_step, get_baby_step_table, clear_baby_step_tables, \
+    BabyStepTable, baby_step_giant_step_batch, get_batch_table
+
+# safe prime p = 2q + 1, 4 generates the subgroup of order q
+p = 1000000007
+g = 4
+
+
+class TestBabyStepGiantStep(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clear_baby_step_tables()
+
+    def test_finds_logarithm(self):
+        for x in [0, 1, 2, 99, 100, 101, 12345, 99999]:
+            self.assertEqual(x, baby_step_giant_step(g, pow(g, x, p), p, 100000))
+
+    def test_returns_none_outside_limit(self):
+        self.assertIsNone(baby_step_giant_step(g, pow(g, 1000, p), p, 1000))
+        self.assertIsNone(baby_step_giant_step(g, pow(g, 5, p), p, 0))
+
+    def test_table_is_cached_and_extended(self):
+        baby_step_giant_step(g, pow(g, 5, p), p, 100)
+        table = get_baby_step_table(g, p, 1)
+        self.assertEqual(10, table.size)
+        self.assertEqual(123456, baby_step_giant_step(g, pow(g, 123456, p), p, 1000000))
+        self.assertIs(table, get_baby_step_table(g, p, 1))
+        self.assertEqual(1000, table.size)
+        self.assertEqual(7, baby_step_giant_step(g, pow(g, 7, p), p, 100))
+
+    def test_smallest_solution_for_small_order(self):
+        # -1 has order 2 modulo p
+        self.assertEqual(1, baby_step_giant_step(p - 1, p - 1, p, 50))
+        self.assertEqual(0, baby_step_giant_step(p - 1, 1, p, 50))
+
+    def test_provided_table(self):
+        table = BabyStepTable(g, p)
+        table.extend(7)
+        self.assertEqual(500, baby_step_giant_step(g, pow(g, 500, p), p, 1000, table=table))
+
+    def test_concurrent_extend(self):
+        table = BabyStepTable(g, p)
+        table.extend(2)
+        extender = threading.Thread(target=lambda: [table.extend(size) for size in range(3, 3000)])
+        extender.start()
+        try:
+            while extender.is_alive():
+                size, giant_step = table.snapshot()
+                self.assertEqual(1, giant_step * pow(g, size, p) % p)
+                self.assertEqual(4321, baby_step_giant_step(g, pow(g, 4321, p), p, 10000, table=table))
+        finally:
+            extender.join()
+
+
+class TestBabyStepGiantStepBatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clear_baby_step_tables()
+
+    def test_resolves_all_targets(self):
+        exponents = [0, 1, 57, 4000, 99999, 31337, 57]
+        targets = [pow(g, x, p) for x in exponents]
+        self.assertEqual(exponents, baby_step_giant_step_batch(g, targets, p, 100000))
+
+    def test_unresolved_targets_are_none(self):
+        targets = [pow(g, 10, p), pow(g, 500, p), pow(g, 10 ** 6, p)]
+        self.assertEqual([10, None, None], baby_step_giant_step_batch(g, targets, p, 500))
+        self.assertEqual([], baby_step_giant_step_batch(g, [], p, 500))
+
+    def test_table_sized_for_batch(self):
+        baby_step_giant_step_batch(g, [pow(g, x, p) for x in range(100)], p, 10000)
+        self.assertEqual(1000, get_batch_table(g, p, 1).size)
+
+
+if __name__ == '__main__':
+    unittest.main()
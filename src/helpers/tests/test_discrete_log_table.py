@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.helpers.discrete_log import baby_step_giant_step, register_baby_step_table, get_baby_step_table, \
+    clear_baby_step_tables
+from src.helpers.discrete_log_table import FingerprintTable
+
+# Mersenne prime bigger than 2^64, so that fingerprints are truncated values
+p = 2 ** 127 - 1
+g = 3
+
+
+class TestFingerprintTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clear_baby_step_tables()
+
+    def test_lookup(self):
+        table = FingerprintTable.build(g, p, 100)
+        self.assertEqual([42, None, 0], table.lookup_many([pow(g, 42, p), pow(g, 100, p), 1]))
+
+    def test_discrete_log_with_table(self):
+        table = FingerprintTable.build(g, p, 300)
+        for x in [0, 299, 300, 54321, 89999]:
+            self.assertEqual(x, baby_step_giant_step(g, pow(g, x, p), p, 90000, table=table))
+        self.assertIsNone(baby_step_giant_step(g, pow(g, 90000, p), p, 90000, table=table))
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            FingerprintTable.build(g, p, 1000).save(directory)
+            table = FingerprintTable.load(directory, g, p)
+            self.assertIsInstance(table.fingerprints, np.memmap)
+            self.assertEqual(1000, table.size)
+            self.assertEqual(777777, baby_step_giant_step(g, pow(g, 777777, p), p, 1000000, table=table))
+            del table
+
+    def test_load_wrong_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            FingerprintTable.build(g, p, 10).save(directory)
+            self.assertRaises(FileNotFoundError, FingerprintTable.load, directory, 5, p)
+
+    def test_registered_table_is_used(self):
+        table = FingerprintTable.build(g, p, 50)
+        register_baby_step_table(table)
+        self.assertIs(table, get_baby_step_table(g, p, 10 ** 6))
+        self.assertEqual(123456, baby_step_giant_step(g, pow(g, 123456, p), p, 200000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+from src.helpers.elliptic_curve import P256, SECP256K1, ECPoint, ECGroup, ECBabyStepTable, multi_mul, discrete_log
+
+
+class TestEllipticCurve(unittest.TestCase):
+
+    def test_generator_order(self):
+        for curve in [P256, SECP256K1]:
+            self.assertTrue(curve.contains(curve.gx, curve.gy))
+            self.assertTrue((curve.generator ** curve.n).is_identity())
+
+    def test_group_operations(self):
+        g = P256.generator
+        self.assertEqual(g ** 3, g * g * g)
+        self.assertEqual(g ** 4, (g ** 7) / (g ** 3))
+        self.assertEqual(P256.identity, g / g)
+        self.assertEqual(g ** (P256.n - 1), g ** -1)
+        self.assertEqual(g, g * P256.identity)
+
+    def test_point_not_on_curve(self):
+        self.assertRaises(ValueError, ECPoint, P256, 1, 1)
+
+    def test_compressed_encoding(self):
+        for curve in [P256, SECP256K1]:
+            point = curve.generator ** random.getrandbits(256)
+            self.assertEqual(33, len(point.to_bytes()))
+            self.assertEqual(point, ECPoint.from_bytes(curve, point.to_bytes()))
+        self.assertEqual(P256.identity, ECPoint.from_bytes(P256, P256.identity.to_bytes()))
+
+    def test_multi_mul(self):
+        group = ECGroup(P256)
+        points = [group.randomGen() for _ in range(5)]
+        scalars = [group.random() for _ in range(4)] + [-3]
+        expected = P256.identity
+        for point, scalar in zip(points, scalars):
+            expected = expected * point ** scalar
+        self.assertEqual(expected, multi_mul(points, scalars))
+
+    def test_discrete_log(self):
+        g = ECGroup(P256).randomGen()
+        for x in [0, 1, 999, 31337]:
+            self.assertEqual(x, discrete_log(g, g ** x, 40000))
+        self.assertIsNone(discrete_log(g, g ** 40000, 40000))
+
+    def test_baby_step_table_snapshot(self):
+        g = P256.generator
+        table = ECBabyStepTable(g)
+        table.extend(50)
+        size, giant_step = table.snapshot()
+        self.assertEqual(50, size)
+        self.assertTrue((giant_step * g ** size).is_identity())
+
+
+if __name__ == '__main__':
+    unittest.main()
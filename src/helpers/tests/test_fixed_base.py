@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from src.helpers.fixed_base import FixedBaseTable, EncodingTable, build_fixed_base_tables, choose_window, \
+    table_memory
+
+p = 2 ** 127 - 1
+g = 3
+
+
+class TestFixedBaseTable(unittest.TestCase):
+
+    def test_pow(self):
+        table = FixedBaseTable(g, p, 127, 4)
+        for exponent in [0, 1, 2, 15, 16, 255, 2 ** 126 + 5, random.getrandbits(127)]:
+            self.assertEqual(pow(g, exponent, p), table.pow(exponent))
+
+    def test_pow_fallback(self):
+        table = FixedBaseTable(g, p, 16, 5)
+        exponent = random.getrandbits(200)
+        self.assertEqual(pow(g, exponent, p), table.pow(exponent))
+
+    def test_choose_window(self):
+        budget = 3 * table_memory(127, p, 6)
+        self.assertEqual(6, choose_window(127, p, 3, budget))
+        self.assertEqual(0, choose_window(127, p, 3, 10))
+
+    def test_build_tables(self):
+        tables = build_fixed_base_tables([g, 5, 7], p, 127, 1024 * 1024)
+        exponent = random.getrandbits(127)
+        self.assertEqual([pow(base, exponent, p) for base in [g, 5, 7]], [table.pow(exponent) for table in tables])
+        self.assertRaises(ValueError, build_fixed_base_tables, [g, 5], p, 127, 100)
+
+
+class TestEncodingTable(unittest.TestCase):
+
+    def test_pow(self):
+        table = EncodingTable(g, p, 1000)
+        self.assertEqual([pow(g, k, p) for k in [0, 1, 999]], [table.pow(k) for k in [0, 1, 999]])
+        self.assertEqual(pow(g, 1000, p), table.pow(1000))
+
+    def test_fallback(self):
+        table = EncodingTable(g, p, 10, fallback=FixedBaseTable(g, p, 127, 3))
+        exponent = random.getrandbits(127)
+        self.assertEqual(pow(g, exponent, p), table.pow(exponent))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from src.helpers.group_backend import CHARM, NATIVE
+from src.helpers.group_registry import standard_prime, get_group, load_cached_prime, save_cached_prime, pi_bits
+from src.helpers.number_theory import random_safe_prime
+
+
+class TestGroupRegistry(unittest.TestCase):
+
+    def test_pi_bits(self):
+        self.assertEqual(3, pi_bits(0))
+        self.assertEqual(0x3243f6a8885a308d3, pi_bits(64))
+
+    def test_standard_prime(self):
+        # RFC 3526, 2048-bit MODP group
+        p = standard_prime(2048)
+        self.assertEqual(2048, p.bit_length())
+        self.assertTrue(format(p, 'x').startswith('ffffffffffffffffc90fdaa22168c234c4c6628b80dc1cd1'))
+        self.assertTrue(format(p, 'x').endswith('15728e5a8aacaa68ffffffffffffffff'))
+        self.assertRaises(ValueError, standard_prime, 1000)
+
+    def test_standard_group(self):
+        group = get_group(1024, NATIVE)
+        self.assertEqual(standard_prime(1024), group.p)
+        self.assertEqual(1, group.randomGen() ** group.q)
+
+    def test_standard_charm_group(self):
+        group = get_group(1024, CHARM)
+        # setparam of charm leaves r unset
+        self.assertEqual(2, group.r)
+        self.assertEqual(1, int(group.randomGen() ** group.q))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(load_cached_prime(directory, 64))
+            group = get_group(64, NATIVE, cache_dir=directory)
+            self.assertEqual(group.p, get_group(64, NATIVE, cache_dir=directory).p)
+            p = random_safe_prime(64)
+            save_cached_prime(directory, p)
+            self.assertEqual(p, load_cached_prime(directory, 64))
+            self.assertEqual(p, get_group(64, NATIVE, cache_dir=directory).p)
+
+    def test_invalid_cache_entry_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'safe_prime_64.json'), 'w') as file:
+                file.write('{"p": "ffffffffffffffff"}')
+            self.assertIsNone(load_cached_prime(directory, 64))
+
+
+if __name__ == '__main__':
+    unittest.main()
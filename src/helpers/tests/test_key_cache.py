@@ -0,0 +1,42 @@
+import unittest
+
+from src.helpers.helpers import inner_products_group_vector, inner_product_group_vector
+from src.helpers.key_cache import FunctionalKeyCache
+from src.helpers.native_group import NativeIntegerGroup
+from src.errors.vector_size_mismatch_error import VectorSizeMismatchError
+
+
+class TestFunctionalKeyCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.computed = []
+
+    def compute(self, ys):
+        self.computed.append(ys)
+        return [sum(y) for y in ys]
+
+    def test_get_many_computes_missing_once(self):
+        cache = FunctionalKeyCache()
+        self.assertEqual([3, 7, 3], cache.get_many([[1, 2], [3, 4], [1, 2]], self.compute))
+        self.assertEqual([7, 11], cache.get_many([[3, 4], [5, 6]], self.compute))
+        self.assertEqual([[[1, 2], [3, 4]], [[5, 6]]], self.computed)
+
+    def test_least_recently_used_evicted(self):
+        cache = FunctionalKeyCache(maxsize=2)
+        cache.put([1], 1)
+        cache.put([2], 2)
+        cache.get([1])
+        cache.put([3], 3)
+        self.assertEqual(2, len(cache))
+        self.assertIn([1], cache)
+        self.assertNotIn([2], cache)
+        self.assertIsNone(cache.get([2]))
+
+    def test_inner_products_group_vector(self):
+        group = NativeIntegerGroup(1000000007, 500000003)
+        a = [group.randomGen() for _ in range(3)]
+        rows = [[1, 2, 3], [4, 5, 6], [0, 0, 7]]
+        self.assertEqual([inner_product_group_vector(a, row) for row in rows], inner_products_group_vector(a, rows))
+        self.assertEqual([], inner_products_group_vector(a, []))
+        with self.assertRaises(VectorSizeMismatchError):
+            inner_products_group_vector(a, [[1, 2]])
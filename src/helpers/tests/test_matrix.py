@@ -1,3 +1,4 @@
+import random
 import unittest
 import numpy as np
 from src.helpers.matrix import Matrix
@@ -31,6 +32,35 @@ class TestMatrix(unittest.TestCase):
         a = Matrix.from_list([[1, 2], [3, 4], [5, 6]])
         self.assertEqual(a.transpose(), Matrix.from_list([[1, 3, 5], [2, 4, 6]]))
 
+    def test_multiply_modulo(self):
+        for q in [97, 2 ** 31 - 1, 2 ** 61 - 1, 2 ** 89 - 1]:
+            a = Matrix.from_list([[random.randrange(-q, q) for _ in range(300)] for _ in range(5)])
+            b = Matrix.from_list([[random.randrange(q) for _ in range(4)] for _ in range(300)])
+            self.assertEqual((a @ b) % q, a.multiply_modulo(b, q))
+
+    def test_overflow_switches_to_python_integers(self):
+        a = Matrix.from_list([[2 ** 62, -3], [5, 7]])
+        self.assertEqual((a + a)[0, 0], 2 ** 63)
+        self.assertEqual((a * a)[0, 0], 2 ** 124)
+        self.assertEqual(((a * a) % 97).values.dtype, np.int64)
+        self.assertEqual((a * a // 2 ** 62)[0, 0], 2 ** 62)
+        self.assertEqual((a // 2)[0, 1], -2)
+
+    def test_in_place_operations(self):
+        a = Matrix.from_list([[1, 2], [3, 4]])
+        values = a.values
+        a += Matrix.from_list([[5, 6], [7, 8]])
+        a %= 5
+        self.assertIs(a.values, values)
+        self.assertEqual(a, Matrix.from_list([[1, 3], [0, 2]]))
+
+    def test_slices(self):
+        a = Matrix.from_list([[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(a[:, 1:], Matrix.from_list([[2, 3], [5, 6]]))
+        self.assertEqual(a[1, :], Matrix.from_list([4, 5, 6]))
+        a[0:1, :] = Matrix.from_list([2 ** 70, 0, 0])
+        self.assertEqual(a[0, 0], 2 ** 70)
+
 
 if __name__ == '__main__':
     unittest.main()
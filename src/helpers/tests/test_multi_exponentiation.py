@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from src.helpers.multi_exponentiation import multi_exp, straus, pippenger, MultiExpPlan
+
+p = 2 ** 127 - 1
+
+
+def naive_multi_exp(bases, exponents, mod):
+    result = 1
+    for base, exponent in zip(bases, exponents):
+        result = result * pow(base, exponent, mod) % mod
+    return result
+
+
+class TestMultiExponentiation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.bases = [random.randrange(2, p) for _ in range(40)]
+        self.exponents = [random.getrandbits(random.choice([1, 16, 127])) for _ in range(40)]
+
+    def test_straus(self):
+        expected = naive_multi_exp(self.bases[:3], self.exponents[:3], p)
+        self.assertEqual(expected, straus(self.bases[:3], self.exponents[:3], p, 4))
+
+    def test_pippenger(self):
+        expected = naive_multi_exp(self.bases, self.exponents, p)
+        self.assertEqual(expected, pippenger(self.bases, self.exponents, p, 5))
+
+    def test_multi_exp(self):
+        for n in [1, 2, 10, 40]:
+            expected = naive_multi_exp(self.bases[:n], self.exponents[:n], p)
+            self.assertEqual(expected, multi_exp(self.bases[:n], self.exponents[:n], p))
+
+    def test_negative_and_zero_exponents(self):
+        bases = [3, 5, 7]
+        self.assertEqual(pow(3, 10, p) * pow(7, 4, p) % p, multi_exp(bases, [10, 0, 4], p))
+        self.assertEqual(1, multi_exp(bases, [5, 0, 0], p) * multi_exp([3], [-5], p) % p)
+        self.assertEqual(1, multi_exp(bases, [0, 0, 0], p))
+
+    def test_different_lengths(self):
+        self.assertRaises(ValueError, multi_exp, [3, 5], [1], p)
+
+    def test_plan_reused_for_many_bases(self):
+        exponents = self.exponents[:10] + [-self.exponents[10]]
+        plan = MultiExpPlan(exponents)
+        for shift in range(3):
+            bases = self.bases[shift:shift + 11]
+            expected = naive_multi_exp(bases[:10], exponents[:10], p) * multi_exp([bases[10]], [exponents[10]], p) % p
+            self.assertEqual(expected, plan.evaluate(bases, p))
+        self.assertRaises(ValueError, plan.evaluate, self.bases[:3], p)
+
+
+if __name__ == '__main__':
+    unittest.main()
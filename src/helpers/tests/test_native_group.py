@@ -0,0 +1,63 @@
+import pickle
+import unittest
+
+from src.helpers.group_backend import get_backend, GroupBackend, NativeBackend
+from src.helpers.helpers import get_int, get_modulus, multi_power, group_discrete_log, power, \
+    precompute_encoding_table
+from src.helpers.native_group import NativeElement, NativeIntegerGroup
+from src.helpers.number_theory import is_probable_prime
+
+# safe prime p = 2q + 1
+p = 1000000007
+q = (p - 1) // 2
+
+
+class TestNativeGroup(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.group = NativeIntegerGroup(p, q)
+        self.g = self.group.randomGen()
+
+    def test_paramgen(self):
+        group = NativeIntegerGroup()
+        group.paramgen(128)
+        self.assertEqual(128, group.p.bit_length())
+        self.assertTrue(is_probable_prime(group.p) and is_probable_prime(group.q))
+        self.assertEqual(group.p, 2 * group.q + 1)
+
+    def test_generator_order(self):
+        self.assertNotEqual(1, self.g)
+        self.assertEqual(1, self.g ** q)
+
+    def test_group_operations(self):
+        g = self.g
+        self.assertEqual(g ** 3, g * g * g)
+        self.assertEqual(g ** 4, (g ** 7) / (g ** 3))
+        self.assertEqual(g ** (q - 1), g ** -1)
+        self.assertEqual(pow(get_int(g), 5, p), int(g ** 5))
+        self.assertEqual(g * 2, NativeElement(2 * int(g), p))
+
+    def test_pickle(self):
+        self.assertEqual(self.g, pickle.loads(pickle.dumps(self.g)))
+        self.assertEqual(hash(self.g), hash(pickle.loads(pickle.dumps(self.g))))
+
+    def test_helpers_use_native_backend(self):
+        g = self.g
+        self.assertIsInstance(get_backend(g), NativeBackend)
+        self.assertEqual(p, get_modulus(g))
+        h = self.group.randomGen()
+        self.assertEqual(g ** 5 * h ** -3, multi_power([g, h], [5, -3]))
+        self.assertEqual(777, group_discrete_log(g, g ** 777, 1000))
+        self.assertEqual(g ** 9, power(g, 9, precompute_encoding_table(g, 16)))
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class IncompleteBackend(GroupBackend):
+            def to_int(self, element) -> int:
+                return int(element)
+
+        self.assertRaises(TypeError, IncompleteBackend)
+        self.assertRaises(TypeError, GroupBackend)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from src.helpers.elliptic_curve import ECGroup, P256
+from src.helpers.helpers import parallel_multi_power
+from src.helpers.native_group import NativeIntegerGroup
+
+# safe prime p = 2q + 1
+p = 1000000007
+q = (p - 1) // 2
+
+
+def _flatten(chunks):
+    return [power for chunk in chunks for power in chunk]
+
+
+class TestParallelMultiPower(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.group = NativeIntegerGroup(p, q)
+        self.bases = [self.group.randomGen(), self.group.randomGen()]
+        self.rows = [[self.group.random(), self.group.random()] for _ in range(10)]
+        self.expected = [self.bases[0] ** a * self.bases[1] ** b for a, b in self.rows]
+
+    def test_chunks(self):
+        chunks = list(parallel_multi_power(self.bases, self.rows, processes=1, chunk_size=4))
+        self.assertEqual([4, 4, 2], [len(chunk) for chunk in chunks])
+        self.assertEqual(self.expected, _flatten(chunks))
+
+    def test_process_pool(self):
+        self.assertEqual(self.expected, _flatten(parallel_multi_power(self.bases, self.rows, processes=2,
+                                                                      chunk_size=3)))
+
+    def test_negative_exponents(self):
+        rows = [[-3, 5], [7, -1]]
+        expected = [self.bases[0] ** a * self.bases[1] ** b for a, b in rows]
+        self.assertEqual(expected, _flatten(parallel_multi_power(self.bases, rows, processes=1)))
+
+    def test_elliptic_curve(self):
+        group = ECGroup(P256)
+        g = group.randomGen()
+        rows = [[group.random()] for _ in range(3)]
+        self.assertEqual([g ** row[0] for row in rows], _flatten(parallel_multi_power([g], rows, processes=2,
+                                                                                      chunk_size=2)))
+
+    def test_no_rows(self):
+        self.assertEqual([[]], list(parallel_multi_power(self.bases, [])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+import src.helpers.pollard_kangaroo
+from src.helpers.pollard_kangaroo import pollard_kangaroo, pollard_kangaroo_many
+
+p = 2 ** 127 - 1
+g = 3
+
+
+class TestPollardKangaroo(unittest.TestCase):
+
+    def test_finds_logarithm(self):
+        for x, limit in [(0, 10), (9, 10), (777, 1000), (123456, 10 ** 6), (98765432, 10 ** 8)]:
+            self.assertEqual(x, pollard_kangaroo(g, pow(g, x, p), p, limit, processes=1))
+
+    def test_finds_logarithm_in_process_pool(self):
+        x = 3141592653
+        self.assertEqual(x, pollard_kangaroo(g, pow(g, x, p), p, 2 ** 32, processes=2))
+
+    def test_targets_share_process_pool(self):
+        exponents = [31337, 0, 2 ** 31]
+        targets = [pow(g, x, p) for x in exponents]
+        executor = src.helpers.pollard_kangaroo.ProcessPoolExecutor
+        with mock.patch.object(src.helpers.pollard_kangaroo, 'ProcessPoolExecutor', side_effect=executor) as pool:
+            self.assertEqual(exponents, pollard_kangaroo_many(g, targets, p, 2 ** 32, processes=2))
+        self.assertEqual(1, pool.call_count)
+        self.assertEqual([5, None], pollard_kangaroo_many(g, [pow(g, 5, p), pow(g, 50, p)], p, 10, processes=1))
+
+    def test_returns_none_outside_limit(self):
+        self.assertIsNone(pollard_kangaroo(g, pow(g, 5000, p), p, 4000, processes=1))
+        self.assertIsNone(pollard_kangaroo(g, pow(g, 5, p), p, 0, processes=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import itertools
+import threading
+import time
+import unittest
+
+from src.helpers.randomness_pool import RandomnessPool
+
+
+class TestRandomnessPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def factory(self):
+        with self.lock:
+            return next(self.counter)
+
+    def test_bundles_used_once(self):
+        with RandomnessPool(self.factory, size=4) as pool:
+            taken = [pool.take() for _ in range(50)]
+        self.assertEqual(len(taken), len(set(taken)))
+
+    def test_fills_in_background(self):
+        with RandomnessPool(self.factory, size=3) as pool:
+            deadline = time.time() + 10
+            while pool.available() < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(3, pool.available())
+
+    def test_take_without_background_thread(self):
+        pool = RandomnessPool(self.factory, size=2, start=False)
+        self.assertEqual([0, 1], [pool.take(), pool.take()])
+        pool.close()
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            RandomnessPool(self.factory, size=0)
@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from src.helpers.matrix import Matrix
+from src.helpers.rns import RNSBasis, RNSMatrix, multiply_modulo, word_primes, BLOCK
+
+
+def random_matrix(rows, cols, mod):
+    return Matrix.from_list([[random.randrange(mod) for _ in range(cols)] for _ in range(rows)])
+
+
+class TestRNS(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.q = 2 ** 521 - 1
+
+    def test_word_primes(self):
+        primes = word_primes(5)
+        self.assertEqual(sorted(primes, reverse=True), primes)
+        self.assertEqual(5, len(set(primes)))
+
+    def test_residues_round_trip(self):
+        basis = RNSBasis.for_bound(self.q ** 2)
+        values = [0, 1, self.q, self.q ** 2, random.randrange(self.q ** 2)]
+        self.assertEqual(values, basis.from_residues(basis.to_residues(values)))
+
+    def test_multiply_modulo(self):
+        a = random_matrix(3, 7, self.q)
+        b = random_matrix(7, 2, self.q)
+        self.assertEqual(a @ b % self.q, multiply_modulo(a, b, self.q))
+
+    def test_multiply_modulo_long_rows(self):
+        q = 12289
+        a = Matrix((1, BLOCK + 5), fill=q - 1)
+        b = Matrix((BLOCK + 5, 1), fill=q - 1)
+        self.assertEqual(a @ b % q, multiply_modulo(a, b, q))
+
+    def test_different_bases(self):
+        a = RNSMatrix.from_matrix(random_matrix(2, 2, self.q), RNSBasis.for_bound(self.q ** 2))
+        b = RNSMatrix.from_matrix(random_matrix(2, 2, self.q), RNSBasis.for_bound(self.q ** 2))
+        with self.assertRaises(ValueError):
+            a @ b
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import mmap
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+import src.inner_product.mife.mife_no_pairings.mife_no_pairings_modulo as mife
+import src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip as ddh_pk_ip
+import src.inner_product.single_input_fe.elgamal_ip.elgamal_ip as elgamal_ip
+import src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh as fully_secure_fe_ddh
+import src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_lwe_short_int as lwe
+from src.errors.wire_format_error import WireFormatError
+from src.helpers.elliptic_curve import P256
+from src.helpers.group_backend import NATIVE
+from src.helpers.matrix import Matrix
+from src.helpers.serialization import dumps, loads, WireMessage, WIRE_FORMAT_VERSION
+from src.inner_product.mife.mife_no_pairings.function_families import MultiInputInnerProductZl
+
+
+def round_trip(value):
+    return loads(memoryview(dumps(value)))
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_values(self):
+        value = {'a': [1, -2, 2 ** 100], 'b': [[1, 2], [3, 4]], 'c': 0.25, 'd': b'seed', 'e': 'text', 'f': None,
+                 'g': [], 'h': [{'x': 1}, [2, 'y']], 'i': True, 'j': [{'x': 1}, {'x': 1}], 'k': [{}, {}],
+                 'l': [None, None]}
+        self.assertEqual(round_trip(value), value)
+
+    def test_ddh_pk_ip(self):
+        for kwargs in [{}, {'backend': NATIVE}, {'curve': P256}]:
+            x, y = [1, 4, 6], [1, 2, 1]
+            mpk, msk = ddh_pk_ip.set_up(1024, 3, **kwargs)
+            if 'curve' not in kwargs:
+                mpk = ddh_pk_ip.precompute(mpk, memory_budget=1 << 20)
+            mpk, msk = round_trip(mpk), round_trip(msk)
+            self.assertNotIn('tables', mpk)
+            ciphertext = round_trip(ddh_pk_ip.encrypt(mpk, x))
+            func_key = round_trip(ddh_pk_ip.get_functional_key(mpk, msk, y))
+            self.assertEqual(ddh_pk_ip.decrypt(mpk, ciphertext, func_key, y, 100), 15)
+
+    def test_fully_secure_fe_ddh(self):
+        x, y = [3, 1, 2], [2, 2, 5]
+        mpk, msk = fully_secure_fe_ddh.set_up(1024, 3)
+        mpk, msk = round_trip(mpk), round_trip(msk)
+        ciphertext = round_trip(fully_secure_fe_ddh.encrypt(mpk, x))
+        func_key = round_trip(fully_secure_fe_ddh.get_functional_key(mpk, msk, y))
+        self.assertEqual(fully_secure_fe_ddh.decrypt(mpk, func_key, ciphertext, y, 100), 18)
+
+    def test_elgamal_ip(self):
+        x, y = [1, 2, 3, 4], [1, 1, 2, 1]
+        mpk, msk = elgamal_ip.set_up(1024, 4)
+        mpk, msk = round_trip(mpk), round_trip(msk)
+        self.assertIs(mpk[0]['cipher'], mpk[3]['cipher'])
+        ciphertext = elgamal_ip.encrypt(mpk, x)
+        message = WireMessage(dumps(ciphertext))
+        # ciphertexts of the coordinates are stored by columns, c1 of all of them only once
+        self.assertEqual(len(message.fields['/ct/c2']), 4)
+        self.assertEqual(message.fields['/ct/c1'].shape, ())
+        key = elgamal_ip.get_functional_key(msk, y)
+        self.assertEqual(elgamal_ip.decrypt(mpk, message.decode(), round_trip(key), y, 100), 13)
+
+    def test_lwe(self):
+        lwe.debug = False
+        x, y = [1, 2, 3], [3, 2, 1]
+        mpk, msk = lwe.set_up(8, 3, 4, 4, seeded=True)
+        mpk, msk = round_trip(mpk), round_trip(msk)
+        self.assertIsInstance(msk, Matrix)
+        ciphertext = round_trip(lwe.encrypt(mpk, x))
+        func_key = round_trip(lwe.get_functional_key(mpk, msk, y))
+        self.assertEqual(lwe.decrypt(mpk, func_key, y, ciphertext), 10)
+
+    def test_compact(self):
+        mpk, msk = ddh_pk_ip.set_up(1024, 3, curve=P256)
+        ciphertext = ddh_pk_ip.encrypt(mpk, [1, 4, 6])
+        # 32 bytes less for each of the 4 points
+        self.assertEqual(len(dumps(ciphertext)) - len(dumps(ciphertext, compact=True)), 4 * 32)
+        self.assertEqual(loads(dumps(ciphertext, compact=True)), ciphertext)
+        self.assertEqual(loads(dumps([P256.identity, P256.generator], compact=True)), [P256.identity, P256.generator])
+
+        # several chunks of packed values
+        matrix = Matrix.from_array(np.random.randint(0, 2 ** 29, size=(3, 30000)))
+        message = WireMessage(dumps(matrix, compact=True))
+        self.assertEqual(message.fields['/values'].width, int(matrix.values.max()).bit_length())
+        self.assertEqual(message.decode(), matrix)
+        negative = Matrix.from_list([[-1, 2]])
+        self.assertEqual(loads(dumps(negative, compact=True)), negative)
+
+        lwe.debug = False
+        mpk, msk = lwe.set_up(8, 3, 4, 4, params=lwe.generate_parameters(8, 3, 4, 4, compression=True))
+        ciphertext = lwe.compress(mpk, lwe.encrypt(mpk, [1, 2, 3]))
+        data = dumps(ciphertext, compact=True)
+        self.assertLess(len(data), len(dumps(ciphertext)))
+        self.assertEqual(lwe.decrypt(mpk, lwe.get_functional_key(mpk, msk, [3, 2, 1]), [3, 2, 1], loads(data)), 10)
+
+    def test_mife(self):
+        x = [[1, 2], [3, 4]]
+        y = [[1, 3], [4, 1]]
+        mpk, msk = mife.set_up(MultiInputInnerProductZl(1000, 2, 2), 1024)
+        mpk, msk = round_trip(mpk), round_trip(msk)
+        ciphertexts = round_trip([mife.encrypt(mpk, msk, i, x[i]) for i in range(2)])
+        func_key = round_trip(mife.get_functional_key(mpk, msk, y))
+        self.assertEqual(mife.decrypt(mpk, func_key, ciphertexts, y, 5000), 23)
+
+    def test_zero_copy_fields(self):
+        matrix = Matrix.from_list([[1, -2, 3], [4, 5, -(2 ** 40)]])
+        with tempfile.TemporaryFile() as file:
+            file.write(dumps(matrix))
+            file.flush()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                message = WireMessage(mapped)
+                field = message.fields['/values']
+                self.assertEqual(field.width, 6)
+                self.assertTrue(np.array_equal(field.array(), matrix.values))
+                self.assertEqual(message.decode(), matrix)
+                del message, field
+
+    def test_invalid_messages(self):
+        data = bytearray(dumps([1, 2]))
+        with self.assertRaises(WireFormatError):
+            loads(b'XXXX' + data[4:])
+        data[4] = WIRE_FORMAT_VERSION + 1
+        with self.assertRaises(WireFormatError):
+            loads(data)
+        with self.assertRaises(WireFormatError):
+            loads(dumps([1, 2])[:-3])
+
+    def test_inconsistent_directory(self):
+        data = dumps([[1, 2, 3], [4, 5, 6]])
+        # header, empty path, entry, 2 dimensions and then width, offset and size of the only field
+        location = struct.calcsize('>4sBBII') + 2 + struct.calcsize('>BBBIB') + 16
+        width, offset, size = struct.unpack_from('>IQQ', data, location)
+        self.assertEqual((1, 0, 6), (width, offset, size))
+        for dimensions, location_fields in [((2, 3), (1, 0, 4)), ((2, 3), (3, 0, 6)), ((2, 3), (0, 0, 6)),
+                                            ((10 ** 15, 10 ** 15), (0, 0, 0)), ((2, 2 ** 63), (1, 0, 6))]:
+            message = bytearray(data)
+            struct.pack_into('>QQ', message, location - 16, *dimensions)
+            struct.pack_into('>IQQ', message, location, *location_fields)
+            with self.assertRaises(WireFormatError):
+                loads(message)
+        points = bytearray(dumps([P256.generator], compact=True))
+        points[location - 8 + len(b'P-256'):location - 8 + len(b'P-256') + 4] = struct.pack('>I', 65)
+        with self.assertRaises(WireFormatError):
+            loads(points)
+
+    def test_truncated_directory(self):
+        data = dumps({'a': [1, 2], 'b': None})
+        header = struct.calcsize('>4sBBII')
+        _, _, _, count, directory_size = struct.unpack_from('>4sBBII', data)
+        for end in range(header, header + directory_size):
+            with self.assertRaises(WireFormatError):
+                loads(data[:end])
+        # a directory claiming fewer bytes than its entries take
+        message = bytearray(data)
+        struct.pack_into('>I', message, 10, directory_size - 10)
+        with self.assertRaises(WireFormatError):
+            loads(message)
+
+    def test_non_integer_arrays(self):
+        for value in [Matrix.from_list([[1, 2]]) * 0.5, np.array([1, 0.5], dtype=object), np.array([True])]:
+            with self.assertRaises(TypeError):
+                dumps(value)
+            with self.assertRaises(TypeError):
+                dumps(value, compact=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
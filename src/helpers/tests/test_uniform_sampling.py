@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from src.helpers.helpers import sample_uniform_array, sample_random_matrix_mod
+from src.helpers.matrix import Matrix
+
+
+class TestUniformSampling(unittest.TestCase):
+
+    def test_word_modulus(self):
+        for mod in [1, 2, 97, (1 << 40) + 15, 1 << 63]:
+            values = sample_uniform_array((50, 40), mod)
+            self.assertEqual(values.shape, (50, 40))
+            self.assertEqual(values.dtype, np.int64)
+            self.assertTrue(((0 <= values) & (values < mod)).all())
+
+    def test_big_modulus(self):
+        mod = (1 << 127) - 1
+        values = sample_uniform_array((3, 7), mod)
+        self.assertEqual(values.shape, (3, 7))
+        self.assertTrue(all(0 <= value < mod for value in values.ravel()))
+        self.assertGreater(max(values.ravel()).bit_length(), 100)
+
+    def test_uniformity(self):
+        counts = np.bincount(sample_uniform_array((100000,), 5), minlength=5)
+        self.assertTrue((np.abs(counts - 20000) < 1000).all())
+
+    def test_matrix(self):
+        matrix = sample_random_matrix_mod((4, 6), 101)
+        self.assertIsInstance(matrix, Matrix)
+        self.assertEqual(matrix.size(), (4, 6))
+
+    def test_invalid_modulus(self):
+        with self.assertRaises(ValueError):
+            sample_uniform_array((2, 2), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,8 @@ from src.errors.wrong_vector_for_provided_key import WrongVectorForProvidedKey
 from src.inner_product.mife.mife_no_pairings.function_families import MultiInputInnerProductZl
 import src.inner_product.mife.mife_no_pairings.one_time_secure_mife
 import src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+from src.helpers.additive_elgamal import AdditiveElGamal
+from src.helpers.serialization import register_type
 from typing import List
 
 
@@ -100,17 +102,26 @@ class FunctionalKey:
         self._z = z
 
 
+register_type(MSK, 'MIFE.MSK', lambda msk: {'ot_mife_key': msk.ot_mife_key, 'fe_msks': msk.fe_msks},
+              lambda fields: MSK(fields['ot_mife_key'], fields['fe_msks']))
+register_type(MPK, 'MIFE.MPK', lambda mpk: {'ot_mife_modulus': mpk.ot_mife_modulus, 'fe_mpks': mpk.fe_mpks},
+              lambda fields: MPK(fields['ot_mife_modulus'], fields['fe_mpks']))
+register_type(FunctionalKey, 'MIFE.FunctionalKey', lambda key: {'sk': key.sk, 'z': key.z},
+              lambda fields: FunctionalKey(fields['sk'], fields['z']))
+
 # selection of underlying schemes
 ot_mife = src.inner_product.mife.mife_no_pairings.one_time_secure_mife
 single_input_fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
 
 
-def set_up(func_descr: MultiInputInnerProductZl, security_param: int) -> (MPK, MSK):
+def set_up(func_descr: MultiInputInnerProductZl, security_param: int, cipher: AdditiveElGamal = None) -> (MPK, MSK):
     """
 
     Args:
         func_descr: description of a function family for inner product this scheme should support
         security_param: security parameter
+        cipher: underlying ElGamal of the single-input schemes, e.g. created with
+            single_input_fe.create_cipher(group=...), a new one with the default parameters is created if not provided
 
     Returns:
         (master public key, master secret key)
@@ -118,10 +129,12 @@ def set_up(func_descr: MultiInputInnerProductZl, security_param: int) -> (MPK, M
     vector_len = func_descr.n
     inner_vector_len = func_descr.m
     ot_mife_key, ot_mife_modulus = ot_mife.set_up(func_descr, security_param)
+    if cipher is None:
+        cipher = single_input_fe.create_cipher()
     fe_mpks = [None] * vector_len
     fe_msks = [None] * vector_len
     for i in range(vector_len):
-        fe_mpks[i], fe_msks[i] = single_input_fe.set_up(security_param, inner_vector_len)
+        fe_mpks[i], fe_msks[i] = single_input_fe.set_up(security_param, inner_vector_len, cipher=cipher)
     msk = MSK(ot_mife_key, fe_msks)
     mpk = MPK(ot_mife_modulus, fe_mpks)
     return mpk, msk
@@ -1,6 +1,6 @@
 from src.errors.vector_size_mismatch_error import VectorSizeMismatchError
 from src.errors.wrong_vector_for_provided_key import WrongVectorForProvidedKey
-from src.helpers.helpers import inner_product, get_random_from_Zl, add_vectors_mod
+from src.helpers.helpers import inner_product, add_vectors_mod, sample_uniform_array
 from src.inner_product.mife.mife_no_pairings.function_families import MultiInputInnerProductZl
 from typing import List
 
@@ -11,10 +11,8 @@ def set_up(func_descr: MultiInputInnerProductZl, security_param: int) -> (OneTim
     vector_len = func_descr.n
     inner_vector_len = func_descr.m
     modulus = func_descr.L
-    key = [0] * vector_len
     pp = {'modulus': modulus}  # public parameters
-    for i in range(vector_len):
-        key[i] = [get_random_from_Zl(modulus) for _ in range(inner_vector_len)]
+    key = sample_uniform_array((vector_len, inner_vector_len), modulus).tolist()
     return key, modulus
 
 
@@ -17,6 +17,12 @@ class TestMIFENoPairings(unittest.TestCase):
         self.assertIsInstance(mpk, MPK)
         self.assertIsInstance(msk, MSK)
 
+    def test_set_up_with_cipher(self):
+        cipher = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip.create_cipher()
+        mpk, msk = self.mife.set_up(self.ip_zl_func_family, 1024, cipher=cipher)
+        for fe_mpk in mpk.fe_mpks:
+            self.assertTrue(all(pk['cipher'] is cipher and pk['g'] == cipher.g for pk in fe_mpk))
+
     def test_ith_encrypt(self):
         mpk, msk = self.mife.set_up(self.ip_zl_func_family, 1024)
         i = 0
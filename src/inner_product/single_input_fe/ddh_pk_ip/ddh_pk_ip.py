@@ -7,7 +7,7 @@ Michel Abdalla et al. DDH based simple functional encryption inner product schem
 | DOI: 10.1007/978-3-662-46447-2_33
 
 * type:         functional encryption (public key)
-* setting:      SchnorrGroup mod p
+* setting:      SchnorrGroup mod p or prime order elliptic curve group
 * assumption:   DDH
 
 :Authors: Cecylia Borek
@@ -16,48 +16,156 @@ Michel Abdalla et al. DDH based simple functional encryption inner product schem
 Note: Because to recover the final result of inner product discrete logarithm calculation is needed, the inner product
 should lie within a reasonable limit, otherwise the calculation may take too long.
 """
-from typing import Dict, List, Tuple
-import numpy as np
+from typing import Dict, Iterator, List, Tuple
 import charm
 
-from src.helpers.helpers import generate_group, get_modulus, reduce_vector_mod, inner_product_group_vector, get_int, \
-    dummy_discrete_log, get_random_generator
+from src.helpers.helpers import get_group_modulus, reduce_vector_mod, inner_product_group_vector, \
+    group_discrete_log, get_random_generator, power, precompute_fixed_base_tables, multi_power, \
+    precompute_encoding_table, parallel_multi_power, inner_products_group_vector, multi_power_many, \
+    group_discrete_log_many, MULTI_POWER_CHUNK
+from src.helpers.elliptic_curve import EllipticCurve, ECGroup
+from src.helpers.group_backend import CHARM
+from src.helpers.group_registry import get_group
+from src.helpers.key_cache import FunctionalKeyCache
+from src.helpers.randomness_pool import RandomnessPool, POOL_SIZE
+from src.helpers.fixed_base import EncodingTable
 from src.errors.wrong_vector_for_provided_key import WrongVectorForProvidedKey
 
 IntegerGroupElement = charm.core.math.integer.integer
 
+# default memory budget in bytes for fixed-base exponentiation tables
+PRECOMPUTATION_BUDGET = 256 * 1024 * 1024
 
-def set_up(security_parameter: int, vector_length: int) -> \
-        (List[IntegerGroupElement], List[IntegerGroupElement]):
+
+def set_up(security_parameter: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM,
+           group=None, generator=None, processes: int = None) -> (List[IntegerGroupElement], List[IntegerGroupElement]):
     """Sets up the parameters of a DDH public key FE scheme.
-    Samples an integer Schnorr group of order p, where p is a prime number of
-    bit-size equal to security_parameter. Returns master public key and master secret
+    Takes an integer Schnorr group of order p, where p is a prime number of
+    bit-size equal to security_parameter, from the group registry (a standard group if
+    there is one of that size, otherwise a newly sampled one). Returns master public key and master secret
     key as vectors of group elements.
+    If curve is provided, the group of points of the elliptic curve is used instead and
+    security_parameter is ignored. If group is provided, it is used as it is, so that many
+    key pairs can share the same parameters.
+    Keys of long vectors are generated in chunks spread across a process pool, see set_up_chunks.
 
     Args:
         security_parameter (int): security parameter, bit-size of order of the sampled group
         vector_length (int): supported vector length
+        curve (EllipticCurve): prime order elliptic curve, e.g. P256
+        backend (str): arithmetic backend of the integer group, CHARM or NATIVE
+        group: existing group, e.g. mpk['group'] of another key pair
+        generator: generator of the group to use instead of a random one
+        processes (int): number of worker processes, os.cpu_count() if not provided
 
     Returns:
         Tuple[List[IntegerGroupElement], List[IntegerGroupElement]]: master public key,
                                                                         master secret key
     """
-    group = generate_group(security_parameter)
-    g = get_random_generator(group)
-    p = get_modulus(g)
-    s = [group.random() for _ in range(vector_length)]
-    h = [g ** s[i] for i in range(vector_length)]
-    mpk = {'group': group, 'g': g, 'p': p, 'h': h}
-    msk = s
+    h = []
+    msk = []
+    for chunk_mpk, chunk_msk in set_up_chunks(security_parameter, vector_length, curve, backend, group, generator,
+                                              processes):
+        h += chunk_mpk['h']
+        msk += chunk_msk
+    mpk = dict(chunk_mpk, h=h)
     return mpk, msk
 
 
-def encrypt(mpk: dict, x: List[int]) -> Dict[str, List[IntegerGroupElement]]:
-    """Encrypts integer vector x
+def set_up_chunks(security_parameter: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM,
+                  group=None, generator=None, processes: int = None, chunk_size: int = MULTI_POWER_CHUNK) -> \
+        Iterator[Tuple[dict, List[int]]]:
+    """Generates the same keys as set_up, but yields them in chunks of consecutive coordinates as soon as they are
+    produced, so that keys of long vectors can be written out without keeping all of them in memory.
+    Exponentiations of the chunks are spread across a process pool.
+
+    Args:
+        security_parameter (int): security parameter, bit-size of order of the sampled group
+        vector_length (int): supported vector length
+        curve (EllipticCurve): prime order elliptic curve, e.g. P256
+        backend (str): arithmetic backend of the integer group, CHARM or NATIVE
+        group: existing group, e.g. mpk['group'] of another key pair
+        generator: generator of the group to use instead of a random one
+        processes (int): number of worker processes, os.cpu_count() if not provided
+        chunk_size (int): number of coordinates in a chunk
+
+    Returns:
+        Iterator[Tuple[dict, List[int]]]: master public key with h only for the coordinates of the chunk and master
+        secret key for them
+    """
+    if group is None:
+        group = ECGroup(curve) if curve is not None else get_group(security_parameter, backend)
+    g = generator if generator is not None else get_random_generator(group)
+    p = get_group_modulus(g)
+    s = [group.random() for _ in range(vector_length)]
+    start = 0
+    for h in parallel_multi_power([g], [[s_i] for s_i in s], processes, chunk_size):
+        yield {'group': group, 'g': g, 'p': p, 'h': h}, s[start:start + len(h)]
+        start += len(h)
+
+
+def precompute(mpk: dict, memory_budget: int = PRECOMPUTATION_BUDGET, message_bound: int = 0) -> dict:
+    """Precomputes fixed-base exponentiation tables for g and all elements of h, which are then used by encrypt
+    instead of full exponentiations. If message_bound is positive, g ** x[i] is additionally precomputed for all
+    0 <= x[i] < message_bound, so encoding of small vector elements becomes a table lookup.
+
+    Args:
+        mpk (dict): master public key
+        memory_budget (int): memory in bytes available for the tables
+        message_bound (int): upper bound for vector elements encoded with a table lookup
+
+    Returns:
+        dict: master public key extended with the tables
+    """
+    fixed_base_budget = memory_budget - EncodingTable.memory(mpk['p'], message_bound)
+    bases = [mpk['g']] + mpk['h']
+    tables = precompute_fixed_base_tables(bases, mpk['p'].bit_length(), fixed_base_budget)
+    precomputed = {'g': tables[0], 'h': tables[1:]}
+    if message_bound > 0:
+        precomputed['messages'] = precompute_encoding_table(mpk['g'], message_bound, tables[0])
+    return dict(mpk, tables=precomputed)
+
+
+def precompute_randomness(mpk: dict, length: int = None) -> dict:
+    """Computes the part of a ciphertext that does not depend on the encrypted vector, g ** r and h[i] ** r for a fresh
+    random r. The result can be used by exactly one call of encrypt.
+
+    Args:
+        mpk (dict): master public key
+        length (int): length of the vectors the bundle is for, supported vector length if not provided
+
+    Returns:
+        dict: randomness bundle
+    """
+    length = len(mpk['h']) if length is None else length
+    tables = mpk.get('tables', {})
+    h_tables = tables.get('h', [None] * len(mpk['h']))
+    r = mpk['group'].random()
+    return {'ct0': power(mpk['g'], r, tables.get('g')),
+            'h': [power(mpk['h'][i], r, h_tables[i]) for i in range(length)]}
+
+
+def randomness_pool(mpk: dict, size: int = POOL_SIZE) -> RandomnessPool:
+    """Returns a pool precomputing randomness bundles for encrypt in a background thread
+
+    Args:
+        mpk (dict): master public key
+        size (int): maximal number of precomputed bundles
+
+    Returns:
+        RandomnessPool: the started pool
+    """
+    return RandomnessPool(lambda: precompute_randomness(mpk), size)
+
+
+def encrypt(mpk: dict, x: List[int], randomness: dict = None) -> Dict[str, List[IntegerGroupElement]]:
+    """Encrypts integer vector x. If a randomness bundle from precompute_randomness (or a pool) is provided, only the
+    vector is encoded and combined with it.
 
     Args:
         mpk (dict): master public key
         x (List[int]): integer vector to be encrypted
+        randomness (dict): randomness bundle, it must not be used for another encryption
 
     Raises:
         WrongVectorSizeError: if the provided vector is longer than supported vector length
@@ -67,11 +175,15 @@ def encrypt(mpk: dict, x: List[int]) -> Dict[str, List[IntegerGroupElement]]:
     """
     if len(x) > len(mpk['h']):
         raise WrongVectorForProvidedKey(f'Vector {x} too long for the configured FE')
-    r = mpk['group'].random()
-    ct_0 = mpk['g'] ** r
+    if randomness is None:
+        randomness = precompute_randomness(mpk, len(x))
+    elif len(x) > len(randomness['h']):
+        raise WrongVectorForProvidedKey(f'Vector {x} too long for the provided randomness')
+    tables = mpk.get('tables', {})
+    message_table = tables.get('messages', tables.get('g'))
     x = reduce_vector_mod(x, mpk['p'])
-    ct = [(mpk['h'][i] ** r) * (mpk['g'] ** x[i]) for i in range(len(x))]
-    ciphertext = {'ct0': ct_0, 'ct': ct}
+    ct = [randomness['h'][i] * power(mpk['g'], x[i], message_table) for i in range(len(x))]
+    ciphertext = {'ct0': randomness['ct0'], 'ct': ct}
     return ciphertext
 
 
@@ -95,6 +207,32 @@ def get_functional_key(mpk: dict, msk: List[IntegerGroupElement], y: List[int])
     return inner_product_group_vector(msk, y)
 
 
+def get_functional_keys(mpk: dict, msk: List[IntegerGroupElement], ys: List[List[int]],
+                        cache: FunctionalKeyCache = None) -> List[int]:
+    """Derives functional keys for many vectors y at once with a single matrix-vector product. If a cache of keys of
+    msk is provided, keys of vectors found in it are not recomputed and the new keys are stored in it.
+
+    Args:
+        mpk (dict): master public key
+        msk (List[IntegerGroupElement]): master secret key
+        ys (List[List[int]]): vectors for which the functional keys should be calculated
+        cache (FunctionalKeyCache): cache of functional keys derived from msk
+
+    Raises:
+        WrongVectorSizeError: if any vector y is longer than the supported vector length
+
+    Returns:
+        List[int]: functional keys corresponding to vectors ys
+    """
+    for y in ys:
+        if len(y) > len(msk):
+            raise WrongVectorForProvidedKey(f'Vector {y} too long for the configured FE')
+    ys = [reduce_vector_mod(y, mpk['p']) for y in ys]
+    if cache is None:
+        return inner_products_group_vector(msk, ys)
+    return cache.get_many(ys, lambda missing: inner_products_group_vector(msk, missing))
+
+
 def decrypt(mpk: dict, ciphertext: Dict[str, IntegerGroupElement], sk_y: int, y: List[int], limit: int) -> int:
     """Returns inner product of vector y and vector x encrypted in ciphertext if it lies within the provided limit
 
@@ -112,13 +250,32 @@ def decrypt(mpk: dict, ciphertext: Dict[str, IntegerGroupElement], sk_y: int, y:
     ct_0 = ciphertext['ct0']
     ct = ciphertext['ct']
     y = reduce_vector_mod(y, mpk['p'])
-    t = [ct[i] ** y[i] for i in range(len(ct))]
-    product = np.prod(t)
+    product = multi_power(ct, y[:len(ct)])
     intermediate = product / (ct_0 ** sk_y)
 
-    pi = get_int(intermediate)
-    g = get_int(mpk['g'])
-
-    inner_prod = dummy_discrete_log(g, pi, mpk['p'], limit)
+    inner_prod = group_discrete_log(mpk['g'], intermediate, limit)
     return inner_prod
 
+
+def decrypt_many(mpk: dict, sk_y: int, y: List[int], ciphertexts: List[Dict[str, IntegerGroupElement]],
+                 limit: int) -> List[int]:
+    """Returns inner products of vector y and the vectors encrypted in ciphertexts, all decrypted with the same key.
+    The exponents y and -sk_y are recoded once for the whole batch and all the logarithms are calculated together.
+
+    Args:
+        mpk (dict): master public key
+        sk_y (int): functional decryption key for vector y
+        y (List[y]): vector y
+        ciphertexts (List[Dict[str, IntegerGroupElement]]): ciphertexts of vectors of the same length
+        limit (int): the upper bound for the inner product results
+
+    Returns:
+        List[int]: inner products of x and y for every ciphertext, None for the ones not found within the limit
+    """
+    if not ciphertexts:
+        return []
+    y = reduce_vector_mod(y, mpk['p'])
+    exponents = y[:len(ciphertexts[0]['ct'])] + [-sk_y]
+    intermediates = multi_power_many([ciphertext['ct'] + [ciphertext['ct0']] for ciphertext in ciphertexts],
+                                     exponents)
+    return group_discrete_log_many(mpk['g'], intermediates, limit)
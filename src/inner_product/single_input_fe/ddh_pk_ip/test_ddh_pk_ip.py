@@ -1,5 +1,8 @@
 import numpy as np
 import src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+from src.helpers.elliptic_curve import P256
+from src.helpers.group_backend import NATIVE
+from src.helpers.key_cache import FunctionalKeyCache
 
 
 def test_fin_result():
@@ -27,5 +30,126 @@ def test_fin_result():
     print(f'The calculated inner product same as expected!: {final_result} == {expected}')
 
 
+def test_fin_result_with_precomputation():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    mpk, msk = fe.set_up(1024, len(x))
+    mpk = fe.precompute(mpk, memory_budget=32 * 1024 * 1024)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, ciphertext, func_key, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_elliptic_curve():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    mpk, msk = fe.set_up(256, len(x), curve=P256)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, ciphertext, func_key, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_native_backend():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    mpk, msk = fe.set_up(512, len(x), backend=NATIVE)
+    mpk = fe.precompute(mpk, memory_budget=32 * 1024 * 1024, message_bound=16)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, ciphertext, func_key, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_shared_group():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    first_mpk, _ = fe.set_up(1024, len(x))
+    mpk, msk = fe.set_up(1024, len(x), group=first_mpk['group'], generator=first_mpk['g'])
+    assert mpk['group'] is first_mpk['group'] and mpk['g'] == first_mpk['g']
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, ciphertext, func_key, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_parallel_set_up():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    chunks = list(fe.set_up_chunks(1024, len(x), processes=2, chunk_size=2))
+    assert [2, 2, 1] == [len(chunk_msk) for _, chunk_msk in chunks]
+    mpk, msk = fe.set_up(1024, len(x), processes=2)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, ciphertext, func_key, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_randomness_pool():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 2, 1]
+
+    mpk, msk = fe.set_up(1024, len(x))
+    func_key = fe.get_functional_key(mpk, msk, y)
+    with fe.randomness_pool(mpk, size=2) as pool:
+        ciphertexts = [fe.encrypt(mpk, x, pool.take()) for _ in range(3)]
+    assert len({str(ciphertext['ct0']) for ciphertext in ciphertexts}) == 3
+    for ciphertext in ciphertexts:
+        assert fe.decrypt(mpk, ciphertext, func_key, y, 200) == np.inner(x, y)
+
+
+def test_fin_result_batch_functional_keys():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    x = [1, 4, 6, 3, 5]
+    ys = [[1, 2, 1, 2, 1], [0, 1, 0, 1, 0], [1, 2, 1, 2, 1]]
+
+    mpk, msk = fe.set_up(1024, len(x))
+    cache = FunctionalKeyCache(maxsize=8)
+    func_keys = fe.get_functional_keys(mpk, msk, ys, cache)
+    assert func_keys == [fe.get_functional_key(mpk, msk, y) for y in ys]
+    assert len(cache) == 2
+    ciphertext = fe.encrypt(mpk, x)
+    for func_key, y in zip(func_keys, ys):
+        assert fe.decrypt(mpk, ciphertext, func_key, y, 200) == np.inner(x, y)
+
+
+def test_fin_result_decrypt_many():
+    fe = src.inner_product.single_input_fe.ddh_pk_ip.ddh_pk_ip
+
+    xs = [[1, 4, 6, 3, 5], [0, 0, 0, 0, 0], [7, 1, 2, 3, 9]]
+    y = [1, 2, 1, 2, 1]
+
+    for curve in [None, P256]:
+        mpk, msk = fe.set_up(1024, len(y), curve=curve)
+        func_key = fe.get_functional_key(mpk, msk, y)
+        ciphertexts = [fe.encrypt(mpk, x) for x in xs]
+        assert fe.decrypt_many(mpk, func_key, y, ciphertexts, 200) == [np.inner(x, y) for x in xs]
+    assert fe.decrypt_many(mpk, func_key, y, [], 200) == []
+
+
 if __name__ == "__main__":
     test_fin_result()
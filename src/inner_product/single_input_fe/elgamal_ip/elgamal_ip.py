@@ -8,7 +8,7 @@ Michel Abdalla et al. generic functional encryption inner product scheme based o
 | DOI: 10.1007/978-3-662-46447-2_33
 
 * type:         functional encryption (public key)
-* setting:      SchnorrGroup mod p
+* setting:      SchnorrGroup mod p or prime order elliptic curve group
 * assumption:   DDH
 
 :Authors:       Cecylia Borek
@@ -16,48 +16,122 @@ Michel Abdalla et al. generic functional encryption inner product scheme based o
 
 Note: Because to recover the final result of inner product discrete logarithm calculation is needed, the inner product
 should lie within a reasonable limit, otherwise the calculation may take too long.
+
+The group, its generator and the state of the underlying additive ElGamal live on an AdditiveElGamal instance, which
+set_up attaches to every key. Keys created with different instances, e.g. for different tenants or security levels,
+can be used side by side and from different threads.
 """
 from charm.toolbox.integergroup import IntegerGroupQ, integer
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Tuple
 from src.helpers.additive_elgamal import AdditiveElGamal, ElGamalCipher
-from src.helpers.helpers import reduce_vector_mod, get_int
+from src.helpers.helpers import reduce_vector_mod, get_int, multi_power, precompute_encoding_table, \
+    get_group_modulus, inner_products_group_vector, MULTI_POWER_CHUNK
+from src.helpers.elliptic_curve import EllipticCurve, ECGroup
+from src.helpers.group_backend import CHARM
+from src.helpers.group_registry import create_group
+from src.helpers.key_cache import FunctionalKeyCache
+from src.helpers.randomness_pool import RandomnessPool, POOL_SIZE
 from src.errors.wrong_vector_for_provided_key import WrongVectorForProvidedKey
 import charm
-import numpy as np
 
 IntegerGroupElement = charm.core.math.integer.integer
 ElGamalKey = Dict[str, IntegerGroupElement]
 
 debug = True
 
-# the common parameters for underlying additive ElGamal
+# the default common parameters for underlying additive ElGamal
 p = integer(
         148829018183496626261556856344710600327516732500226144177322012998064772051982752493460332138204351040296264880017943408846937646702376203733370973197019636813306480144595809796154634625021213611577190781215296823124523899584781302512549499802030946698512327294159881907114777803654670044046376468983244647367)
 q = integer(
     74414509091748313130778428172355300163758366250113072088661006499032386025991376246730166069102175520148132440008971704423468823351188101866685486598509818406653240072297904898077317312510606805788595390607648411562261949792390651256274749901015473349256163647079940953557388901827335022023188234491622323683)
-elgamal_group = IntegerGroupQ()
-elgamal = AdditiveElGamal(elgamal_group, p, q)
-elgamal_params = {"group": elgamal_group, "p": int(p)}
 
 
-def set_up(security_parameter: int, vector_length: int) -> Tuple[List[ElGamalKey], List[ElGamalKey]]:
+def create_cipher(curve: EllipticCurve = None, backend: str = CHARM, group=None) -> AdditiveElGamal:
+    """Creates an independent instance of the underlying additive ElGamal with its own generator
+
+    Args:
+        curve: prime order elliptic curve, e.g. P256, if provided ElGamal works in the group of its points
+        backend: arithmetic backend of the integer group with the default common parameters, CHARM or NATIVE
+        group: group with parameters already set, e.g. from the group registry, used instead of the default ones
+
+    Returns:
+        AdditiveElGamal: the cipher
+    """
+    if group is not None:
+        return AdditiveElGamal(group)
+    if curve is not None:
+        return AdditiveElGamal(ECGroup(curve))
+    group = IntegerGroupQ() if backend == CHARM else create_group(backend)
+    return AdditiveElGamal(group, int(p), int(q))
+
+
+def set_up(security_parameter: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM,
+           cipher: AdditiveElGamal = None, processes: int = None) -> Tuple[List[ElGamalKey], List[ElGamalKey]]:
     """
     Generates master public and secret key
+    Keys of long vectors are generated in chunks spread across a process pool, see set_up_chunks.
     Args:
         security_parameter: security parameter for generating underlying Elgamal's keys
         vector_length: supported length of vectors
+        curve: prime order elliptic curve, e.g. P256, if provided underlying ElGamal works in the group of its points
+        backend: arithmetic backend of the integer group with the common parameters, CHARM or NATIVE
+        cipher: underlying ElGamal to use, a new one is created with create_cipher(curve, backend) if not provided
+        processes: number of worker processes, os.cpu_count() if not provided
 
     Returns:
         Tuple[List[ElGamalKey], List[ElGamalKey]]: master public key and master secret key
     """
-
-    master_public_key = [None] * vector_length
-    master_secret_key = [None] * vector_length
-    for i in range(vector_length):
-        (master_public_key[i], master_secret_key[i]) = elgamal.keygen(secparam=security_parameter)
+    master_public_key = []
+    master_secret_key = []
+    for chunk_mpk, chunk_msk in set_up_chunks(security_parameter, vector_length, curve, backend, cipher, processes):
+        master_public_key += chunk_mpk
+        master_secret_key += chunk_msk
     return master_public_key, master_secret_key
 
 
+def set_up_chunks(security_parameter: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM,
+                  cipher: AdditiveElGamal = None, processes: int = None, chunk_size: int = MULTI_POWER_CHUNK) -> \
+        Iterator[Tuple[List[ElGamalKey], List[ElGamalKey]]]:
+    """
+    Generates the same keys as set_up, but yields them in chunks of consecutive coordinates as soon as they are
+    produced, so that keys of long vectors can be written out without keeping all of them in memory.
+    Args:
+        security_parameter: security parameter for generating underlying Elgamal's keys
+        vector_length: supported length of vectors
+        curve: prime order elliptic curve, e.g. P256, if provided underlying ElGamal works in the group of its points
+        backend: arithmetic backend of the integer group with the common parameters, CHARM or NATIVE
+        cipher: underlying ElGamal to use, a new one is created with create_cipher(curve, backend) if not provided
+        processes: number of worker processes, os.cpu_count() if not provided
+        chunk_size: number of coordinates in a chunk
+
+    Returns:
+        Iterator[Tuple[List[ElGamalKey], List[ElGamalKey]]]: parts of master public key and master secret key
+    """
+    if cipher is None:
+        cipher = create_cipher(curve, backend)
+    for keys in cipher.keygen_chunks(vector_length, security_parameter, processes, chunk_size):
+        yield [dict(pk, cipher=cipher) for pk, _ in keys], [dict(sk, cipher=cipher) for _, sk in keys]
+
+
+def _vector_modulus(cipher: AdditiveElGamal) -> int:
+    return get_group_modulus(cipher.g)
+
+
+def precompute(mpk: List[ElGamalKey], message_bound: int) -> List[ElGamalKey]:
+    """Precomputes g ** x[i] for all 0 <= x[i] < message_bound, so that encoding of small vector elements during
+    encryption becomes a table lookup. Elements outside the bound are still encrypted with exponentiation.
+
+    Args:
+        mpk (List[ElGamalKey]): master public key
+        message_bound (int): upper bound for vector elements encoded with a table lookup
+
+    Returns:
+        List[ElGamalKey]: master public key with the encoding table attached to every ElGamal public key
+    """
+    encoding = precompute_encoding_table(mpk[0]['g'], message_bound)
+    return [dict(pk, encoding=encoding) for pk in mpk]
+
+
 def get_functional_key(msk: List[ElGamalKey], y: List[int]) -> int:
     """Derives functional key for calculating inner product with vector y
 
@@ -73,19 +147,80 @@ def get_functional_key(msk: List[ElGamalKey], y: List[int]) -> int:
     """
     if len(y) > len(msk):
         raise WrongVectorForProvidedKey(f'Vector {y} too long for the configured FE')
-    y = reduce_vector_mod(y, elgamal_params['p'])
+    y = reduce_vector_mod(y, _vector_modulus(msk[0]['cipher']))
     key = 0
     for i in range(len(y)):
         key += get_int(msk[i]['x']) * y[i]
     return key
 
 
-def encrypt(mpk: List[ElGamalKey], x: List[int]) -> dict:
-    """Encrypts integer vector x
+def get_functional_keys(msk: List[ElGamalKey], ys: List[List[int]], cache: FunctionalKeyCache = None) -> List[int]:
+    """Derives functional keys for many vectors y at once with a single matrix-vector product. If a cache of keys of
+    msk is provided, keys of vectors found in it are not recomputed and the new keys are stored in it.
+
+    Args:
+        msk (List[ElGamalKey]): master secret key
+        ys (List[List[int]]): vectors for which the functional keys should be calculated
+        cache (FunctionalKeyCache): cache of functional keys derived from msk
+
+    Raises:
+        WrongVectorSizeError: if any vector y is longer than the supported vector length
+
+    Returns:
+        List[int]: functional keys corresponding to vectors ys
+    """
+    for y in ys:
+        if len(y) > len(msk):
+            raise WrongVectorForProvidedKey(f'Vector {y} too long for the configured FE')
+    modulus = _vector_modulus(msk[0]['cipher'])
+    # shorter vectors are padded with zeros, their keys depend only on the first coordinates of msk
+    ys = [reduce_vector_mod(y, modulus) + [0] * (len(msk) - len(y)) for y in ys]
+    secrets = [sk['x'] for sk in msk]
+    if cache is None:
+        return inner_products_group_vector(secrets, ys)
+    return cache.get_many(ys, lambda missing: inner_products_group_vector(secrets, missing))
+
+
+def precompute_randomness(mpk: List[ElGamalKey], length: int = None) -> dict:
+    """Computes the part of a ciphertext that does not depend on the encrypted vector, g ** r and the ElGamal shared
+    secrets h[i] ** r for a fresh random r. The result can be used by exactly one call of encrypt.
+
+    Args:
+        mpk (List[ElGamalKey]): master public key
+        length (int): length of the vectors the bundle is for, supported vector length if not provided
+
+    Returns:
+        dict: randomness bundle
+    """
+    length = len(mpk) if length is None else length
+    cipher = mpk[0]['cipher']
+    r = cipher.group.random()
+    ct_0 = mpk[0]['g'] ** r
+    # g is shared by all the ElGamal keys, so is the first part of their ciphertexts
+    return {'ct0': ct_0, 'ct': [{'c1': ct_0, 's': mpk[i]['h'] ** r} for i in range(length)]}
+
+
+def randomness_pool(mpk: List[ElGamalKey], size: int = POOL_SIZE) -> RandomnessPool:
+    """Returns a pool precomputing randomness bundles for encrypt in a background thread
+
+    Args:
+        mpk (List[ElGamalKey]): master public key
+        size (int): maximal number of precomputed bundles
+
+    Returns:
+        RandomnessPool: the started pool
+    """
+    return RandomnessPool(lambda: precompute_randomness(mpk), size)
+
+
+def encrypt(mpk: List[ElGamalKey], x: List[int], randomness: dict = None) -> dict:
+    """Encrypts integer vector x. If a randomness bundle from precompute_randomness (or a pool) is provided, only the
+    vector is encoded and combined with it.
 
     Args:
         mpk (List[ElGamalKey]): master public key
         x (List[int]): integer vector to be encrypted
+        randomness (dict): randomness bundle, it must not be used for another encryption
 
     Raises:
         WrongVectorSizeError: if the provided vector is longer than supported vector length
@@ -95,11 +230,14 @@ def encrypt(mpk: List[ElGamalKey], x: List[int]) -> dict:
     """
     if len(x) > len(mpk):
         raise WrongVectorForProvidedKey(f'Vector {x} too long for the configured FE')
-    r = elgamal_params['group'].random()
-    ct_0 = mpk[0]['g'] ** r
-    x = reduce_vector_mod(x, elgamal_params['p'])
-    ct = [elgamal.encrypt(mpk[i], x[i], r) for i in range(len(x))]
-    ciphertext = {'ct0': ct_0, 'ct': ct}
+    if randomness is None:
+        randomness = precompute_randomness(mpk, len(x))
+    elif len(x) > len(randomness['ct']):
+        raise WrongVectorForProvidedKey(f'Vector {x} too long for the provided randomness')
+    cipher = mpk[0]['cipher']
+    x = reduce_vector_mod(x, _vector_modulus(cipher))
+    ct = [cipher.encrypt(mpk[i], x[i], randomness=randomness['ct'][i]) for i in range(len(x))]
+    ciphertext = {'ct0': randomness['ct0'], 'ct': ct}
     return ciphertext
 
 
@@ -123,13 +261,14 @@ def decrypt(mpk: List[ElGamalKey],
     """
     ct_0 = ciphertext['ct0']
     ct = ciphertext['ct']
-    y = reduce_vector_mod(y, elgamal_params['p'])
+    cipher = mpk[0]['cipher']
+    y = reduce_vector_mod(y, _vector_modulus(cipher))
 
     c1 = ct_0
-    c2 = np.product([ct[i]['c2'] ** y[i] for i in range(len(ct))])
+    c2 = multi_power([ct[i]['c2'] for i in range(len(ct))], y[:len(ct)])
     sk = {'x': sk_y}  # constructing the secret key in a form acceptable by ElGamal
     pk = mpk[0]  # public key same for all i's
 
     # constructing ciphertext for additive ElGamal
     c = ElGamalCipher({'c1': c1, 'c2': c2})
-    return elgamal.decrypt(pk, sk, c, limit)
+    return cipher.decrypt(pk, sk, c, limit)
@@ -1,4 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+from src.helpers.elliptic_curve import P256
+from src.helpers.group_backend import NATIVE
+from src.helpers.group_registry import get_group
+from src.helpers.key_cache import FunctionalKeyCache
 import numpy as np
 import unittest
 
@@ -24,6 +30,92 @@ class TestElGamalInnerProduct(unittest.TestCase):
                 f'The calculated inner product different than expected: {obtained_inner_prod} != {expected_inner_prod}')
         print(f'The calculated inner product same as expected!: {obtained_inner_prod} == {expected_inner_prod}')
 
+    def test_fin_result_with_precomputation(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        pk, sk = fe.set_up(1024, 4)
+        pk = fe.precompute(pk, message_bound=16)
+
+        y = [1, 1, 1, 1]
+        x = [1, 2, 3, 40]
+        key_y = fe.get_functional_key(sk, y)
+        c_x = fe.encrypt(pk, x)
+        self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+
+    def test_fin_result_elliptic_curve(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        pk, sk = fe.set_up(256, 4, curve=P256)
+
+        y = [1, 1, 1, 1]
+        x = [1, 2, 3, 4]
+        key_y = fe.get_functional_key(sk, y)
+        c_x = fe.encrypt(pk, x)
+        self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+
+    def test_fin_result_native_backend(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        pk, sk = fe.set_up(1024, 4, backend=NATIVE)
+
+        y = [1, 1, 1, 1]
+        x = [1, 2, 3, 4]
+        key_y = fe.get_functional_key(sk, y)
+        c_x = fe.encrypt(pk, x)
+        self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+
+    def test_independent_ciphers_in_threads(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        ciphers = [fe.create_cipher(), fe.create_cipher(group=get_group(1536, NATIVE)), fe.create_cipher(curve=P256)]
+        keys = [fe.set_up(1024, 4, cipher=cipher) for cipher in ciphers]
+        self.assertNotEqual(keys[0][0][0]['g'], keys[1][0][0]['g'])
+
+        y = [1, 2, 3, 4]
+        x = [5, 6, 7, 8]
+
+        def inner_product(key_pair):
+            pk, sk = key_pair
+            return fe.decrypt(pk, fe.encrypt(pk, x), fe.get_functional_key(sk, y), y, 2000)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(inner_product, keys * 2))
+        self.assertEqual([np.inner(x, y)] * 6, results)
+
+    def test_fin_result_chunked_set_up(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        chunks = list(fe.set_up_chunks(1024, 4, processes=2, chunk_size=3))
+        self.assertEqual([3, 1], [len(chunk_mpk) for chunk_mpk, _ in chunks])
+        pk = [key for chunk_mpk, _ in chunks for key in chunk_mpk]
+        sk = [key for _, chunk_msk in chunks for key in chunk_msk]
+
+        y = [1, 1, 1, 1]
+        x = [1, 2, 3, 4]
+        key_y = fe.get_functional_key(sk, y)
+        c_x = fe.encrypt(pk, x)
+        self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+
+    def test_fin_result_precomputed_randomness(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        pk, sk = fe.set_up(1024, 4)
+
+        y = [1, 1, 1, 1]
+        x = [1, 2, 3, 4]
+        key_y = fe.get_functional_key(sk, y)
+        c_x = fe.encrypt(pk, x, fe.precompute_randomness(pk))
+        self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+
+    def test_fin_result_batch_functional_keys(self):
+        fe = src.inner_product.single_input_fe.elgamal_ip.elgamal_ip
+        pk, sk = fe.set_up(1024, 4)
+
+        ys = [[1, 1, 1, 1], [2, 0, 1, 5], [1, 1, 1, 1]]
+        x = [1, 2, 3, 4]
+        cache = FunctionalKeyCache()
+        keys = fe.get_functional_keys(sk, ys, cache)
+        self.assertEqual([fe.get_functional_key(sk, y) for y in ys], keys)
+        self.assertEqual(2, len(cache))
+        c_x = fe.encrypt(pk, x)
+        for key_y, y in zip(keys, ys):
+            self.assertEqual(np.inner(x, y), fe.decrypt(pk, c_x, key_y, y, 2000))
+        self.assertEqual([fe.get_functional_key(sk, [2, 0, 1])], fe.get_functional_keys(sk, [[2, 0, 1]]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,7 +9,7 @@ Agrawal et al. Fully secure functional encryption scheme from DDH
 | DOI:          10.1007/978-3-662-53015-3_12
 
 * type:         functional encryption
-* setting:
+* setting:      SchnorrGroup mod p or prime order elliptic curve group
 * assumption:   DDH
 
 :Authors:       Cecylia Borek
@@ -18,32 +18,89 @@ Agrawal et al. Fully secure functional encryption scheme from DDH
 Note: Because to recover the final result of inner product discrete logarithm calculation is needed, the inner product
 should lie within a reasonable limit, otherwise the calculation may take too long.
 """
-from src.helpers.helpers import generate_group, get_random_generator, inner_product_group_vector, dummy_discrete_log, \
-    get_int, get_modulus, reduce_vector_mod
+from src.helpers.helpers import get_random_generator, inner_product_group_vector, group_discrete_log, \
+    get_group_modulus, reduce_vector_mod, power, precompute_fixed_base_tables, multi_power, precompute_encoding_table, \
+    parallel_multi_power, inner_products_group_vector, multi_power_many, group_discrete_log_many, \
+    MULTI_POWER_CHUNK
+from src.helpers.elliptic_curve import EllipticCurve, ECGroup
+from src.helpers.group_backend import CHARM
+from src.helpers.group_registry import get_group
+from src.helpers.key_cache import FunctionalKeyCache
+from src.helpers.randomness_pool import RandomnessPool, POOL_SIZE
+from src.helpers.fixed_base import EncodingTable
 
-from typing import List
-import numpy as np
+from typing import Iterator, List, Tuple
 
+# default memory budget in bytes for fixed-base exponentiation tables
+PRECOMPUTATION_BUDGET = 256 * 1024 * 1024
 
-def set_up(security_param: int, vector_length: int) -> (dict, dict):
+
+def set_up(security_param: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM, group=None,
+           generators: tuple = None, processes: int = None) -> (dict, dict):
     """Sets up parameters needed for proper functioning of the scheme and generates master public and secret keys.
+    The integer group is taken from the group registry, a standard group of security_param bits if there is one.
+    If curve is provided, the scheme works in the group of points of the elliptic curve and security_param is ignored.
+    If group is provided, it is used as it is, so that many key pairs can share the same parameters.
+    Keys of long vectors are generated in chunks spread across a process pool, see set_up_chunks.
 
     Args:
         security_param: security parameter
         vector_length: supported length of integer vectors
+        curve: prime order elliptic curve, e.g. P256
+        backend: arithmetic backend of the integer group, CHARM or NATIVE
+        group: existing group, e.g. mpk['group'] of another key pair
+        generators: pair of generators (gen1, gen2) of the group to use instead of random ones
+        processes: number of worker processes, os.cpu_count() if not provided
 
     Returns:
         (dict, dict): master public key and master secret key
     """
-    group = generate_group(security_param)
-    gen1 = get_random_generator(group)
-    gen2 = get_random_generator(group)
-    p = get_modulus(gen1)
+    h, s, t = [], [], []
+    for chunk_mpk, chunk_msk in set_up_chunks(security_param, vector_length, curve, backend, group, generators,
+                                              processes):
+        h += chunk_mpk['h']
+        s += chunk_msk['s']
+        t += chunk_msk['t']
+    mpk, msk = dict(chunk_mpk, h=h), {'s': s, 't': t}
+    return mpk, msk
+
+
+def set_up_chunks(security_param: int, vector_length: int, curve: EllipticCurve = None, backend: str = CHARM,
+                  group=None, generators: tuple = None, processes: int = None, chunk_size: int = MULTI_POWER_CHUNK) \
+        -> Iterator[Tuple[dict, dict]]:
+    """Generates the same keys as set_up, but yields them in chunks of consecutive coordinates as soon as they are
+    produced, so that keys of long vectors can be written out without keeping all of them in memory.
+    Exponentiations of the chunks are spread across a process pool.
+
+    Args:
+        security_param: security parameter
+        vector_length: supported length of integer vectors
+        curve: prime order elliptic curve, e.g. P256
+        backend: arithmetic backend of the integer group, CHARM or NATIVE
+        group: existing group, e.g. mpk['group'] of another key pair
+        generators: pair of generators (gen1, gen2) of the group to use instead of random ones
+        processes: number of worker processes, os.cpu_count() if not provided
+        chunk_size: number of coordinates in a chunk
+
+    Returns:
+        Iterator[Tuple[dict, dict]]: master public key with h only for the coordinates of the chunk and master secret
+        key with s and t only for them
+    """
+    if group is None:
+        group = ECGroup(curve) if curve is not None else get_group(security_param, backend)
+    if generators is not None:
+        gen1, gen2 = generators
+    else:
+        gen1 = get_random_generator(group)
+        gen2 = get_random_generator(group)
+    p = get_group_modulus(gen1)
     s = [group.random() for _ in range(vector_length)]
     t = [group.random() for _ in range(vector_length)]
-    h = [(gen1 ** s[i]) * (gen2 ** t[i]) for i in range(vector_length)]
-    mpk, msk = {'group': group, 'gen1': gen1, 'gen2': gen2, 'p': p, 'h': h}, {'s': s, 't': t}
-    return mpk, msk
+    start = 0
+    for h in parallel_multi_power([gen1, gen2], list(zip(s, t)), processes, chunk_size):
+        end = start + len(h)
+        yield {'group': group, 'gen1': gen1, 'gen2': gen2, 'p': p, 'h': h}, {'s': s[start:end], 't': t[start:end]}
+        start = end
 
 
 def get_functional_key(mpk: dict, msk: dict, y: List[int]) -> dict:
@@ -62,22 +119,104 @@ def get_functional_key(mpk: dict, msk: dict, y: List[int]) -> dict:
     return func_key
 
 
-def encrypt(mpk: dict, x: List[int]) -> dict:
-    """Encrypts integer vector x
+def _functional_keys(msk: dict, ys: List[List[int]]) -> List[dict]:
+    s_ys = inner_products_group_vector(msk['s'], ys)
+    t_ys = inner_products_group_vector(msk['t'], ys)
+    return [{'s_y': s_y, 't_y': t_y} for s_y, t_y in zip(s_ys, t_ys)]
+
+
+def get_functional_keys(mpk: dict, msk: dict, ys: List[List[int]], cache: FunctionalKeyCache = None) -> List[dict]:
+    """Derives functional keys for many vectors y at once with matrix-vector products. If a cache of keys of msk is
+    provided, keys of vectors found in it are not recomputed and the new keys are stored in it.
+
+    Args:
+        mpk: master public key
+        msk: master secret key
+        ys: integer vectors for which the functional keys will be generated
+        cache: cache of functional keys derived from msk
+
+    Returns:
+        List[dict]: functional keys corresponding to vectors ys
+    """
+    ys = [reduce_vector_mod(y, mpk['p']) for y in ys]
+    if cache is None:
+        return _functional_keys(msk, ys)
+    return cache.get_many(ys, lambda missing: _functional_keys(msk, missing))
+
+
+def precompute(mpk: dict, memory_budget: int = PRECOMPUTATION_BUDGET, message_bound: int = 0) -> dict:
+    """Precomputes fixed-base exponentiation tables for gen1, gen2 and all elements of h, which are then used by encrypt
+    instead of full exponentiations. If message_bound is positive, gen1 ** x[i] is additionally precomputed for all
+    0 <= x[i] < message_bound, so encoding of small vector elements becomes a table lookup.
+
+    Args:
+        mpk: master public key
+        memory_budget: memory in bytes available for the tables
+        message_bound: upper bound for vector elements encoded with a table lookup
+
+    Returns:
+        dict: master public key extended with the tables
+    """
+    fixed_base_budget = memory_budget - EncodingTable.memory(mpk['p'], message_bound)
+    bases = [mpk['gen1'], mpk['gen2']] + mpk['h']
+    tables = precompute_fixed_base_tables(bases, mpk['p'].bit_length(), fixed_base_budget)
+    precomputed = {'gen1': tables[0], 'gen2': tables[1], 'h': tables[2:]}
+    if message_bound > 0:
+        precomputed['messages'] = precompute_encoding_table(mpk['gen1'], message_bound, tables[0])
+    return dict(mpk, tables=precomputed)
+
+
+def precompute_randomness(mpk: dict, length: int = None) -> dict:
+    """Computes the part of a ciphertext that does not depend on the encrypted vector, gen1 ** r, gen2 ** r and
+    h[i] ** r for a fresh random r. The result can be used by exactly one call of encrypt.
+
+    Args:
+        mpk: master public key
+        length: length of the vectors the bundle is for, supported vector length if not provided
+
+    Returns:
+        dict: randomness bundle
+    """
+    length = len(mpk['h']) if length is None else length
+    tables = mpk.get('tables', {})
+    h_tables = tables.get('h', [None] * len(mpk['h']))
+    r = mpk['group'].random()
+    return {'c': power(mpk['gen1'], r, tables.get('gen1')), 'd': power(mpk['gen2'], r, tables.get('gen2')),
+            'h': [power(mpk['h'][i], r, h_tables[i]) for i in range(length)]}
+
+
+def randomness_pool(mpk: dict, size: int = POOL_SIZE) -> RandomnessPool:
+    """Returns a pool precomputing randomness bundles for encrypt in a background thread
+
+    Args:
+        mpk: master public key
+        size: maximal number of precomputed bundles
+
+    Returns:
+        RandomnessPool: the started pool
+    """
+    return RandomnessPool(lambda: precompute_randomness(mpk), size)
+
+
+def encrypt(mpk: dict, x: List[int], randomness: dict = None) -> dict:
+    """Encrypts integer vector x. If a randomness bundle from precompute_randomness (or a pool) is provided, only the
+    vector is encoded and combined with it.
 
     Args:
         mpk: master public key
         x: integer vector to be encrypted
+        randomness: randomness bundle, it must not be used for another encryption
 
     Returns:
         dict: ciphertext corresponding to vector x
     """
-    ciphertext = {}
+    if randomness is None:
+        randomness = precompute_randomness(mpk, len(x))
+    tables = mpk.get('tables', {})
+    message_table = tables.get('messages', tables.get('gen1'))
     x = reduce_vector_mod(x, mpk['p'])
-    r = mpk['group'].random()
-    ciphertext['c'] = mpk['gen1'] ** r
-    ciphertext['d'] = mpk['gen2'] ** r
-    ciphertext['e'] = [(mpk['gen1'] ** x[i]) * (mpk['h'][i] ** r) for i in range(len(x))]
+    ciphertext = {'c': randomness['c'], 'd': randomness['d']}
+    ciphertext['e'] = [power(mpk['gen1'], x[i], message_table) * randomness['h'][i] for i in range(len(x))]
     return ciphertext
 
 
@@ -96,8 +235,28 @@ def decrypt(mpk: dict, func_key: dict, ciphertext: dict, y: List[int], limit: in
 
     """
     e = ciphertext['e']
-    intermediate = np.prod([e[i] ** y[i] for i in range(len(y))]) / (
-            ciphertext['c'] ** func_key['s_y'] * ciphertext['d'] ** func_key['t_y']
+    intermediate = multi_power(e[:len(y)], y) / multi_power(
+        [ciphertext['c'], ciphertext['d']], [func_key['s_y'], func_key['t_y']]
     )
-    return dummy_discrete_log(get_int(mpk['gen1']), get_int(intermediate), get_modulus(mpk['gen1']), limit)
+    return group_discrete_log(mpk['gen1'], intermediate, limit)
+
+
+def decrypt_many(mpk: dict, func_key: dict, y: List[int], ciphertexts: List[dict], limit: int) -> List[int]:
+    """Recovers the inner products of vector y and the vectors encrypted in ciphertexts, all decrypted with the same
+    functional key. The exponents y, -s_y and -t_y are recoded once for the whole batch and all the logarithms are
+    calculated together.
 
+    Args:
+        mpk: master public key
+        func_key: functional key for vector y
+        y: vector y
+        ciphertexts: ciphertexts encrypting vectors x
+        limit: An upper limit up to which the inner products should be searched for
+
+    Returns:
+        List[int]: the inner products of x and y for every ciphertext, None for the ones not found within the limit
+    """
+    exponents = list(y) + [-func_key['s_y'], -func_key['t_y']]
+    intermediates = multi_power_many([ciphertext['e'][:len(y)] + [ciphertext['c'], ciphertext['d']]
+                                      for ciphertext in ciphertexts], exponents)
+    return group_discrete_log_many(mpk['gen1'], intermediates, limit)
@@ -15,54 +15,182 @@ Agrawal et al. Fully secure functional encryption scheme for inner product of sh
 
 :Authors:       Cecylia Borek
 :Date:          04/2022
+
+Parameters are chosen by generate_parameters: the smallest prime q (and m = ceil(2 n log2 q)) for which the decryption
+noise <y, e1> - <z_y, e0> stays below floor(q / K) / 2 except with the requested failure probability. For the usual
+sizes of vectors q is far below 2^62, so that values and residues fit in machine words.
+
+Ciphertexts can be compressed by switching them to a smaller modulus q' with compress, c' = round(c * q' / q) mod q'.
+The rounding adds noise of its own, so q has to leave room for it: with generate_parameters(..., compression=True)
+the noise bound is raised by a factor sqrt(2) (half a bit of q), which lets compression_modulus pick q' about
+q / (sqrt(12) * sigma_error), i.e. log2(sqrt(12) * 2 sqrt(n)) bits less for every entry of c0 and c1. decrypt accepts
+compressed and uncompressed ciphertexts alike.
 """
 import math
-import random
-from typing import List, Dict
+import os
+from typing import List, Dict, Union
 
 import numpy as np
-from charm.core.math.integer import randomPrime
 
-from src.helpers.helpers import sample_random_matrix_mod, sample_random_matrix_from_normal_dist, \
-    inner_product_modulo, reduce_vector_mod
+from src.helpers.helpers import sample_random_matrix_mod, sample_gaussian_matrix, inner_product_modulo, \
+    expand_matrix_mod
 from src.helpers.matrix import Matrix
+from src.helpers.number_theory import next_prime
+from src.helpers.randomness_pool import RandomnessPool, POOL_SIZE
+from src.helpers.rns import RNSBasis, RNSMatrix
 
-Ciphertext = Dict[str, Matrix]
+Ciphertext = Dict[str, Union[Matrix, int]]
 
 debug = True
 
 
-def set_up(n: int, vectors_len: int, message_bound: int, vector_bound: int) -> (dict, Matrix):
+# default probability that decryption of a single inner product fails
+FAILURE_PROBABILITY = 2 ** -40
+# statistical distance of U = Z·A from uniform allowed by the choice of the width of Z
+SMOOTHING_EPSILON = 2 ** -64
+# number of rows of a seed-expanded matrix A generated at once
+SEED_BLOCK_ROWS = 1024
+SEED_BYTES = 32
+
+
+def _gaussian_tail_factor(probability: float) -> float:
+    """Returns t such that P(|X| >= t * sigma) = probability for normally distributed X with standard deviation sigma"""
+    low, high = 0.0, 64.0
+    for _ in range(200):
+        middle = (low + high) / 2
+        if math.erfc(middle / math.sqrt(2)) > probability:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def _noise_deviation(n: int, m: int, vectors_len: int, vector_bound: int) -> (float, float, float):
+    """Returns standard deviations of the errors, of the entries of Z and of the decryption noise"""
+    # alpha * q > 2 sqrt(n) as required by the reduction from worst-case lattice problems
+    error_deviation = 2 * math.sqrt(n)
+    # smoothing parameter of the lattice of vectors z with z·A = 0 mod q, q^(n/m) <= sqrt(2) for m >= 2 n log2 q
+    key_deviation = math.sqrt(2) * math.sqrt(math.log(2 * m * (1 + 1 / SMOOTHING_EPSILON)) / math.pi) / \
+        math.sqrt(2 * math.pi)
+    # <y, e1> - <y^T Z, e0> for ||y||^2 <= vectors_len * vector_bound^2
+    y_norm = math.sqrt(vectors_len) * vector_bound
+    noise_deviation = y_norm * error_deviation * math.sqrt(1 + m * key_deviation ** 2)
+    return error_deviation, key_deviation, noise_deviation
+
+
+def _rounding_deviation(m: int, vectors_len: int, vector_bound: int, key_deviation: float) -> float:
+    """Returns standard deviation of <y, r1> - <z_y, r0> for the rounding errors r0, r1 of compress, which are uniform
+    in [-1/2, 1/2]"""
+    y_norm = math.sqrt(vectors_len) * vector_bound
+    return y_norm * math.sqrt((1 + m * key_deviation ** 2) / 12)
+
+
+def generate_parameters(n: int, vectors_len: int, message_bound: int, vector_bound: int,
+                        failure_probability: float = FAILURE_PROBABILITY, min_modulus_bits: int = 2,
+                        compression: bool = False) -> dict:
+    """Chooses the smallest modulus q, number of samples m and Gaussian widths for which decryption of inner products
+    of the given vectors fails at most with failure_probability
+
+    Args:
+        n: dimension of the LWE secret, the security parameter
+        vectors_len: length of the vectors to encrypt and get functional key for
+        message_bound: upper bound for integer components of vectors to encrypt
+        vector_bound: upper bound for integer components of vectors to get functional key for
+        failure_probability: acceptable probability that decryption of a single inner product fails
+        min_modulus_bits: lower bound for the bit-size of q, e.g. to follow the 1024-bit modulus of earlier versions
+        compression: whether q should leave room for the rounding noise of compressed ciphertexts, see compress
+
+    Returns:
+        parameters q, m, alpha, standard deviations of the errors (sigma_error), of Z (sigma_key), of the decryption
+        noise (sigma_noise) and of the rounding noise of compression (sigma_rounding), the expected failure
+        probability of decryption and the requested one (target_failure_probability)
+    """
+    ip_bound = vectors_len * message_bound * vector_bound  # K in the paper
+    tail = _gaussian_tail_factor(failure_probability)
+    if compression:
+        tail *= math.sqrt(2)
+    bits = max(min_modulus_bits, 2)
+    while True:
+        m = math.ceil(2 * n * bits)
+        _, _, noise_deviation = _noise_deviation(n, m, vectors_len, vector_bound)
+        # floor(q / K) / 2 has to exceed tail * noise_deviation
+        q = next_prime(max(ip_bound * (2 * math.ceil(tail * noise_deviation) + 1), 1 << (bits - 1)))
+        if q.bit_length() <= bits:
+            break
+        bits += 1
+    m = math.ceil(2 * n * math.log2(q))
+    error_deviation, key_deviation, noise_deviation = _noise_deviation(n, m, vectors_len, vector_bound)
+    failure = math.erfc((q // ip_bound) / (2 * math.sqrt(2) * noise_deviation))
+    return {'n': n, 'm': m, 'q': q, 'K': ip_bound, 'alpha': error_deviation / q, 'sigma_error': error_deviation,
+            'sigma_key': key_deviation, 'sigma_noise': noise_deviation,
+            'sigma_rounding': _rounding_deviation(m, vectors_len, vector_bound, key_deviation),
+            'failure_probability': failure, 'target_failure_probability': failure_probability}
+
+
+def set_up(n: int, vectors_len: int, message_bound: int, vector_bound: int, params: dict = None,
+           seeded: bool = False) -> (dict, Matrix):
     """Sets ups parameters needed for proper functioning of the scheme and returns master public and secret keys.
+    If seeded is True, the master public key contains only a short seed from which A is derived with an extendable
+    output function instead of A itself, and A is regenerated in blocks of rows whenever it is needed.
 
     Args:
-        n:
+        n: dimension of the LWE secret, the security parameter
         vectors_len: length of the vectors to encrypt and get functional key for
         message_bound: upper bound for integer components of vectors to encrypt
         vector_bound: upper bound for integer components of vectors to get functional key for
+        params: parameters from generate_parameters, generated with the default failure probability if not provided
+        seeded: whether A should be derived from a seed
 
     Returns:
         tuple of master public key and master secret key
 
     """
-    ip_bound = vectors_len * message_bound * vector_bound  # K in the paper
-    if debug: print("ip bound: ", ip_bound)
-    q = int(randomPrime(1024, 1))
-    if debug: print("q: ", q)
-    m_constraints = n * math.log(q, 2)
-    m = np.random.randint(2 * m_constraints, 4 * m_constraints)
-    if debug: print("m: ", m)
-    alpha = random.random()
-    A = sample_random_matrix_mod((m, n), q)
-    if debug: print("A dims: ", A.size())
-    Z = sample_random_matrix_mod((vectors_len, m), q)
+    if params is None:
+        params = generate_parameters(n, vectors_len, message_bound, vector_bound)
+    if debug: print("parameters: ", params)
+    q = params['q']
+    m = params['m']
+    mpk = {'K': params['K'], 'P': message_bound, 'V': vector_bound, 'alpha': params['alpha'], 'q': q, 'm': m, 'n': n,
+           'params': params}
+    if seeded:
+        mpk['A_seed'] = os.urandom(SEED_BYTES)
+    else:
+        mpk['A'] = sample_random_matrix_mod((m, n), q)
+    Z = sample_gaussian_matrix((vectors_len, m), params['sigma_key'])
     if debug: print("Z dims: ", Z.size())
-    U = Z.multiply_modulo(A, q)
-    mpk = {'A': A, 'U': U, 'K': ip_bound, 'P': message_bound, 'V': vector_bound, 'alpha': alpha, 'q': q}
+    U = Matrix((vectors_len, n))
+    for start, A_block in _public_matrix_blocks(mpk):
+        U += Z[:, start:start + A_block.rows].multiply_modulo(A_block, q)
+        U %= q
+    mpk['U'] = U
     msk = Z
     return mpk, msk
 
 
+def _public_matrix_blocks(mpk: dict):
+    """Yields (index of the first row, block of rows) of A, regenerated from the seed block by block if A is seeded"""
+    if 'A_seed' not in mpk:
+        yield 0, mpk['A']
+        return
+    m, n = mpk['m'], mpk['n']
+    for start in range(0, m, SEED_BLOCK_ROWS):
+        yield start, expand_matrix_mod(mpk['A_seed'], range(start, min(start + SEED_BLOCK_ROWS, m)), n, mpk['q'])
+
+
+def public_matrix(mpk: dict) -> Matrix:
+    """Returns the public matrix A, derived from the seed in full if A is seeded
+
+    Args:
+        mpk: master public key
+
+    Returns:
+        the matrix A
+    """
+    if 'A_seed' not in mpk:
+        return mpk['A']
+    return expand_matrix_mod(mpk['A_seed'], range(mpk['m']), mpk['n'], mpk['q'])
+
+
 def get_functional_key(mpk: dict, msk: Matrix, y: List[int]) -> Matrix:
     """Derives functional key for calculating inner product with vector y
 
@@ -74,39 +202,196 @@ def get_functional_key(mpk: dict, msk: Matrix, y: List[int]) -> Matrix:
     Returns:
         the functional key corresponding to vector y
     """
-    y = reduce_vector_mod(y, mpk['q'])
-    return Matrix.from_list(y) @ msk
+    # y is not reduced modulo q, the decryption noise grows with the norm of y
+    return Matrix.from_list(list(y)) @ msk
 
 
-def encrypt(mpk: dict, x: List[int]) -> Ciphertext:
-    """Encrypts integer vector x
+def precompute(mpk: dict) -> dict:
+    """Converts A and U to a residue number system, so that the products A·s and U·s in encrypt do not have to
+    convert them for every ciphertext. The residues take several times the memory of A.
 
     Args:
         mpk: master public key
-        x: vector of integers to encrypt
 
     Returns:
-        the ciphertext encrypting vector x
+        master public key extended with the residues of A and U
+    """
+    basis = RNSBasis.for_bound(mpk['n'] * (mpk['q'] - 1) ** 2)
+    residues = {'basis': basis, 'A': RNSMatrix.from_matrix(public_matrix(mpk), basis),
+                'U': RNSMatrix.from_matrix(mpk['U'], basis)}
+    return dict(mpk, rns=residues)
+
+
+def _multiply_by_secret(mpk: dict, name: str, s: Matrix) -> Matrix:
+    """Returns mpk[name]·s mod q, with the precomputed residues of mpk[name] if there are any. The product with
+    a seeded A is calculated block by block, so only a block of rows of A is kept in memory at once."""
+    if 'rns' not in mpk:
+        if name == 'A':
+            product = Matrix((mpk['m'], s.cols))
+            for start, A_block in _public_matrix_blocks(mpk):
+                product[start:start + A_block.rows, :] = A_block.multiply_modulo(s, mpk['q'])
+            return product
+        return mpk[name].multiply_modulo(s, mpk['q'])
+    residues = mpk['rns']
+    return (residues[name] @ RNSMatrix.from_matrix(s, residues['basis'])).to_matrix(mpk['q'])
+
+
+def precompute_randomness(mpk: dict) -> Ciphertext:
+    """Computes the part of a ciphertext that does not depend on the encrypted vector, A·s + e0 and U·s + e1 for fresh
+    random s, e0 and e1. The result can be used by exactly one call of encrypt.
+
+    Args:
+        mpk: master public key
 
+    Returns:
+        randomness bundle
     """
-    A = mpk['A']
     U = mpk['U']
-    K = mpk['K']
     q = mpk['q']
     alpha = mpk['alpha']
-    m, n = A.size()
+    m, n = mpk['m'], mpk['n']
     l = U.size()[0]
     s = sample_random_matrix_mod((1, n), q)
-    x = Matrix.from_list(x)
-    err0 = sample_random_matrix_from_normal_dist((1, m), alpha * q)
-    err1 = sample_random_matrix_from_normal_dist((1, l), alpha * q)
+    err0 = sample_gaussian_matrix((1, m), alpha * q)
+    err1 = sample_gaussian_matrix((1, l), alpha * q)
     if debug: print("U dims: ", U.size())
-    c0 = ((A.multiply_modulo(s.transpose(), q) + err0.transpose()) % q).transpose()
-    c1 = ((U.multiply_modulo(s.transpose(), q) + err1.transpose() + math.floor(
-        q / K) * x.transpose()) % q).transpose()
+    c0 = ((_multiply_by_secret(mpk, 'A', s.transpose()) + err0.transpose()) % q).transpose()
+    c1_mask = _multiply_by_secret(mpk, 'U', s.transpose()) + err1.transpose()
+    return {'c0': c0, 'c1_mask': c1_mask}
+
+
+def randomness_pool(mpk: dict, size: int = POOL_SIZE) -> RandomnessPool:
+    """Returns a pool precomputing randomness bundles for encrypt in a background thread
+
+    Args:
+        mpk: master public key
+        size: maximal number of precomputed bundles
+
+    Returns:
+        the started pool
+    """
+    return RandomnessPool(lambda: precompute_randomness(mpk), size)
+
+
+def encrypt(mpk: dict, x: List[int], randomness: Ciphertext = None) -> Ciphertext:
+    """Encrypts integer vector x. If a randomness bundle from precompute_randomness (or a pool) is provided, only the
+    scaled vector is added to it.
+
+    Args:
+        mpk: master public key
+        x: vector of integers to encrypt
+        randomness: randomness bundle, it must not be used for another encryption
+
+    Returns:
+        the ciphertext encrypting vector x
+
+    """
+    K = mpk['K']
+    q = mpk['q']
+    if randomness is None:
+        randomness = precompute_randomness(mpk)
+    x = Matrix.from_list(x)
+    c1 = ((randomness['c1_mask'] + q // K * x.transpose()) % q).transpose()
+    return {'c0': randomness['c0'], 'c1': c1}
+
+
+def encrypt_many(mpk: dict, xs: List[List[int]]) -> Ciphertext:
+    """Encrypts a batch of integer vectors at once. Secrets and errors of all the vectors are sampled together as
+    matrices S, E0 and E1, so A·S^T and U·S^T are computed as two matrix products.
+
+    Args:
+        mpk: master public key
+        xs: vectors of integers to encrypt, one per row
+
+    Returns:
+        batched ciphertext, c0 and c1 have one row per encrypted vector, see split_ciphertexts
+    """
+    q = mpk['q']
+    sigma = mpk['alpha'] * q
+    m, n = mpk['m'], mpk['n']
+    l = mpk['U'].size()[0]
+    batch = len(xs)
+    if batch == 0:
+        return {'c0': Matrix((0, m)), 'c1': Matrix((0, l))}
+    s = sample_random_matrix_mod((batch, n), q)
+    err0 = sample_gaussian_matrix((m, batch), sigma)
+    err1 = sample_gaussian_matrix((l, batch), sigma)
+    c0 = ((_multiply_by_secret(mpk, 'A', s.transpose()) + err0) % q).transpose()
+    messages = q // mpk['K'] * Matrix.from_list([list(x) for x in xs]).transpose()
+    c1 = ((_multiply_by_secret(mpk, 'U', s.transpose()) + err1 + messages) % q).transpose()
     return {'c0': c0, 'c1': c1}
 
 
+def split_ciphertexts(ciphertexts: Ciphertext) -> List[Ciphertext]:
+    """Splits a batched ciphertext from encrypt_many (or its compression) into ciphertexts of the individual vectors"""
+    modulus = {'q': ciphertexts['q']} if 'q' in ciphertexts else {}
+    return [dict({'c0': Matrix.from_list(c0), 'c1': Matrix.from_list(c1)}, **modulus)
+            for c0, c1 in zip(ciphertexts['c0'].to_list(), ciphertexts['c1'].to_list())]
+
+
+def compression_modulus(mpk: dict, failure_probability: float = None) -> int:
+    """Returns the smallest modulus q' for which decryption of ciphertexts compressed to q' fails at most with
+    failure_probability. The noise r * noise + rounding noise of a ciphertext switched to q' = r * q has to stay below
+    r * floor(q / K) / 2, which needs room left in q by generate_parameters(..., compression=True).
+
+    Args:
+        mpk: master public key
+        failure_probability: acceptable probability that decryption of a single inner product fails, the one
+            requested from generate_parameters if not provided
+
+    Returns:
+        the modulus q', q itself if ciphertexts cannot be compressed
+    """
+    params = mpk['params']
+    if failure_probability is None:
+        failure_probability = params['target_failure_probability']
+    q = mpk['q']
+    tail = _gaussian_tail_factor(failure_probability)
+    room = (q // mpk['K'] / 2) ** 2 - (tail * params['sigma_noise']) ** 2
+    if room <= 0:
+        return q
+    return min(math.ceil(q * tail * params['sigma_rounding'] / math.sqrt(room)), q)
+
+
+def compress(mpk: dict, ciphertext: Ciphertext, modulus: int = None) -> Ciphertext:
+    """Switches a ciphertext, or a batched ciphertext from encrypt_many, to a smaller modulus q', every entry c of c0
+    and c1 is replaced by round(c * q' / q) mod q'. The compressed ciphertext records q' under 'q'.
+
+    Args:
+        mpk: master public key
+        ciphertext: ciphertext to compress
+        modulus: the modulus q', compression_modulus(mpk) if not provided
+
+    Returns:
+        the compressed ciphertext
+    """
+    source = ciphertext.get('q', mpk['q'])
+    if modulus is None:
+        modulus = compression_modulus(mpk)
+    if not 1 < modulus <= source:
+        raise ValueError(f"Ciphertexts modulo {source} can be switched to moduli 1 < q' <= {source}, {modulus} was "
+                         f"provided")
+    if debug: print("compressed modulus: ", modulus)
+    return {'c0': _switch_modulus(ciphertext['c0'], source, modulus),
+            'c1': _switch_modulus(ciphertext['c1'], source, modulus), 'q': modulus}
+
+
+def _switch_modulus(values: Matrix, source: int, target: int) -> Matrix:
+    """Returns round(values * target / source) mod target"""
+    return (values * (2 * target) + source) // (2 * source) % target
+
+
+def _decode(mpk: dict, ip_approx: int, modulus: int) -> int:
+    """Rounds ip_approx = r * floor(q / K) * <x, y> + noise mod q' for r = q' / q, i.e. q' = q for uncompressed
+    ciphertexts, to the nearest multiple of r * floor(q / K), so that the decoding takes constant time instead of
+    searching all 2K - 1 candidates"""
+    q = mpk['q']
+    # r * floor(q / K) = step / q
+    step = modulus * (q // mpk['K'])
+    # a negative noise of <x, y> = 0 wraps around to values close to q', which are rounded to K
+    return (2 * ip_approx * q + step) // (2 * step) % mpk['K']
+
+
 def decrypt(mpk: dict, func_key: Matrix, y: List[int], ciphertext: Ciphertext) -> int:
     """Recovers the inner product of vectors x and y from x's ciphertext and y's functional key
 
@@ -114,19 +399,43 @@ def decrypt(mpk: dict, func_key: Matrix, y: List[int], ciphertext: Ciphertext) -
         mpk: the master public key
         func_key: the functional key for vector y
         y: vector for which the func key was calculated
-        ciphertext: ciphertext encrypting vector x
+        ciphertext: ciphertext encrypting vector x, compressed or not
 
     Returns:
-        the inner product of vectors x and y
+        the inner product of vectors x and y, 0 <= <x, y> < K
     """
-    ip_bound = mpk['K']
-    q = mpk['q']
+    q = ciphertext.get('q', mpk['q'])
     c0 = ciphertext['c0'].to_list()[0]
     c1 = ciphertext['c1'].to_list()[0]
     ip_approx = (inner_product_modulo(y, c1, q) - inner_product_modulo(func_key.to_list()[0], c0, q)) \
                 % q
-    ip_possible_values = [k for k in range(-1 * ip_bound + 1, ip_bound, 1)]
-    f = ([abs((q / ip_bound) * k - ip_approx) for k in ip_possible_values])
-    min_index = min(range(len(f)), key=f.__getitem__)
-    ip = ip_possible_values[min_index]
-    return ip
+    return _decode(mpk, ip_approx, q)
+
+
+def decrypt_batch(mpk: dict, func_keys: List[Matrix], ys: List[List[int]], ciphertexts: List[Ciphertext]) -> \
+        List[int]:
+    """Recovers the inner products of many pairs of vectors: x_i encrypted in ciphertexts[i] and ys[i] with functional
+    key func_keys[i]. The keys and the ciphertexts are stacked into two matrices, rows [y_i, -z_y_i] and [c1_i, c0_i],
+    and all <y_i, c1_i> - <z_y_i, c0_i> come from their single row-wise product.
+
+    Args:
+        mpk: the master public key
+        func_keys: the functional keys for vectors ys
+        ys: vectors for which the func keys were calculated
+        ciphertexts: ciphertexts encrypting vectors x_i, compressed or not
+
+    Returns:
+        the inner products of vectors x_i and ys[i]
+    """
+    if not (len(func_keys) == len(ys) == len(ciphertexts)):
+        raise ValueError(f'Different numbers of keys, vectors and ciphertexts: {len(func_keys)}, {len(ys)}, '
+                         f'{len(ciphertexts)}')
+    if not ciphertexts:
+        return []
+    keys = np.array([list(y) + [-z for z in func_key.to_list()[0]] for func_key, y in zip(func_keys, ys)],
+                    dtype=object)
+    stacked = np.array([ciphertext['c1'].to_list()[0] + ciphertext['c0'].to_list()[0] for ciphertext in ciphertexts],
+                       dtype=object)
+    moduli = np.array([ciphertext.get('q', mpk['q']) for ciphertext in ciphertexts], dtype=object)
+    ip_approx = (keys * stacked).sum(axis=1) % moduli
+    return [_decode(mpk, int(value), int(modulus)) for value, modulus in zip(ip_approx, moduli)]
@@ -1,6 +1,9 @@
 import numpy as np
 
 import src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+from src.helpers.elliptic_curve import P256
+from src.helpers.group_backend import CHARM, NATIVE
+from src.helpers.key_cache import FunctionalKeyCache
 
 
 def test_fin_result():
@@ -27,5 +30,108 @@ def test_fin_result():
     print(f'The calculated inner product same as expected!: {final_result} == {expected}')
 
 
+def test_fin_result_with_precomputation():
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    mpk, msk = fe.set_up(1024, len(x))
+    mpk = fe.precompute(mpk, memory_budget=32 * 1024 * 1024)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, func_key, ciphertext, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_elliptic_curve():
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    mpk, msk = fe.set_up(256, len(x), curve=P256)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, func_key, ciphertext, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_native_backend():
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    mpk, msk = fe.set_up(512, len(x), backend=NATIVE)
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, func_key, ciphertext, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_chunked_set_up():
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    chunks = list(fe.set_up_chunks(1024, len(x), processes=2, chunk_size=2))
+    mpk = dict(chunks[0][0], h=[h for chunk_mpk, _ in chunks for h in chunk_mpk['h']])
+    msk = {key: [value for _, chunk_msk in chunks for value in chunk_msk[key]] for key in ['s', 't']}
+    ciphertext = fe.encrypt(mpk, x)
+    func_key = fe.get_functional_key(mpk, msk, y)
+
+    final_result = fe.decrypt(mpk, func_key, ciphertext, y, 200)
+    assert final_result == np.inner(x, y)
+
+
+def test_fin_result_randomness_pool():
+    x = [1, 4, 6, 3, 5]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    mpk, msk = fe.set_up(1024, len(x))
+    func_key = fe.get_functional_key(mpk, msk, y)
+    with fe.randomness_pool(mpk, size=2) as pool:
+        ciphertexts = [fe.encrypt(mpk, x, pool.take()) for _ in range(3)]
+    assert len({str(ciphertext['c']) for ciphertext in ciphertexts}) == 3
+    for ciphertext in ciphertexts:
+        assert fe.decrypt(mpk, func_key, ciphertext, y, 200) == np.inner(x, y)
+
+
+def test_fin_result_batch_functional_keys():
+    x = [1, 4, 6, 3, 5]
+    ys = [[1, 2, 1, 9, 1], [3, 0, 1, 0, 2]]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    mpk, msk = fe.set_up(1024, len(x))
+    cache = FunctionalKeyCache()
+    func_keys = fe.get_functional_keys(mpk, msk, ys, cache)
+    assert func_keys == [fe.get_functional_key(mpk, msk, y) for y in ys]
+    assert fe.get_functional_keys(mpk, msk, ys[:1], cache)[0] is func_keys[0]
+    ciphertext = fe.encrypt(mpk, x)
+    for func_key, y in zip(func_keys, ys):
+        assert fe.decrypt(mpk, func_key, ciphertext, y, 200) == np.inner(x, y)
+
+
+def test_fin_result_decrypt_many():
+    xs = [[1, 4, 6, 3, 5], [2, 2, 2, 2, 2]]
+    y = [1, 2, 1, 9, 1]
+
+    fe = src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_ddh
+
+    for backend in [CHARM, NATIVE]:
+        mpk, msk = fe.set_up(1024, len(y), backend=backend)
+        func_key = fe.get_functional_key(mpk, msk, y)
+        ciphertexts = [fe.encrypt(mpk, x) for x in xs]
+        assert fe.decrypt_many(mpk, func_key, y, ciphertexts, 200) == [np.inner(x, y) for x in xs]
+
+
 if __name__ == "__main__":
     test_fin_result()
@@ -1,5 +1,7 @@
+import math
 import unittest
 import src.inner_product.single_input_fe.fully_secure_fe.fully_secure_fe_lwe_short_int
+from src.helpers.helpers import expand_matrix_mod
 from src.helpers.matrix import Matrix
 
 
@@ -13,6 +15,14 @@ class TestFullySecureFeLWEShortInt(unittest.TestCase):
         self.assertIsInstance(mpk, dict)
         self.assertIsInstance(msk, Matrix)
 
+    def test_generate_parameters(self):
+        params = self.fe.generate_parameters(11, 10, 40, 40)
+        self.assertLess(params['q'], 2 ** 62)
+        self.assertLessEqual(params['failure_probability'], self.fe.FAILURE_PROBABILITY)
+        self.assertGreaterEqual(params['q'] // params['K'], 2 * params['sigma_noise'])
+        self.assertEqual(params['m'], math.ceil(2 * 11 * math.log2(params['q'])))
+        self.assertEqual(64, self.fe.generate_parameters(11, 10, 40, 40, min_modulus_bits=64)['q'].bit_length())
+
     def test_func_key_generation(self):
         mpk, msk = self.fe.set_up(11, 10, 40, 40)
         func_key = self.fe.get_functional_key(mpk, msk, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
@@ -32,6 +42,23 @@ class TestFullySecureFeLWEShortInt(unittest.TestCase):
         self.assertIsInstance(c["c1"], Matrix)
         self.assertEqual(c["c1"].size(), (1, l))
 
+    def test_encryption_with_precomputed_randomness(self):
+        l = 10
+        mpk, msk = self.fe.set_up(11, l, 40, 40)
+        randomness = self.fe.precompute_randomness(mpk)
+        c = self.fe.encrypt(mpk, [2, 4, 6, 8, 10, 12, 14, 16, 18, 20], randomness)
+        self.assertIs(c["c0"], randomness["c0"])
+        self.assertEqual(c["c1"].size(), (1, l))
+
+    def test_encryption_with_precomputed_residues(self):
+        l = 10
+        mpk, msk = self.fe.set_up(11, l, 40, 40)
+        precomputed = self.fe.precompute(mpk)
+        s = Matrix.from_list([[3], [1], [4], [1], [5], [9], [2], [6], [5], [3], [5]])
+        self.assertEqual(self.fe._multiply_by_secret(mpk, 'A', s), self.fe._multiply_by_secret(precomputed, 'A', s))
+        c = self.fe.encrypt(precomputed, [2, 4, 6, 8, 10, 12, 14, 16, 18, 20])
+        self.assertEqual(c["c1"].size(), (1, l))
+
     def test_decrypt(self):
         n = 11
         l = 10
@@ -46,6 +73,73 @@ class TestFullySecureFeLWEShortInt(unittest.TestCase):
         self.assertIsInstance(decrypted, int)
         print(decrypted)
 
+    def test_decrypt_zero_inner_product(self):
+        mpk, msk = self.fe.set_up(11, 4, 40, 40)
+        y = [40, 40, 40, 40]
+        func_key = self.fe.get_functional_key(mpk, msk, y)
+        for _ in range(10):
+            self.assertEqual(0, self.fe.decrypt(mpk, func_key, y, self.fe.encrypt(mpk, [0, 0, 0, 0])))
+
+    def test_decrypt_batch(self):
+        mpk, msk = self.fe.set_up(11, 4, 10, 10)
+        xs = [[1, 2, 3, 4], [0, 0, 0, 0], [10, 10, 10, 10]]
+        ys = [[4, 3, 2, 1], [1, 1, 1, 1], [10, 0, 10, 0]]
+        func_keys = [self.fe.get_functional_key(mpk, msk, y) for y in ys]
+        ciphertexts = [self.fe.encrypt(mpk, x) for x in xs]
+        self.assertEqual([20, 0, 200], self.fe.decrypt_batch(mpk, func_keys, ys, ciphertexts))
+        self.assertEqual([], self.fe.decrypt_batch(mpk, [], [], []))
+
+    def test_encrypt_many(self):
+        mpk, msk = self.fe.set_up(11, 4, 10, 10)
+        xs = [[1, 2, 3, 4], [0, 0, 0, 0], [10, 10, 10, 10]]
+        y = [4, 3, 2, 1]
+        batch = self.fe.encrypt_many(mpk, xs)
+        self.assertEqual((3, mpk['A'].size()[0]), batch['c0'].size())
+        self.assertEqual((3, 4), batch['c1'].size())
+        func_key = self.fe.get_functional_key(mpk, msk, y)
+        decrypted = [self.fe.decrypt(mpk, func_key, y, c) for c in self.fe.split_ciphertexts(batch)]
+        self.assertEqual([20, 0, 100], decrypted)
+
+    def test_compress(self):
+        params = self.fe.generate_parameters(11, 4, 10, 10, compression=True)
+        mpk, msk = self.fe.set_up(11, 4, 10, 10, params=params)
+        modulus = self.fe.compression_modulus(mpk)
+        self.assertLess(modulus, mpk['q'])
+        xs = [[1, 2, 3, 4], [0, 0, 0, 0], [10, 10, 10, 10]]
+        ys = [[4, 3, 2, 1], [10, 10, 10, 10], [10, 0, 10, 0]]
+        func_keys = [self.fe.get_functional_key(mpk, msk, y) for y in ys]
+        ciphertexts = [self.fe.compress(mpk, self.fe.encrypt(mpk, x)) for x in xs]
+        self.assertEqual(modulus, ciphertexts[0]['q'])
+        self.assertLess(ciphertexts[0]['c0'].values.max(), modulus)
+        self.assertEqual([20, 0, 200], [self.fe.decrypt(mpk, func_key, y, c)
+                                        for func_key, y, c in zip(func_keys, ys, ciphertexts)])
+        ciphertexts[1] = self.fe.encrypt(mpk, xs[1])
+        self.assertEqual([20, 0, 200], self.fe.decrypt_batch(mpk, func_keys, ys, ciphertexts))
+        batch = self.fe.split_ciphertexts(self.fe.compress(mpk, self.fe.encrypt_many(mpk, xs)))
+        self.assertEqual([20, 0, 200], self.fe.decrypt_batch(mpk, func_keys, ys, batch))
+        with self.assertRaises(ValueError):
+            self.fe.compress(mpk, ciphertexts[0], mpk['q'])
+
+    def test_seeded_public_matrix(self):
+        block_rows = self.fe.SEED_BLOCK_ROWS
+        # several blocks of rows
+        self.fe.SEED_BLOCK_ROWS = 100
+        try:
+            mpk, msk = self.fe.set_up(11, 4, 10, 10, seeded=True)
+            self.assertNotIn('A', mpk)
+            A = self.fe.public_matrix(mpk)
+            self.assertEqual((mpk['m'], 11), A.size())
+            self.assertEqual(A, self.fe.public_matrix(mpk))
+            self.assertEqual(msk @ A % mpk['q'], mpk['U'])
+            self.assertEqual(A.to_list()[5:9], expand_matrix_mod(mpk['A_seed'], range(5, 9), 11, mpk['q']).to_list())
+
+            s = Matrix.from_list([[7]] * 11)
+            self.assertEqual(A @ s % mpk['q'], self.fe._multiply_by_secret(mpk, 'A', s))
+            x, y = [1, 2, 3, 4], [4, 3, 2, 1]
+            func_key = self.fe.get_functional_key(mpk, msk, y)
+            self.assertEqual(20, self.fe.decrypt(mpk, func_key, y, self.fe.encrypt(mpk, x)))
+        finally:
+            self.fe.SEED_BLOCK_ROWS = block_rows
 
 if __name__ == '__main__':
     unittest.main()